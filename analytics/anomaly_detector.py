@@ -0,0 +1,234 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from database.db_manager import LANE_SUFFIX, DatabaseManager
+
+
+# Rules per scope: (events, window seconds, severity). An anomaly is raised
+# when a key of that scope reaches `events` denials within the window.
+RULES = {
+    'global': (10, 60, 'CRITICAL'),  # Burst of denials across the site
+    'lane': (5, 60, 'HIGH'),         # Burst at one gate
+    'plate': (3, 600, 'HIGH'),       # One plate retrying again and again
+}
+
+BUCKETS_PER_WINDOW = 12
+MAX_TRACKED_KEYS = 10000  # Per scope; least recently seen keys are dropped
+
+# Escalated alerts are written back to the alert stream; this prefix keeps
+# the detector from counting its own output
+ANOMALY_PREFIX = 'ANOMALY'
+
+
+class SlidingWindowCounter:
+    """Event count over the last `window` seconds, in fixed time buckets.
+
+    The window is split into BUCKETS_PER_WINDOW buckets and the running total
+    is adjusted as buckets expire, so adding an event and reading the count
+    are O(1) with the count accurate to one bucket width.
+    """
+
+    __slots__ = ('bucket_seconds', 'counts', 'current', 'total')
+
+    def __init__(self, window: int):
+        self.bucket_seconds = window / BUCKETS_PER_WINDOW
+        self.counts = [0] * BUCKETS_PER_WINDOW
+        self.current = None  # Index of the newest bucket since the epoch
+        self.total = 0
+
+    def advance(self, now: float):
+        bucket = int(now // self.bucket_seconds)
+        if self.current is None:
+            self.current = bucket
+            return
+
+        # At most BUCKETS_PER_WINDOW buckets are cleared, however long the gap
+        for expired in range(self.current + 1, min(bucket, self.current + BUCKETS_PER_WINDOW) + 1):
+            position = expired % BUCKETS_PER_WINDOW
+            self.total -= self.counts[position]
+            self.counts[position] = 0
+        self.current = max(self.current, bucket)
+
+    def add(self, now: float, count: int = 1) -> int:
+        self.advance(now)
+        self.counts[self.current % BUCKETS_PER_WINDOW] += count
+        self.total += count
+        return self.total
+
+
+class ScopeCounters:
+    """Sliding-window counters for one scope, keyed by plate, lane or 'all'"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.counters: 'OrderedDict[str, SlidingWindowCounter]' = OrderedDict()
+        self.raised_at: Dict[str, float] = {}
+
+    def add(self, key: str, now: float) -> int:
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = self.counters[key] = SlidingWindowCounter(self.window)
+            if len(self.counters) > MAX_TRACKED_KEYS:
+                evicted, _ = self.counters.popitem(last=False)
+                self.raised_at.pop(evicted, None)
+        else:
+            self.counters.move_to_end(key)
+        return counter.add(now)
+
+    def should_raise(self, key: str, now: float) -> bool:
+        """Raise once per window for a key that stays above its threshold"""
+        if now - self.raised_at.get(key, float('-inf')) < self.window:
+            return False
+        self.raised_at[key] = now
+        return True
+
+
+def classify_alert(raw: str) -> Optional[Tuple[str, Optional[str]]]:
+    """(lane, plate) of a denial in the security_alerts stream, or None"""
+    try:
+        alert = json.loads(raw)
+    except ValueError:
+        return None
+
+    message = alert.get('alert_message', '')
+    if message.startswith(ANOMALY_PREFIX) or not ('UNAUTHORIZED' in message or 'DENIED' in message):
+        return None
+    # Alerts written before lanes were named only say which kind of gate they came from
+    lane = alert.get('lane') or ('exit' if 'EXIT' in message else 'entry' if 'ENTRY' in message else 'system')
+    return lane, alert.get('plate_number') or None
+
+
+def classify_log(message: str) -> Optional[Tuple[str, Optional[str]]]:
+    """(lane, plate) of a denial in the logs stream, or None.
+
+    Logs read "<timestamp> - <EVENT> - <plate> - ... - Lane: <name>". Unauthorized
+    exits are also written as security alerts, so only denials without an alert count.
+    """
+    message, _, lane = message.partition(LANE_SUFFIX)
+    parts = message.split(' - ')
+    if len(parts) < 3 or 'UNAUTHORIZED' in parts[1] or 'DENIED' not in parts[1]:
+        return None
+    if not lane:
+        lane = 'entry' if parts[1].startswith('ENTRY') else 'exit' if parts[1].startswith('EXIT') else 'system'
+    return lane, parts[2].strip() or None
+
+
+class AnomalyDetector:
+    """Incremental detector of denial bursts and repeated attempts.
+
+    A background thread tails the Redis security_alerts and logs lists from
+    the last position read, so each event is processed once. Each access
+    denial updates three sliding-window counters, global, per lane and per
+    plate, in O(1). When a counter reaches its rule threshold the detector
+    logs an escalated security alert and calls on_anomaly. Per-plate state
+    is capped at MAX_TRACKED_KEYS, and read positions are kept in Redis so a
+    new producer resumes where the previous one stopped.
+    """
+
+    CURSOR_KEY = 'anomaly:cursor'
+    STREAMS = {'security_alerts': classify_alert, 'logs': classify_log}
+
+    def __init__(self, on_anomaly: Optional[Callable[[Dict], None]] = None, poll_interval: float = 1.0,
+                 batch_size: int = 500, should_run: Optional[Callable[[], bool]] = None):
+        self.on_anomaly = on_anomaly or (lambda anomaly: None)
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.should_run = should_run or (lambda: True)
+        self.scopes = {scope: ScopeCounters(window) for scope, (_, window, _) in RULES.items()}
+        self.db_manager = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        """Start the detector thread"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        """Detector loop, on a DatabaseManager of its own so alerts don't contend with the lanes' connection"""
+        self.db_manager = DatabaseManager()
+
+        while not self.stopped.is_set():
+            if not self.should_run():
+                self.stopped.wait(self.poll_interval)
+                continue
+
+            try:
+                busy = False
+                for stream, classify in self.STREAMS.items():
+                    busy |= self.consume(stream, classify)
+            except Exception as e:
+                print(f"[ANOMALY] Detector step failed: {e}")
+                busy = False
+
+            if not busy:
+                self.stopped.wait(self.poll_interval)
+
+    def consume(self, stream: str, classify) -> bool:
+        """Process the next batch of a stream; True if a full batch was read"""
+        redis_client = self.db_manager.redis_client
+        position = redis_client.hget(self.CURSOR_KEY, stream)
+        length = redis_client.llen(stream)
+
+        if position is None or int(position) > length:
+            # First run, or the list was cleared: start from the end, not the history
+            redis_client.hset(self.CURSOR_KEY, stream, length)
+            return False
+
+        position = int(position)
+        items = redis_client.lrange(stream, position, position + self.batch_size - 1)
+        for raw in items:
+            event = classify(raw)
+            if event:
+                self.observe(*event)
+
+        if items:
+            redis_client.hset(self.CURSOR_KEY, stream, position + len(items))
+        return len(items) == self.batch_size
+
+    def observe(self, lane: str, plate: Optional[str], now: Optional[float] = None):
+        """Count one denial and escalate any rule it trips"""
+        now = now or time.time()
+        keys = {'global': 'all', 'lane': lane, 'plate': plate}
+
+        for scope, key in keys.items():
+            if key is None:
+                continue
+            threshold, window, severity = RULES[scope]
+            count = self.scopes[scope].add(key, now)
+            if count >= threshold and self.scopes[scope].should_raise(key, now):
+                self.escalate(scope, key, count, window, severity, plate, lane)
+
+    def escalate(self, scope: str, key: str, count: int, window: int, severity: str, plate: Optional[str],
+                 lane: str):
+        """Log and broadcast an anomaly; lane is the lane of the denial that tripped the rule"""
+        descriptions = {
+            'global': f"{count} access denials across all lanes",
+            'lane': f"{count} access denials at the {key} lane",
+            'plate': f"{count} denied attempts by {key}",
+        }
+        message = f"{ANOMALY_PREFIX} - {descriptions[scope]} in the last {window // 60} min"
+
+        if self.db_manager:
+            self.db_manager.log_security_alert(plate if scope == 'plate' else None, message, severity, lane=lane)
+
+        anomaly = {
+            'scope': scope,
+            'key': key,
+            'lane': lane,
+            'count': count,
+            'window_seconds': window,
+            'severity': severity,
+            'message': message,
+            'timestamp': datetime.now().isoformat()
+        }
+        print(f"[ANOMALY] {message}")
+        self.on_anomaly(anomaly)
@@ -0,0 +1,146 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+
+# Relative accuracy of reported quantiles (2%); bucket i covers (gamma^(i-1), gamma^i]
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+# Durations are clamped to [1 s, 60 days], which bounds a sketch to ~400 buckets
+MIN_SECONDS = 1
+MAX_SECONDS = 60 * 86400
+
+HOUR_TTL = 3 * 86400
+DAY_TTL = 400 * 86400
+
+
+def bucket_index(seconds: float) -> int:
+    """Log bucket holding a duration"""
+    seconds = min(max(seconds, MIN_SECONDS), MAX_SECONDS)
+    return int(math.ceil(math.log(seconds) / LOG_GAMMA))
+
+
+def bucket_value(index: int) -> float:
+    """Representative duration of a bucket, within RELATIVE_ACCURACY of its members"""
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+class DwellTimeSketch:
+    """Mergeable quantile sketch of parking durations.
+
+    A log-bucketed histogram in the style of DDSketch: every quantile it
+    returns is within RELATIVE_ACCURACY of the true value, memory is bounded
+    by the number of buckets between MIN_SECONDS and MAX_SECONDS, and two
+    sketches merge by adding bucket counts, so hourly sketches combine into
+    any window.
+    """
+
+    def __init__(self, buckets: Optional[Dict[int, int]] = None, total_seconds: float = 0.0):
+        self.buckets = dict(buckets or {})
+        self.count = sum(self.buckets.values())
+        self.total_seconds = total_seconds
+
+    def add(self, seconds: float):
+        index = bucket_index(seconds)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_seconds += seconds
+
+    def merge(self, other: 'DwellTimeSketch'):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total_seconds += other.total_seconds
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Duration in seconds at quantile q (0..1), or None if empty"""
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return bucket_value(index)
+        return bucket_value(max(self.buckets))
+
+    def summary(self) -> Dict:
+        """Count, mean and p50/p95/p99 in hours"""
+        def hours(seconds):
+            return round(seconds / 3600, 2) if seconds is not None else None
+
+        return {
+            'count': self.count,
+            'mean_hours': hours(self.total_seconds / self.count) if self.count else None,
+            'p50': hours(self.quantile(0.50)),
+            'p95': hours(self.quantile(0.95)),
+            'p99': hours(self.quantile(0.99)),
+        }
+
+    @classmethod
+    def from_redis_hash(cls, data: Dict[str, str]) -> 'DwellTimeSketch':
+        buckets = {int(field): int(value) for field, value in data.items() if field.lstrip('-').isdigit()}
+        return cls(buckets, float(data.get('sum', 0)))
+
+
+class DwellSketchStore:
+    """Dwell-time sketches kept in Redis per hour and per day of exit.
+
+    Each sketch is a hash of bucket index -> count plus a 'sum' field, so a
+    recorded exit is a single pipelined round of HINCRBYs that any process
+    can issue, and a window is answered by merging at most a few dozen
+    bounded hashes regardless of how many exits they summarise.
+    """
+
+    HOUR_KEY = 'dwell:hour:{:%Y%m%d%H}'
+    DAY_KEY = 'dwell:day:{:%Y%m%d}'
+
+    # Window name -> (granularity, number of periods ending now)
+    WINDOWS = {
+        '1h': ('hour', 1),
+        '24h': ('hour', 24),
+        '7d': ('day', 7),
+        '30d': ('day', 30),
+    }
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    def record(self, duration_seconds: float, exited_at: Optional[datetime] = None):
+        """Add one completed stay to the hour and day sketches of its exit time"""
+        exited_at = exited_at or datetime.now()
+        index = bucket_index(duration_seconds)
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key, ttl in ((self.HOUR_KEY.format(exited_at), HOUR_TTL), (self.DAY_KEY.format(exited_at), DAY_TTL)):
+            pipe.hincrby(key, index, 1)
+            pipe.hincrbyfloat(key, 'sum', duration_seconds)
+            pipe.expire(key, ttl)
+        pipe.execute()
+
+    def window_keys(self, window: str, now: Optional[datetime] = None) -> Iterable[str]:
+        granularity, periods = self.WINDOWS[window]
+        now = now or datetime.now()
+        if granularity == 'hour':
+            return [self.HOUR_KEY.format(now - timedelta(hours=i)) for i in range(periods)]
+        return [self.DAY_KEY.format(now - timedelta(days=i)) for i in range(periods)]
+
+    def sketch(self, window: str, now: Optional[datetime] = None) -> DwellTimeSketch:
+        """Merged sketch for a window name from WINDOWS"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in self.window_keys(window, now):
+            pipe.hgetall(key)
+
+        merged = DwellTimeSketch()
+        for data in pipe.execute():
+            if data:
+                merged.merge(DwellTimeSketch.from_redis_hash(data))
+        return merged
+
+    def percentiles(self, now: Optional[datetime] = None) -> Dict:
+        """Summary of every window, for the dashboard"""
+        return {window: self.sketch(window, now).summary() for window in self.WINDOWS}
@@ -0,0 +1,103 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+# Count-min sketch shape: estimates overcount by at most e/WIDTH of the
+# period's events, with probability 1 - e^-DEPTH
+SKETCH_DEPTH = 4
+SKETCH_WIDTH = 2048
+
+# Candidates kept per top-K set; more than shown so late risers can overtake
+TOP_CAPACITY = 50
+
+# Event kinds tracked, with a label for the dashboard
+KINDS = {
+    'visits': 'Most frequent parkers',
+    'denials': 'Most denied exits',
+}
+
+# Period -> (key date format, TTL in seconds)
+PERIODS = {
+    'day': ('%Y%m%d', 35 * 86400),
+    'month': ('%Y%m', 400 * 86400),
+}
+
+
+def sketch_columns(item: str) -> List[int]:
+    """Column of the item in each sketch row; stable across processes unlike hash()"""
+    digest = hashlib.blake2b(item.encode('utf-8'), digest_size=4 * SKETCH_DEPTH).digest()
+    return [int.from_bytes(digest[4 * row:4 * row + 4], 'little') % SKETCH_WIDTH for row in range(SKETCH_DEPTH)]
+
+
+class HeavyHitterTracker:
+    """Streaming top-K plates per day and per month, kept in Redis.
+
+    Each kind and period has a count-min sketch, stored as a hash of
+    "row:column" counters, and a sorted set of at most TOP_CAPACITY candidate
+    plates scored by their sketch estimate. Recording an event increments one
+    counter per row; the minimum of the returned counts is the plate's
+    estimate, which replaces its score, and the lowest candidates are trimmed
+    off like a min-heap. Memory is SKETCH_DEPTH x SKETCH_WIDTH counters plus
+    TOP_CAPACITY members per period, however many distinct plates are seen.
+    """
+
+    SKETCH_KEY = 'hh:{kind}:cms:{period}'
+    TOP_KEY = 'hh:{kind}:top:{period}'
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    def period_keys(self, kind: str, when: datetime):
+        for period, (date_format, ttl) in PERIODS.items():
+            suffix = when.strftime(date_format)
+            yield (self.SKETCH_KEY.format(kind=kind, period=suffix),
+                   self.TOP_KEY.format(kind=kind, period=suffix), ttl)
+
+    def record(self, kind: str, plate: str, when: Optional[datetime] = None):
+        """Count one event for a plate in the current day and month"""
+        if kind not in KINDS or not plate:
+            return
+
+        when = when or datetime.now()
+        columns = sketch_columns(plate)
+        keys = list(self.period_keys(kind, when))
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for sketch_key, _, ttl in keys:
+            for row, column in enumerate(columns):
+                pipe.hincrby(sketch_key, f"{row}:{column}", 1)
+            pipe.expire(sketch_key, ttl)
+        results = pipe.execute()
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for index, (_, top_key, ttl) in enumerate(keys):
+            counts = results[index * (SKETCH_DEPTH + 1):index * (SKETCH_DEPTH + 1) + SKETCH_DEPTH]
+            # GT keeps a concurrent writer's higher estimate
+            pipe.zadd(top_key, {plate: min(counts)}, gt=True)
+            pipe.zremrangebyrank(top_key, 0, -TOP_CAPACITY - 1)
+            pipe.expire(top_key, ttl)
+        pipe.execute()
+
+    def estimate(self, kind: str, plate: str, period: str = 'day', when: Optional[datetime] = None) -> int:
+        """Sketch estimate of a plate's count; never below the true count"""
+        date_format, _ = PERIODS[period]
+        sketch_key = self.SKETCH_KEY.format(kind=kind, period=(when or datetime.now()).strftime(date_format))
+        counts = self.redis_client.hmget(sketch_key, [f"{row}:{column}" for row, column in
+                                                      enumerate(sketch_columns(plate))])
+        return min(int(count or 0) for count in counts)
+
+    def top(self, kind: str, period: str = 'day', k: int = 10, when: Optional[datetime] = None) -> List[Dict]:
+        """The k plates with the highest estimated counts"""
+        date_format, _ = PERIODS[period]
+        top_key = self.TOP_KEY.format(kind=kind, period=(when or datetime.now()).strftime(date_format))
+        return [{'plate': plate, 'count': int(score)}
+                for plate, score in self.redis_client.zrevrange(top_key, 0, k - 1, withscores=True)]
+
+    def summary(self, k: int = 10) -> Dict:
+        """Top plates of every kind for today and this month, for the dashboard"""
+        now = datetime.now()
+        return {
+            kind: {'label': label, **{period: self.top(kind, period, k, now) for period in PERIODS}}
+            for kind, label in KINDS.items()
+        }
@@ -0,0 +1,256 @@
+import calendar
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import numpy as np
+
+from database.db_manager import SQLITE_DB_PATH
+
+
+# Analysis windows: length in seconds and the occupancy curve resolution
+WINDOWS = {
+    '24h': (24 * 3600, 15 * 60),
+    '7d': (7 * 86400, 3600),
+    '30d': (30 * 86400, 6 * 3600),
+    '365d': (365 * 86400, 86400),
+}
+
+# Dwell-time histogram bin edges in hours
+DWELL_BINS = np.array([0, 0.5, 1, 2, 3, 4, 6, 8, 12, 24, 48, np.inf])
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+# Status codes for the status column
+STATUS_UNPAID, STATUS_PAID_INSIDE, STATUS_EXITED = 0, 1, 2
+
+# SQLite parses the stored timestamps itself; strftime('%s') treats them as
+# UTC, so the naive local times map straight to epoch ints whose day and hour
+# arithmetic gives local weekdays and hours.
+SELECT_COLUMNS = """
+    SELECT id,
+           CAST(strftime('%s', entry_timestamp) AS INTEGER),
+           CAST(strftime('%s', exit_timestamp) AS INTEGER),
+           CAST(strftime('%s', payment_timestamp) AS INTEGER),
+           payment_status,
+           exit_status,
+           charge_amount
+    FROM entries
+"""
+
+# Full load: the history period plus stays that are still open
+FULL_LOAD_QUERY = SELECT_COLUMNS + "WHERE entry_timestamp >= ? OR exit_status = 0 ORDER BY id"
+
+# Incremental load: new entries and entries that exited or paid since the last refresh
+DELTA_LOAD_QUERY = SELECT_COLUMNS + "WHERE id > ? OR exit_timestamp >= ? OR payment_timestamp >= ? ORDER BY id"
+
+COLUMN_NAMES = ('ids', 'entry', 'exit', 'payment', 'charge', 'status', 'paid')
+
+
+def local_epoch(moment: Optional[datetime] = None) -> int:
+    """Naive local time as an epoch int on the same scale as the load queries"""
+    return calendar.timegm((moment or datetime.now()).timetuple())
+
+
+def format_epoch(epoch: int, fmt: str = '%Y-%m-%d %H:%M:%S') -> str:
+    """Inverse of local_epoch, formatted"""
+    return datetime.fromtimestamp(int(epoch), timezone.utc).strftime(fmt)
+
+
+class EntryColumns:
+    """Entries as columnar NumPy arrays sorted by entry id"""
+
+    def __init__(self, rows):
+        data = np.array(rows, dtype=np.float64).reshape(-1, 7)  # NULL -> nan
+
+        self.ids = data[:, 0].astype(np.int64)
+        self.entry = np.nan_to_num(data[:, 1], nan=-1).astype(np.int64)
+        self.exit = np.nan_to_num(data[:, 2], nan=-1).astype(np.int64)
+        self.payment = np.nan_to_num(data[:, 3], nan=-1).astype(np.int64)
+        self.charge = np.nan_to_num(data[:, 6], nan=0.0)
+
+        paid = data[:, 4] == 1
+        exited = data[:, 5] == 1
+        self.status = np.where(exited, STATUS_EXITED, np.where(paid, STATUS_PAID_INSIDE, STATUS_UNPAID)).astype(np.int8)
+        self.paid = paid
+
+    def subset(self, mask):
+        """Rows selected by a boolean mask, as a new EntryColumns"""
+        selected = EntryColumns.__new__(EntryColumns)
+        for name in COLUMN_NAMES:
+            setattr(selected, name, getattr(self, name)[mask])
+        return selected
+
+    def merge(self, delta: 'EntryColumns'):
+        """Overwrite rows present in delta and add the new ones, keeping id order"""
+        if not len(delta):
+            return
+
+        positions = np.searchsorted(self.ids, delta.ids)
+        clipped = np.minimum(positions, max(len(self.ids) - 1, 0))
+        known = (positions < len(self.ids)) & (self.ids[clipped] == delta.ids) if len(self.ids) else \
+            np.zeros(len(delta), dtype=bool)
+
+        for name in COLUMN_NAMES:
+            getattr(self, name)[positions[known]] = getattr(delta, name)[known]
+
+        if not known.all():
+            added = delta.subset(~known)
+            order = np.argsort(np.concatenate([self.ids, added.ids]), kind='stable')
+            for name in COLUMN_NAMES:
+                setattr(self, name, np.concatenate([getattr(self, name), getattr(added, name)])[order])
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class HistoryAnalytics:
+    """Vectorized analytics over the SQLite entries history.
+
+    The history period is loaded once with one bulk query into columnar
+    arrays held in memory; later refreshes only read entries that are new or
+    that exited or paid since the previous refresh, with a periodic full
+    reload to pick up deletions. Every metric is computed with NumPy
+    operations and cached per window for cache_ttl seconds.
+    """
+
+    def __init__(self, db_path: str = SQLITE_DB_PATH, cache_ttl: int = 60,
+                 history_days: int = 365, full_reload_interval: int = 3600):
+        self.db_path = db_path
+        self.cache_ttl = cache_ttl
+        self.history_seconds = history_days * 86400
+        self.full_reload_interval = full_reload_interval
+        self.columns = None
+        self.last_refresh = None  # Local time string of the last load
+        self.last_full_load = 0
+        self.cache = {}  # window -> (computed_at, result)
+        self.lock = threading.Lock()
+
+    def refresh(self) -> EntryColumns:
+        """Bring the in-memory columns up to date with SQLite"""
+        # Look back a little so writes racing the previous refresh are not missed
+        refresh_time = format_epoch(local_epoch() - 5)
+
+        with closing(sqlite3.connect(self.db_path)) as connection:
+            if self.columns is None or time.time() - self.last_full_load > self.full_reload_interval:
+                since = format_epoch(local_epoch() - self.history_seconds)
+                self.columns = EntryColumns(connection.execute(FULL_LOAD_QUERY, (since,)).fetchall())
+                self.last_full_load = time.time()
+            else:
+                max_id = int(self.columns.ids[-1]) if len(self.columns) else 0
+                rows = connection.execute(DELTA_LOAD_QUERY, (max_id, self.last_refresh, self.last_refresh)).fetchall()
+                self.columns.merge(EntryColumns(rows))
+
+        self.last_refresh = refresh_time
+        return self.columns
+
+    def get_window(self, window: str = '30d') -> Dict:
+        """Cached analytics for a window name from WINDOWS"""
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown analytics window: {window}")
+
+        with self.lock:
+            cached = self.cache.get(window)
+            if cached and time.time() - cached[0] < self.cache_ttl:
+                return cached[1]
+
+            result = self.compute(window)
+            self.cache[window] = (time.time(), result)
+            return result
+
+    def compute(self, window: str) -> Dict:
+        """Compute every metric for a window"""
+        started = time.perf_counter()
+        length, resolution = WINDOWS[window]
+        now = local_epoch()
+        start = now - length
+        columns = self.refresh()
+        started_in_window = columns.subset(columns.entry >= start)
+
+        result = {
+            'window': window,
+            'sessions': len(started_in_window),
+            'dwell': self.dwell_distribution(started_in_window),
+            'occupancy': self.occupancy_curve(columns, start, now, resolution),
+            'revenue': self.revenue_by_weekday_hour(columns.subset(columns.payment >= start)),
+            'peaks': self.peak_hours(started_in_window, length),
+        }
+        result['compute_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        result['generated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return result
+
+    @staticmethod
+    def dwell_distribution(columns: EntryColumns) -> Dict:
+        """Histogram and percentiles of parking duration for completed stays"""
+        done = (columns.status == STATUS_EXITED) & (columns.exit >= columns.entry)
+        hours = (columns.exit[done] - columns.entry[done]) / 3600.0
+
+        counts, _ = np.histogram(hours, bins=DWELL_BINS)
+        labels = [f"{low:g}-{high:g}h" if np.isfinite(high) else f"{low:g}h+"
+                  for low, high in zip(DWELL_BINS[:-1], DWELL_BINS[1:])]
+
+        percentiles = {}
+        if len(hours):
+            p50, p90, p95, p99 = np.percentile(hours, [50, 90, 95, 99])
+            percentiles = {'p50': round(float(p50), 2), 'p90': round(float(p90), 2),
+                           'p95': round(float(p95), 2), 'p99': round(float(p99), 2)}
+
+        return {
+            'labels': labels,
+            'counts': counts.tolist(),
+            'mean_hours': round(float(hours.mean()), 2) if len(hours) else 0,
+            'percentiles': percentiles,
+        }
+
+    @staticmethod
+    def occupancy_curve(columns: EntryColumns, start: int, end: int, resolution: int) -> Dict:
+        """Cars inside at each sample time: entries so far minus exits so far"""
+        samples = np.arange(start + resolution, end + 1, resolution, dtype=np.int64)
+        entries = np.sort(columns.entry[columns.entry >= 0])
+        exits = np.sort(columns.exit[(columns.status == STATUS_EXITED) & (columns.exit >= 0)])
+
+        inside = (np.searchsorted(entries, samples, side='right') -
+                  np.searchsorted(exits, samples, side='right'))
+
+        return {
+            'timestamps': [format_epoch(t, '%Y-%m-%d %H:%M') for t in samples],
+            'inside': inside.tolist(),
+            'peak': int(inside.max()) if len(inside) else 0,
+        }
+
+    @staticmethod
+    def revenue_by_weekday_hour(columns: EntryColumns) -> Dict:
+        """7 x 24 revenue matrix keyed on payment time (Monday first)"""
+        paid = columns.paid & (columns.payment >= 0)
+        epochs = columns.payment[paid]
+        weekday = (epochs // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+        hour = (epochs % 86400) // 3600
+
+        matrix = np.bincount(weekday * 24 + hour, weights=columns.charge[paid], minlength=7 * 24).reshape(7, 24)
+
+        return {
+            'weekdays': WEEKDAYS,
+            'matrix': np.round(matrix, 2).tolist(),
+            'by_weekday': np.round(matrix.sum(axis=1), 2).tolist(),
+            'by_hour': np.round(matrix.sum(axis=0), 2).tolist(),
+            'total': round(float(matrix.sum()), 2),
+        }
+
+    @staticmethod
+    def peak_hours(columns: EntryColumns, length: int) -> Dict:
+        """Average arrivals per hour of day and the hours well above the mean"""
+        entries = columns.entry[columns.entry >= 0]
+        days = max(length / 86400, 1)
+        per_hour = np.bincount((entries % 86400) // 3600, minlength=24) / days
+
+        threshold = per_hour.mean() + per_hour.std()
+        peaks = np.flatnonzero(per_hour > threshold) if per_hour.any() else np.array([], dtype=np.int64)
+
+        return {
+            'arrivals_per_hour': np.round(per_hour, 2).tolist(),
+            'peak_hours': [f"{h:02d}:00" for h in peaks.tolist()],
+            'busiest_hour': f"{int(per_hour.argmax()):02d}:00" if per_hour.any() else None,
+        }
@@ -0,0 +1,357 @@
+"""Load test for the dashboard with synthetic history and simulated viewers.
+
+Seeds Redis and a throwaway SQLite file with N synthetic parking sessions,
+starts dashboard/dashboard1.py against them, then opens M Socket.IO clients
+per step and measures how the 2-second update loop copes:
+
+- producer cycle and emit time, from the dashboard's /metrics histograms
+- delivery: updates per second, fan-out spread within a cycle, cycle period
+  and missed deliveries, from client receive times
+- server CPU and resident memory, from psutil
+
+Everything runs on one box. Without --redis-url a fakeredis TCP server is
+started as the Redis stand-in (pip install fakeredis).
+
+    python benchmarks/dashboard_load.py --sessions 200000 --clients 10,50,100,200
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_TOPICS = ['stats', 'recent_entries', 'current_inside', 'recent_logs', 'system_health', 'hourly_stats']
+UPDATE_INTERVAL = 2  # Matches dashboard1.UPDATE_INTERVAL
+CYCLE_GAP = 0.5  # Receipts further apart than this belong to different cycles
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sessions', type=int, default=50000, help='Synthetic sessions to seed')
+    parser.add_argument('--inside', type=int, default=80, help='How many of them are still inside')
+    parser.add_argument('--days', type=int, default=90, help='History span of the sessions')
+    parser.add_argument('--clients', default='10,50,100', help='Comma-separated client counts, one step each')
+    parser.add_argument('--step-seconds', type=int, default=30, help='Measurement time per step')
+    parser.add_argument('--clients-per-process', type=int, default=50, help='Simulated clients per worker process')
+    parser.add_argument('--topics', default=','.join(DEFAULT_TOPICS), help='Topics every client subscribes to')
+    parser.add_argument('--redis-url', help='Use this Redis instead of a fakeredis stand-in (it is flushed!)')
+    parser.add_argument('--fake-redis-port', type=int, default=6390)
+    parser.add_argument('--port', type=int, default=5055, help='Dashboard port')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args()
+
+
+def start_fake_redis(port):
+    """Serve fakeredis over TCP so the dashboard connects to it like to Redis"""
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        sys.exit("fakeredis is not installed; pip install fakeredis or pass --redis-url")
+
+    server = TcpFakeServer(('127.0.0.1', port), server_type='redis')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'redis://127.0.0.1:{port}/0'
+
+
+def seed(sessions, inside, days):
+    """Write synthetic sessions to Redis and SQLite in bulk"""
+    from database.db_manager import DatabaseManager
+    from database.occupancy_counters import OccupancyCounters
+
+    db_manager = DatabaseManager()
+    redis_client = db_manager.redis_client
+    redis_client.flushdb()
+
+    random.seed(42)
+    plates = [f"RA{random.choice('BCDEFGH')}{random.randint(100, 999)}{random.choice('ABCDEFGHJK')}"
+              for _ in range(max(sessions // 5, 1))]
+    now = datetime.now()
+    started = time.perf_counter()
+    rows = []
+    pipe = redis_client.pipeline(transaction=False)
+
+    for entry_id in range(1, sessions + 1):
+        plate = random.choice(plates)
+        still_inside = entry_id > sessions - inside
+        if still_inside:
+            entered = now - timedelta(minutes=random.uniform(5, 600))
+            paid = random.random() < 0.3
+            exited = None
+        else:
+            entered = now - timedelta(days=days) + timedelta(seconds=(days * 86400 - 3600) * entry_id / sessions)
+            exited = entered + timedelta(minutes=random.uniform(10, 480))
+            paid = True
+
+        charge = 500 * max(1, int((((exited or now) - entered).total_seconds() + 3599) // 3600)) if paid else None
+        payment_time = (exited or now) - timedelta(minutes=2) if paid else None
+        fmt = '%Y-%m-%d %H:%M:%S'
+
+        pipe.hset(f"entry:{entry_id}", mapping={
+            'plate_number': plate,
+            'entry_timestamp': entered.strftime(fmt),
+            'payment_status': '1' if paid else '0',
+            'exit_status': '1' if exited else '0',
+            'exit_timestamp': exited.strftime(fmt) if exited else '',
+            'charge_amount': str(charge) if charge else '',
+            'payment_timestamp': payment_time.strftime(fmt) if payment_time else ''
+        })
+        pipe.sadd(f"entries:{plate}", entry_id)
+        rows.append((entry_id, plate, entered.replace(microsecond=0), int(paid), int(bool(exited)),
+                     exited.replace(microsecond=0) if exited else None, charge,
+                     payment_time.replace(microsecond=0) if payment_time else None))
+
+        if entry_id % 5000 == 0:
+            pipe.execute()
+            pipe = redis_client.pipeline(transaction=False)
+            flush_rows(db_manager, rows)
+            rows = []
+
+    pipe.set('next_entry_id', sessions)
+    pipe.delete(OccupancyCounters.KEY)  # Written around the DatabaseManager, so the dashboard reseeds the totals
+    pipe.execute()
+    flush_rows(db_manager, rows)
+    db_manager.close_connections()
+    print(f"[SEED] {sessions} sessions ({inside} inside) in {time.perf_counter() - started:.1f}s")
+
+
+def flush_rows(db_manager, rows):
+    if rows:
+        db_manager.sqlite_connection.executemany("""
+            INSERT OR REPLACE INTO entries
+            (id, plate_number, entry_timestamp, payment_status, exit_status,
+             exit_timestamp, charge_amount, payment_timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        db_manager.sqlite_connection.commit()
+
+
+def start_dashboard(env, port):
+    """Run the dashboard as a separate process and wait until it serves"""
+    log = open(os.path.join(tempfile.gettempdir(), 'dashboard_load_server.log'), 'w')
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'dashboard', 'dashboard1.py')],
+                               cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"Dashboard exited early, see {log.name}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=2)
+            return process
+        except OSError:
+            time.sleep(0.5)
+
+    process.kill()
+    sys.exit(f"Dashboard did not start, see {log.name}")
+
+
+def scrape_histograms(port):
+    """{metric: (bucket bounds, cumulative counts, sum, count)} from /metrics"""
+    text = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+    histograms = {}
+    for line in text.splitlines():
+        match = re.match(r'(\w+?)_(bucket|sum|count)\{([^}]*)\} (\S+)$', line)
+        if not match:
+            continue
+        name, part, labels, value = match.groups()
+        entry = histograms.setdefault(name, {'buckets': {}, 'sum': 0.0, 'count': 0.0})
+        if part == 'bucket':
+            le = re.search(r'le="([^"]+)"', labels).group(1)
+            bound = float('inf') if le == '+Inf' else float(le)
+            entry['buckets'][bound] = entry['buckets'].get(bound, 0) + float(value)
+        else:
+            entry[part] += float(value)
+    return histograms
+
+
+def histogram_delta(before, after, name):
+    """Mean and approximate p50/p95 (bucket upper bounds) of observations between two scrapes"""
+    old, new = before.get(name), after.get(name)
+    if not new:
+        return {}
+    old = old or {'buckets': {}, 'sum': 0.0, 'count': 0.0}
+    count = new['count'] - old['count']
+    if count <= 0:
+        return {}
+
+    buckets = sorted((bound, new['buckets'][bound] - old['buckets'].get(bound, 0)) for bound in new['buckets'])
+
+    def quantile(q):
+        for bound, cumulative in buckets:
+            if cumulative >= q * count:
+                return bound
+        return float('inf')
+
+    return {
+        'count': int(count),
+        'mean_ms': round((new['sum'] - old['sum']) / count * 1000, 2),
+        'p50_ms_le': round(quantile(0.50) * 1000, 2),
+        'p95_ms_le': round(quantile(0.95) * 1000, 2),
+    }
+
+
+def client_worker(url, count, topics, ready, stop, results):
+    """Host `count` Socket.IO clients and report when each received a stats update"""
+    import socketio
+
+    receipts = []
+    clients = []
+    for _ in range(count):
+        client = socketio.Client(reconnection=False)
+        client.on('data_update', lambda data: receipts.append(time.time()) if 'stats' in data else None)
+        try:
+            client.connect(url, transports=['websocket'], wait_timeout=10)
+            client.emit('subscribe', {'topics': topics})
+            clients.append(client)
+        except Exception as e:
+            print(f"[CLIENT] Connection failed: {e}")
+
+    ready.put(len(clients))
+    stop.wait()
+    for client in clients:
+        client.disconnect()
+    results.put(receipts)
+
+
+def analyse_receipts(receipts, clients, start, end):
+    """Group receive times into update cycles and summarise delivery"""
+    times = sorted(t for t in receipts if start <= t <= end)
+    cycles = []
+    for t in times:
+        if cycles and t - cycles[-1][-1] <= CYCLE_GAP:
+            cycles[-1].append(t)
+        else:
+            cycles.append([t])
+
+    # Partial cycles at the window edges would skew the spread
+    complete = cycles[1:-1] if len(cycles) > 2 else cycles
+    spreads = [(cycle[-1] - cycle[0]) * 1000 for cycle in complete]
+    periods = [b[0] - a[0] for a, b in zip(complete, complete[1:])]
+    expected = len(complete) * clients
+
+    return {
+        'updates_per_second': round(len(times) / (end - start), 1),
+        'cycles': len(complete),
+        'cycle_period_s': round(statistics.mean(periods), 3) if periods else None,
+        'fanout_spread_p50_ms': round(statistics.median(spreads), 1) if spreads else None,
+        'fanout_spread_p95_ms': round(sorted(spreads)[int(0.95 * (len(spreads) - 1))], 1) if spreads else None,
+        'missed_deliveries': max(expected - sum(len(cycle) for cycle in complete), 0),
+    }
+
+
+def run_step(args, url, server, clients, topics):
+    """Measure the dashboard with `clients` simulated viewers"""
+    ready, results = multiprocessing.Queue(), multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    workers = []
+    remaining = clients
+    while remaining > 0:
+        count = min(remaining, args.clients_per_process)
+        worker = multiprocessing.Process(target=client_worker, args=(url, count, topics, ready, stop, results))
+        worker.start()
+        workers.append(worker)
+        remaining -= count
+
+    connected = sum(ready.get(timeout=120) for _ in workers)
+    time.sleep(UPDATE_INTERVAL * 2)  # Let every client receive a full cycle first
+
+    process = psutil.Process(server.pid)
+    process.cpu_percent(None)
+    before = scrape_histograms(args.port)
+    start = time.time()
+    time.sleep(args.step_seconds)
+    end = time.time()
+    cpu = process.cpu_percent(None)
+    rss = process.memory_info().rss
+    after = scrape_histograms(args.port)
+
+    stop.set()
+    receipts = []
+    for _ in workers:
+        receipts.extend(results.get(timeout=60))
+    for worker in workers:
+        worker.join(timeout=30)
+
+    return {
+        'clients': clients,
+        'connected': connected,
+        'server_cpu_percent': round(cpu, 1),
+        'server_rss_mb': round(rss / 1024 / 1024, 1),
+        'update_cycle': histogram_delta(before, after, 'parking_dashboard_update_seconds'),
+        'emit': histogram_delta(before, after, 'parking_dashboard_emit_seconds'),
+        **analyse_receipts(receipts, connected, start, end),
+    }
+
+
+def print_table(steps):
+    columns = [
+        ('clients', lambda s: s['connected']),
+        ('upd/s', lambda s: s['updates_per_second']),
+        ('period s', lambda s: s['cycle_period_s']),
+        ('cycle ms', lambda s: s['update_cycle'].get('mean_ms')),
+        ('cycle p95<=', lambda s: s['update_cycle'].get('p95_ms_le')),
+        ('emit ms', lambda s: s['emit'].get('mean_ms')),
+        ('spread p50', lambda s: s['fanout_spread_p50_ms']),
+        ('spread p95', lambda s: s['fanout_spread_p95_ms']),
+        ('missed', lambda s: s['missed_deliveries']),
+        ('cpu %', lambda s: s['server_cpu_percent']),
+        ('rss MB', lambda s: s['server_rss_mb']),
+    ]
+    print(' '.join(f"{name:>11}" for name, _ in columns))
+    for step in steps:
+        print(' '.join(f"{str(getter(step)):>11}" for _, getter in columns))
+
+
+def main():
+    args = parse_args()
+    url = args.redis_url or start_fake_redis(args.fake_redis_port)
+    sqlite_path = os.path.join(tempfile.mkdtemp(prefix='dashboard_load_'), 'parking_system.db')
+
+    # The dashboard and DatabaseManager read these at import
+    os.environ.update({'PARKING_REDIS_URL': url, 'PARKING_SQLITE_PATH': sqlite_path})
+    seed(args.sessions, min(args.inside, args.sessions), args.days)
+
+    env = dict(os.environ, DASHBOARD_PORT=str(args.port), DASHBOARD_DEBUG='0',
+               PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    env.pop('DASHBOARD_MESSAGE_QUEUE', None)
+    server = start_dashboard(env, args.port)
+
+    topics = [topic for topic in args.topics.split(',') if topic]
+    if 'stats' not in topics:
+        topics.append('stats')  # Receipts are timed on stats updates
+
+    steps = []
+    try:
+        for clients in (int(count) for count in args.clients.split(',')):
+            print(f"[STEP] {clients} clients for {args.step_seconds}s")
+            steps.append(run_step(args, f"http://127.0.0.1:{args.port}", server, clients, topics))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    print(f"\n{args.sessions} sessions, topics: {','.join(topics)}")
+    print_table(steps)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'sessions': args.sessions, 'topics': topics, 'steps': steps,
+                       'finished_at': datetime.now().isoformat()}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Latency and accuracy of the plate detector backends on lane frames.
+
+Runs every frame in --images through each backend --repeat times:
+
+- ultralytics: the PyTorch model, as the lanes ran it before
+- onnx: best.pt exported to ONNX and run by ONNX Runtime
+- onnx-int8: the same model quantized to int8 (calibrated on --images)
+
+Accuracy is precision and recall at IoU 0.5 against YOLO-format labels in
+--labels (<frame>.txt with "class cx cy w h" per line, normalised). Without
+labels, the ultralytics boxes are the reference and the other backends are
+scored on how well they agree with them.
+
+    python benchmarks/detector_backends.py --images samples/frames --labels samples/labels --threads 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lane.detector import (DETECTOR_THREADS, OnnxDetector, UltralyticsDetector, export_onnx,  # noqa: E402
+                           onnxruntime, quantize_int8)
+from lane.tracker import iou  # noqa: E402
+
+MATCH_IOU = 0.5
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--weights', default=os.path.join(ROOT, '..', 'models', 'best.pt'), help='YOLO weights')
+    parser.add_argument('--images', required=True, help='Folder of lane camera frames')
+    parser.add_argument('--labels', help='Folder of YOLO-format labels named after the frames')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per frame and backend')
+    parser.add_argument('--threads', type=int, default=DETECTOR_THREADS, help='Inference threads')
+    return parser.parse_args()
+
+
+def load_frames(folder):
+    frames = []
+    for name in sorted(os.listdir(folder)):
+        image = cv2.imread(os.path.join(folder, name))
+        if image is not None:
+            frames.append((os.path.splitext(name)[0], image))
+    return frames
+
+
+def load_labels(folder, name, image):
+    """Ground-truth boxes of a frame in pixels"""
+    path = os.path.join(folder, name + '.txt')
+    if not os.path.exists(path):
+        return []
+    height, width = image.shape[:2]
+    boxes = []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            cx, cy, w, h = (float(value) for value in parts[1:5])
+            boxes.append(((cx - w / 2) * width, (cy - h / 2) * height, (cx + w / 2) * width, (cy + h / 2) * height))
+    return boxes
+
+
+def score(predicted, expected):
+    """(true positives, predicted, expected), each expected box matched at most once"""
+    unmatched = list(expected)
+    hits = 0
+    for box in predicted:
+        best = max(unmatched, key=lambda truth: iou(box, truth), default=None)
+        if best is not None and iou(box, best) >= MATCH_IOU:
+            unmatched.remove(best)
+            hits += 1
+    return hits, len(predicted), len(expected)
+
+
+def measure(detector, frames, truths, repeat):
+    latencies, hits, predicted, expected = [], 0, 0, 0
+    detector.detect(frames[0][1])  # Warm-up: first runs allocate and pick kernels
+    for (name, image), truth in zip(frames, truths):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            boxes = [box for box, _ in detector.detect(image)]
+            latencies.append((time.perf_counter() - started) * 1000)
+        frame_hits, frame_predicted, frame_expected = score(boxes, truth)
+        hits, predicted, expected = hits + frame_hits, predicted + frame_predicted, expected + frame_expected
+
+    latencies.sort()
+    return {
+        'mean_ms': round(statistics.mean(latencies), 2),
+        'p50_ms': round(latencies[len(latencies) // 2], 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        'fps': round(1000 / statistics.mean(latencies), 1),
+        'precision': round(hits / predicted * 100, 1) if predicted else 0.0,
+        'recall': round(hits / expected * 100, 1) if expected else 0.0
+    }
+
+
+def main():
+    args = parse_args()
+    frames = load_frames(args.images)
+    if not frames:
+        sys.exit("No frames found")
+
+    reference = UltralyticsDetector(args.weights, args.threads)
+    if args.labels:
+        truths = [load_labels(args.labels, name, image) for name, image in frames]
+    else:
+        print("No --labels given; accuracy is agreement with the ultralytics boxes")
+        truths = [[box for box, _ in reference.detect(image)] for _, image in frames]
+
+    detectors = [reference]
+    if onnxruntime is not None:
+        onnx_path = export_onnx(args.weights)
+        detectors.append(OnnxDetector(onnx_path, args.threads))
+        detectors.append(OnnxDetector(quantize_int8(onnx_path, args.images), args.threads))
+    else:
+        print("onnxruntime is not installed; only ultralytics is measured")
+
+    print(f"{len(frames)} frames x {args.repeat} runs, {args.threads} threads")
+    print(f"{'backend':<12} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'fps':>6} {'precision %':>12} {'recall %':>9}")
+    for detector in detectors:
+        result = measure(detector, frames, truths, args.repeat)
+        print(f"{detector.name:<12} {result['mean_ms']:>8} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+              f"{result['fps']:>6} {result['precision']:>12} {result['recall']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Replays a recorded lane through the real detection, OCR and voting code.
+
+Feeds a video file or a folder of frames to a headless lane in place of the
+webcam, and a scripted distance trace in place of the Arduino. No Redis,
+database or serial port is needed. Reports capture and detection FPS,
+latency percentiles per pipeline stage, plate reads and decisions. With a
+ground-truth file it also reports OCR and decision accuracy and the time
+from each car's arrival to its decision.
+
+--distance: CSV of "seconds,distance" rows in recording time; without it a
+    car is at the gate throughout
+--truth: CSV of "seconds,plate" rows, the recording time each car reaches
+    the gate and its plate
+
+    python benchmarks/lane_replay.py --source samples/entry.mp4 --distance samples/entry_distance.csv \\
+        --truth samples/entry_truth.csv --output results.json
+
+The detector, ROI and OCR settings come from the same environment
+variables as the lanes (PARKING_DETECTOR, PARKING_ENTRY_ROI,
+PARKING_OCR_WORKERS, ...), so runs with different settings can be compared.
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lane.ocr_pool import OCR_WORKERS  # noqa: E402
+from lane.replay import FOLDER_FPS, DistanceTrace, ReplayLane, load_ground_truth, open_source  # noqa: E402
+from lane.roi import create_roi_detector  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--source', required=True, help='Video file or folder of frames')
+    parser.add_argument('--lane', default='entry', help='Lane name, for its ROI setting and the metrics labels')
+    parser.add_argument('--weights', default=os.path.join(ROOT, '..', 'models', 'best.pt'), help='YOLO weights')
+    parser.add_argument('--distance', help='Distance trace CSV (seconds,distance)')
+    parser.add_argument('--truth', help='Ground-truth CSV (seconds,plate)')
+    parser.add_argument('--fps', type=float, default=FOLDER_FPS, help='Frame rate of a folder of frames')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Playback speed; 1 is real time, 0 processes every frame in lockstep')
+    parser.add_argument('--ocr-workers', type=int, default=OCR_WORKERS, help='OCR worker processes; 0 for in-thread')
+    parser.add_argument('--output', help='Write the full report as JSON')
+    return parser.parse_args()
+
+
+def print_report(report):
+    print(f"\n{report['lane']}: {report['frames']} frames in {report['seconds']} s, {report['fps']} fps captured, "
+          f"{report['detected_frames']} detected ({report['detect_fps']} fps)")
+    print(f"{'stage':<10} {'calls':>7} {'p50 ms':>8} {'p90 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in report['stage_ms'].items():
+        print(f"{name:<10} {stats['calls']:>7} {stats.get('p50', '-'):>8} {stats.get('p90', '-'):>8} "
+              f"{stats.get('p95', '-'):>8} {stats.get('p99', '-'):>8}")
+    print(f"plate reads: {report['reads']}, decisions: {len(report['decisions'])}")
+
+    if 'cars' in report:
+        latency = report['time_to_decision_ms']
+        print(f"OCR read accuracy: {report['read_accuracy']}%")
+        print(f"decisions: {report['decided_correctly']}/{report['cars']} correct "
+              f"({report['decision_accuracy']}%), {len(report['wrong'])} wrong, {len(report['missed'])} missed, "
+              f"{len(report['extra'])} extra")
+        print(f"time to decision: mean {latency.get('mean')} ms, p50 {latency.get('p50')} ms, "
+              f"p95 {latency.get('p95')} ms")
+        for mistake in report['wrong']:
+            print(f"  wrong: expected {mistake['expected']}, decided {mistake['decided']}")
+        for plate in report['missed']:
+            print(f"  missed: {plate}")
+
+
+def main():
+    args = parse_args()
+    source = open_source(args.source, args.fps, args.speed)
+    trace = DistanceTrace.load(source, args.distance)
+    ground_truth = load_ground_truth(args.truth) if args.truth else None
+
+    detector = create_roi_detector(args.weights, args.lane, source.frame_size())
+    lane = ReplayLane(args.lane, source, trace, detector, ocr_workers=args.ocr_workers)
+    report = lane.run(ground_truth)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
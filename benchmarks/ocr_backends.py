@@ -0,0 +1,103 @@
+"""Latency and accuracy of the lane OCR backends on plate crops.
+
+Reads every image in --images, whose file names start with the true plate
+(e.g. RAB123A_01.png), or renders synthetic plates when no folder is given.
+Each crop is binarized as in the lanes and read --repeat times by every
+available backend:
+
+- pytesseract: one tesseract process per read
+- tesserocr: a persistent in-process Tesseract handle
+
+    python benchmarks/ocr_backends.py --images samples/plates --repeat 5
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lane.ocr import PLATE_PATTERN, PytesseractBackend, TesserocrBackend, binarize, tesserocr  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--images', help='Folder of plate crops named <PLATE>_*.png/jpg')
+    parser.add_argument('--synthetic', type=int, default=50, help='Synthetic plates to render without --images')
+    parser.add_argument('--repeat', type=int, default=3, help='Reads per crop and backend')
+    return parser.parse_args()
+
+
+def load_crops(folder):
+    crops = []
+    for name in sorted(os.listdir(folder)):
+        image = cv2.imread(os.path.join(folder, name))
+        match = PLATE_PATTERN.match(name.upper())
+        if image is not None and match:
+            crops.append((match.group(1), image))
+    return crops
+
+
+def synthetic_crops(count):
+    """Black-on-white plates in the RAB123A format"""
+    crops = []
+    for _ in range(count):
+        plate = (''.join(random.choices(string.ascii_uppercase, k=3)) +
+                 ''.join(random.choices(string.digits, k=3)) + random.choice(string.ascii_uppercase))
+        image = np.full((60, 260, 3), 255, dtype=np.uint8)
+        cv2.putText(image, plate, (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0, 0, 0), 3)
+        crops.append((plate, image))
+    return crops
+
+
+def measure(backend, crops, repeat):
+    latencies, correct = [], 0
+    for plate, image in crops:
+        thresh = binarize(image)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            text = backend.read(thresh)
+            latencies.append((time.perf_counter() - started) * 1000)
+            match = PLATE_PATTERN.search(text.strip().replace(' ', ''))
+            correct += bool(match and match.group(1) == plate)
+
+    latencies.sort()
+    return {
+        'reads': len(latencies),
+        'mean_ms': round(statistics.mean(latencies), 2),
+        'p50_ms': round(latencies[len(latencies) // 2], 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        'accuracy': round(correct / len(latencies) * 100, 1)
+    }
+
+
+def main():
+    args = parse_args()
+    crops = load_crops(args.images) if args.images else synthetic_crops(args.synthetic)
+    if not crops:
+        sys.exit("No plate crops found")
+
+    backends = [PytesseractBackend()]
+    if tesserocr is not None:
+        backends.append(TesserocrBackend())
+    else:
+        print("tesserocr is not installed; only the tesseract binary is measured")
+
+    print(f"{len(crops)} crops x {args.repeat} reads")
+    print(f"{'backend':<12} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'accuracy %':>11}")
+    for backend in backends:
+        result = measure(backend, crops, args.repeat)
+        backend.close()
+        print(f"{backend.name:<12} {result['mean_ms']:>8} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+              f"{result['accuracy']:>11}")
+
+
+if __name__ == '__main__':
+    main()
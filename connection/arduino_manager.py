@@ -3,6 +3,17 @@ import serial
 import serial.tools.list_ports
 import time
 
+from monitoring import metrics
+
+SERIAL_RETRIES = metrics.counter('parking_serial_retries_total', 'Serial operations retried after a failure',
+                                 ('role', 'operation'))
+SERIAL_FAILURES = metrics.counter('parking_serial_failures_total', 'Serial operations that ran out of retries',
+                                  ('role', 'operation'))
+SERIAL_RECONNECTS = metrics.counter('parking_serial_reconnects_total', 'Arduino reconnection attempts',
+                                    ('role', 'result'))
+GATE_OPERATIONS = metrics.counter('parking_gate_operations_total', 'Gate open/close cycles',
+                                  ('role', 'result'))
+
 
 class ArduinoManager:
     def __init__(self):
@@ -90,7 +101,9 @@ class ArduinoManager:
     def reconnect(self, role, baud_rate=9600, timeout=1):
         """Attempt to reconnect Arduino for specific role"""
         print(f"[RECONNECT] Attempting to reconnect {role} Arduino...")
-        return self.connect_arduino(role, baud_rate, timeout)
+        connected = self.connect_arduino(role, baud_rate, timeout)
+        SERIAL_RECONNECTS.inc(role=role, result='ok' if connected else 'failed')
+        return connected
 
     def send_command(self, role, command, max_retries=3):
         """Send command to Arduino with automatic retry and reconnection"""
@@ -100,6 +113,7 @@ class ArduinoManager:
             if not self.is_connected(role):
                 if not self.reconnect(role):
                     retry_count += 1
+                    SERIAL_RETRIES.inc(role=role, operation='send')
                     print(f"[RETRY] Reconnection failed for {role}, retry {retry_count}/{max_retries}")
                     time.sleep(1)
                     continue
@@ -115,8 +129,10 @@ class ArduinoManager:
                 if role in self.connections:
                     self.connections[role].close()
                 retry_count += 1
+                SERIAL_RETRIES.inc(role=role, operation='send')
                 time.sleep(1)
 
+        SERIAL_FAILURES.inc(role=role, operation='send')
         print(f"[ERROR] Failed to send command to {role} after {max_retries} retries")
         return False
 
@@ -128,6 +144,7 @@ class ArduinoManager:
             if not self.is_connected(role):
                 if not self.reconnect(role):
                     retry_count += 1
+                    SERIAL_RETRIES.inc(role=role, operation='read')
                     continue
 
             try:
@@ -140,8 +157,10 @@ class ArduinoManager:
                 if role in self.connections:
                     self.connections[role].close()
                 retry_count += 1
+                SERIAL_RETRIES.inc(role=role, operation='read')
                 time.sleep(1)
 
+        SERIAL_FAILURES.inc(role=role, operation='read')
         return None
 
     def communicate(self, role, command, baud_rate=9600):
@@ -151,14 +170,20 @@ class ArduinoManager:
             return self.read_response(role)
         return None
 
-    def open_gate(self, role='entry_exit', open_duration=15):
-        """Open gate for specified duration"""
+    def open_gate(self, role='entry_exit', open_duration=15, on_state=None):
+        """Open gate for specified duration; on_state is called with 'open' and 'closed'"""
         if self.send_command(role, b'1'):
             print(f"[GATE] Opening gate via {role}")
+            if on_state:
+                on_state('open')
             time.sleep(open_duration)
             if self.send_command(role, b'0'):
                 print(f"[GATE] Closing gate via {role}")
+                if on_state:
+                    on_state('closed')
+                GATE_OPERATIONS.inc(role=role, result='ok')
                 return True
+        GATE_OPERATIONS.inc(role=role, result='failed')
         print(f"[GATE ERROR] Failed to operate gate via {role}")
         return False
 
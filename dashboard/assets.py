@@ -0,0 +1,114 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # Brotli variants are optional; gzip is always built
+    brotli = None
+
+
+ASSET_MAX_AGE = 365 * 24 * 3600  # Fingerprinted assets never change under the same URL
+MIN_COMPRESS_SIZE = 512  # Bytes; smaller bodies are served as-is
+
+
+class StaticAsset:
+    """One fingerprinted static file with its precompressed variants"""
+
+    def __init__(self, name, body, mimetype):
+        self.name = name
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {}
+
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(body, quality=11)
+
+    @property
+    def fingerprinted_name(self):
+        stem, ext = os.path.splitext(self.name)
+        return f"{stem}.{self.etag}{ext}"
+
+
+def choose_encoding(accept_encoding, available):
+    """Pick the best precompressed variant the client accepts"""
+    accepted = {token.split(';')[0].strip() for token in (accept_encoding or '').split(',')}
+    for encoding in ('br', 'gzip'):
+        if encoding in available and encoding in accepted:
+            return encoding
+    return None
+
+
+class AssetPipeline:
+    """Loads static files once, fingerprints them by content hash and serves
+    them with long-lived caching and precompressed gzip/brotli variants."""
+
+    def __init__(self, static_dir, url_prefix='/assets'):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix
+        self.assets = {}  # fingerprinted name -> StaticAsset
+        self.manifest = {}  # logical name -> fingerprinted name
+
+    def build(self):
+        """Read, hash and compress every file in the static directory"""
+        self.assets.clear()
+        self.manifest.clear()
+
+        for name in sorted(os.listdir(self.static_dir)):
+            path = os.path.join(self.static_dir, name)
+            if not os.path.isfile(path):
+                continue
+
+            with open(path, 'rb') as f:
+                body = f.read()
+
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            asset = StaticAsset(name, body, mimetype)
+            self.assets[asset.fingerprinted_name] = asset
+            self.manifest[name] = asset.fingerprinted_name
+
+        print(f"[ASSETS] Built {len(self.assets)} fingerprinted assets from {self.static_dir}")
+        return self.manifest
+
+    def url_for(self, name):
+        """Fingerprinted URL for a logical asset name"""
+        return f"{self.url_prefix}/{self.manifest[name]}"
+
+    def response(self, fingerprinted_name, request):
+        """Serve a fingerprinted asset, honouring Accept-Encoding and If-None-Match"""
+        asset = self.assets.get(fingerprinted_name)
+        if asset is None:
+            return Response('Not found', status=404)
+
+        headers = {
+            'Cache-Control': f'public, max-age={ASSET_MAX_AGE}, immutable',
+            'ETag': f'"{asset.etag}"',
+            'Vary': 'Accept-Encoding'
+        }
+
+        if request.headers.get('If-None-Match') == headers['ETag']:
+            return Response(status=304, headers=headers)
+
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'), asset.variants)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+            return Response(asset.variants[encoding], mimetype=asset.mimetype, headers=headers)
+        return Response(asset.body, mimetype=asset.mimetype, headers=headers)
+
+
+def compressed_response(body, request, mimetype='text/html', cache_control='no-cache'):
+    """Gzip a dynamic response body when the client accepts it"""
+    data = body.encode('utf-8') if isinstance(body, str) else body
+    headers = {'Cache-Control': cache_control, 'Vary': 'Accept-Encoding'}
+
+    if len(data) >= MIN_COMPRESS_SIZE and choose_encoding(request.headers.get('Accept-Encoding'), {'gzip'}):
+        headers['Content-Encoding'] = 'gzip'
+        data = gzip.compress(data, compresslevel=6)
+
+    return Response(data, mimetype=mimetype, headers=headers)
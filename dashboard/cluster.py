@@ -0,0 +1,127 @@
+import json
+import os
+import socket
+import time
+
+
+# Renew the producer lease only if this worker still holds it
+RENEW_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class DashboardCluster:
+    """Coordinates dashboard workers that share a Socket.IO message queue.
+
+    One worker holds a lease in Redis and is the only one that computes
+    snapshots; every worker publishes the topics its own clients subscribe to
+    so the producer knows what to compute. With clustering disabled the
+    single process is always the producer.
+    """
+
+    PRODUCER_KEY = 'dashboard:producer'
+    WORKERS_KEY = 'dashboard:workers'
+    SNAPSHOT_KEY = 'dashboard:snapshot'
+
+    def __init__(self, redis_client, enabled=False, lease_seconds=10, worker_id=None):
+        self.redis_client = redis_client
+        self.enabled = enabled
+        self.lease_ms = int(lease_seconds * 1000)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.renew_lease = redis_client.register_script(RENEW_LEASE_SCRIPT)
+        self.producer = not enabled
+
+    def is_producer(self):
+        """Acquire or renew the producer lease; returns True if this worker holds it"""
+        if not self.enabled:
+            return True
+
+        try:
+            if self.renew_lease(keys=[self.PRODUCER_KEY], args=[self.worker_id, self.lease_ms]):
+                held = True
+            else:
+                held = bool(self.redis_client.set(self.PRODUCER_KEY, self.worker_id, nx=True, px=self.lease_ms))
+        except Exception as e:
+            print(f"[CLUSTER] Producer election failed: {e}")
+            held = False
+
+        if held != self.producer:
+            role = 'producer' if held else 'fan-out worker'
+            print(f"[CLUSTER] Worker {self.worker_id} is now the {role}")
+        self.producer = held
+        return held
+
+    def publish_topics(self, topics):
+        """Advertise the topics (and their payload variants) this worker's clients subscribe to"""
+        if not self.enabled:
+            return
+
+        record = {
+            'topics': {topic: sorted(variants) for topic, variants in topics.items()},
+            'expires_at': time.time() + self.lease_ms / 1000
+        }
+        self.redis_client.hset(self.WORKERS_KEY, self.worker_id, json.dumps(record))
+
+    def cluster_topics(self, local_topics):
+        """Union of the live topics and their variants across all workers"""
+        topics = {topic: set(variants) for topic, variants in local_topics.items()}
+        if not self.enabled:
+            return topics
+
+        now = time.time()
+        expired = []
+
+        for worker_id, raw in self.redis_client.hgetall(self.WORKERS_KEY).items():
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                expired.append(worker_id)
+                continue
+
+            if record.get('expires_at', 0) < now:
+                expired.append(worker_id)
+            else:
+                for topic, variants in record.get('topics', {}).items():
+                    topics.setdefault(topic, set()).update(variants)
+
+        # Drop workers that stopped heartbeating
+        if expired:
+            self.redis_client.hdel(self.WORKERS_KEY, *expired)
+
+        return topics
+
+    def store_snapshot(self, payloads):
+        """Share the latest topic payloads so any worker can serve them on subscribe"""
+        if not self.enabled or not payloads:
+            return
+
+        self.redis_client.hset(self.SNAPSHOT_KEY, mapping={
+            topic: json.dumps(payload) for topic, payload in payloads.items()
+        })
+
+    def load_snapshot(self, topics):
+        """Read the latest shared payloads for the given topics"""
+        if not self.enabled or not topics:
+            return {}
+
+        topics = list(topics)
+        cached = {}
+        for topic, raw in zip(topics, self.redis_client.hmget(self.SNAPSHOT_KEY, topics)):
+            if raw:
+                cached[topic] = json.loads(raw)
+        return cached
+
+    def leave(self):
+        """Withdraw this worker's topics and release the lease if held"""
+        if not self.enabled:
+            return
+
+        try:
+            self.redis_client.hdel(self.WORKERS_KEY, self.worker_id)
+            if self.redis_client.get(self.PRODUCER_KEY) == self.worker_id:
+                self.redis_client.delete(self.PRODUCER_KEY)
+        except Exception as e:
+            print(f"[CLUSTER] Failed to leave cluster: {e}")
@@ -1,5 +1,5 @@
-from flask import Flask, render_template, request
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, jsonify, render_template, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import redis
 from datetime import datetime, timedelta
 import json
@@ -7,13 +7,56 @@ import threading
 import time
 from collections import defaultdict
 import asyncio
-
-app = Flask(__name__)
+import os
+import sqlite3
+from contextlib import closing
+from dashboard.assets import AssetPipeline, compressed_response
+from dashboard.cluster import DashboardCluster
+from dashboard.overstay_scheduler import OverstayScheduler
+from analytics.anomaly_detector import AnomalyDetector
+from analytics.dwell_sketch import DwellSketchStore
+from analytics.heavy_hitters import HeavyHitterTracker
+from analytics.history_analytics import WINDOWS, HistoryAnalytics
+from dashboard.payload_codec import DEFAULT_VARIANT, encode_payload, negotiate, supported_encodings
+from dashboard.timeseries import OccupancyTimeSeries
+from database.db_manager import SQLITE_DB_PATH
+from database.integrity_checker import IntegrityChecker
+from database.occupancy_counters import OccupancyCounters
+from database.plate_index import PlateIndex
+from monitoring import metrics
+from monitoring.lane_metrics import LaneMetrics
+
+# Deployment configuration. Setting DASHBOARD_MESSAGE_QUEUE (e.g.
+# redis://localhost:6379/1) runs this process as one of several workers:
+# a single elected producer computes snapshots and every worker fans the
+# updates out to its own clients through the shared queue.
+REDIS_URL = os.environ.get('PARKING_REDIS_URL', 'redis://localhost:6379/0')
+MESSAGE_QUEUE = os.environ.get('DASHBOARD_MESSAGE_QUEUE')
+DASHBOARD_PORT = int(os.environ.get('DASHBOARD_PORT', 5000))
+# The reloader would fork a second producer candidate, so debug defaults to standalone only
+DASHBOARD_DEBUG = os.environ.get('DASHBOARD_DEBUG', '0' if MESSAGE_QUEUE else '1') == '1'
+UPDATE_INTERVAL = 2  # Seconds between snapshot updates
+TIMESERIES_PERSIST_INTERVAL = 30  # Seconds between saving the ring buffers to Redis
+TIMESERIES_SAMPLE_INTERVAL = 1  # Seconds between time-series samples, the finest ring resolution
+INTEGRITY_REPAIR = os.environ.get('INTEGRITY_REPAIR', '0') == '1'
+INTEGRITY_KEYS_PER_SECOND = int(os.environ.get('INTEGRITY_KEYS_PER_SECOND', 2000))
+
+# Static files are only served fingerprinted through the asset pipeline
+app = Flask(__name__, static_folder=None)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading', message_queue=MESSAGE_QUEUE)
 
 # Redis connection
-r = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+r = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+binary_redis = redis.Redis.from_url(REDIS_URL)  # For binary blobs such as the time series
+
+# Producer election and cross-worker topic registry
+cluster = DashboardCluster(r, enabled=bool(MESSAGE_QUEUE), lease_seconds=UPDATE_INTERVAL * 5)
+
+# Content-hashed JS/CSS with precompressed variants, built once at startup
+assets = AssetPipeline(os.path.join(app.root_path, 'static'))
+assets.build()
+app.jinja_env.globals['asset_url'] = assets.url_for
 
 # Global variables for real-time data
 real_time_data = {
@@ -28,6 +71,44 @@ real_time_data = {
 # Connected clients tracking
 connected_clients = set()
 
+# Vectorized analytics over the SQLite history, cached per window
+history_analytics = HistoryAnalytics()
+ANALYTICS_WINDOW = '30d'  # Window pushed to the analytics topic
+
+# Streaming dwell-time sketches written by the exit lane
+dwell_sketches = DwellSketchStore(r)
+
+# Streaming top-K plates by visits and by denied exits
+heavy_hitters = HeavyHitterTracker(r)
+
+# Rolling per-lane throughput, queue time and gate utilisation reported by the lanes
+lane_metrics = LaneMetrics(r)
+
+# Occupancy/unpaid/revenue ring buffers, sampled by the producer from the running
+# counters the DatabaseManager keeps, so a sample costs one HGETALL
+TIMESERIES_KEY = 'dashboard:timeseries'
+occupancy_series = OccupancyTimeSeries()
+occupancy_counters = OccupancyCounters(r)
+timeseries_saved_at = 0
+
+# Substring plate search; write_entry keeps it current, history is indexed once
+plate_index = PlateIndex(r)
+
+# Telemetry for this process; every service's metrics are served at /metrics
+UPDATE_SECONDS = metrics.histogram('parking_dashboard_update_seconds', 'Producer update cycle duration')
+EMIT_SECONDS = metrics.histogram('parking_dashboard_emit_seconds', 'Time to encode and emit one cycle of payloads')
+EMITTED_PAYLOADS = metrics.counter('parking_dashboard_payloads_total', 'Topic payloads emitted', ('topic',))
+CONNECTED_CLIENTS = metrics.gauge('parking_dashboard_clients', 'Socket.IO clients of the last worker to report')
+metrics.start_flusher(r, service='dashboard')
+
+# Topic subscriptions: topic -> set of client sids. Each topic is a Socket.IO
+# room, and the background thread only computes topics that have subscribers.
+topic_subscribers = defaultdict(set)
+subscriptions_lock = threading.Lock()
+
+# Payload variant negotiated by each client at connect (see payload_codec)
+client_variants = {}
+
 
 def get_system_statistics():
     """Get comprehensive system statistics with additional metrics"""
@@ -112,14 +193,16 @@ def get_cars_inside():
             except:
                 duration_hours = 0
 
+            entry_id = entry_key.split(':')[1]
             inside_cars.append({
                 'plate': entry_data.get('plate_number', 'Unknown'),
                 'entry_time': entry_data.get('entry_timestamp', 'Unknown'),
                 'status': 'Paid' if payment_status == '1' else 'Unpaid',
                 'charge': entry_data.get('charge_amount', 'Not calculated'),
-                'entry_id': entry_key.split(':')[1],
+                'entry_id': entry_id,
                 'duration_hours': round(duration_hours, 1),
-                'priority': 'high' if duration_hours > 24 else 'medium' if duration_hours > 12 else 'normal'
+                # Set by the overstay scheduler when a threshold is crossed
+                'priority': overstay_scheduler.priority(entry_id)
             })
 
     return sorted(inside_cars, key=lambda x: x['entry_time'], reverse=True)
@@ -214,31 +297,25 @@ def get_hourly_statistics():
 
 
 def get_system_health():
-    """Get system health metrics"""
+    """Get system health metrics from O(1) reads and the integrity checker's report"""
     try:
         # Redis health
         redis_ping = r.ping()
-        redis_memory = r.info()['used_memory_human']
-
-        # Data integrity checks
-        entry_keys = r.keys("entry:*")
-        orphaned_entries = 0
+        redis_memory = r.info('memory')['used_memory_human']
 
-        for key in entry_keys:
-            entry_data = r.hgetall(key)
-            plate = entry_data.get('plate_number')
-            if plate:
-                plate_entries = r.smembers(f"entries:{plate}")
-                entry_id = key.split(':')[1]
-                if entry_id not in plate_entries:
-                    orphaned_entries += 1
+        # Data integrity is checked incrementally by the background checker
+        integrity = IntegrityChecker.read_report(r)
+        problems = sum(integrity.get(name, 0) for name in (
+            'orphaned_entries', 'dangling_members', 'missing_in_sqlite',
+            'missing_in_redis', 'status_mismatches'))
 
         return {
             'redis_connected': redis_ping,
             'redis_memory': redis_memory,
-            'total_keys': len(r.keys("*")),
-            'orphaned_entries': orphaned_entries,
-            'system_status': 'healthy' if orphaned_entries == 0 else 'warning',
+            'total_keys': r.dbsize(),
+            'orphaned_entries': integrity.get('orphaned_entries', 0),
+            'integrity': integrity,
+            'system_status': 'healthy' if problems == 0 else 'warning',
             'last_check': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
     except Exception as e:
@@ -250,41 +327,169 @@ def get_system_health():
         }
 
 
+def get_occupancy_panel(stats):
+    """Occupancy subset of the statistics snapshot (gate kiosks)"""
+    return {
+        'cars_inside': stats['cars_inside'],
+        'max_capacity': stats['max_capacity'],
+        'occupancy_rate': stats['occupancy_rate']
+    }
+
+
+def get_revenue_panel(stats):
+    """Revenue subset of the statistics snapshot (finance screen)"""
+    return {
+        'total_revenue': stats['total_revenue'],
+        'payment_rate': stats['payment_rate'],
+        'unpaid_entries': stats['unpaid_entries'],
+        'completed_exits': stats['completed_exits']
+    }
+
+
+def topic_room(topic, variant=DEFAULT_VARIANT):
+    """Socket.IO room name for a topic and payload variant"""
+    if variant == DEFAULT_VARIANT:
+        return f"topic:{topic}"
+    return f"topic:{topic}:{variant}"
+
+
+def get_active_topics():
+    """Topics that currently have at least one subscriber, with their payload variants"""
+    with subscriptions_lock:
+        return {
+            topic: {client_variants.get(sid, DEFAULT_VARIANT) for sid in sids}
+            for topic, sids in topic_subscribers.items() if sids
+        }
+
+
+def get_cached_payloads(topics):
+    """Latest computed payloads for the given topics, from this worker or the producer"""
+    cached = {topic: real_time_data[topic] for topic in topics if real_time_data.get(topic)}
+    if len(cached) < len(topics):
+        # Fan-out workers never compute, so read what the producer shared
+        cached.update(cluster.load_snapshot(topic for topic in topics if topic not in cached))
+    return cached
+
+
+def emit_to_topic(event, data, topic, variants):
+    """Emit a small event to every variant room of a topic"""
+    for variant in variants:
+        socketio.emit(event, data, to=topic_room(topic, variant))
+
+
+def emit_stats_events(old_stats, new_stats, topics):
+    """Emit occupancy and payment events to their topic rooms"""
+    if not old_stats:
+        return
+
+    if 'occupancy' in topics and new_stats['cars_inside'] != old_stats.get('cars_inside', 0):
+        emit_to_topic('occupancy_change', {
+            'new_count': new_stats['cars_inside'],
+            'old_count': old_stats.get('cars_inside', 0),
+            'timestamp': datetime.now().isoformat()
+        }, 'occupancy', topics['occupancy'])
+
+    if 'revenue' in topics and new_stats['unpaid_entries'] > old_stats.get('unpaid_entries', 0):
+        emit_to_topic('payment_alert', {
+            'unpaid_count': new_stats['unpaid_entries'],
+            'message': f"{new_stats['unpaid_entries']} vehicles need to pay",
+            'timestamp': datetime.now().isoformat()
+        }, 'revenue', topics['revenue'])
+
+
+def record_timeseries(stats):
+    """Sample the statistics into the ring buffers and persist them periodically"""
+    global timeseries_saved_at
+
+    occupancy_series.record({
+        'occupancy': stats['cars_inside'],
+        'unpaid': stats['unpaid_entries'],
+        'revenue': stats['total_revenue']
+    })
+
+    if time.time() - timeseries_saved_at >= TIMESERIES_PERSIST_INTERVAL:
+        binary_redis.set(TIMESERIES_KEY, occupancy_series.dumps())
+        timeseries_saved_at = time.time()
+
+
+def restore_timeseries():
+    """Load the ring buffers last saved by a producer"""
+    try:
+        data = binary_redis.get(TIMESERIES_KEY)
+        if data:
+            occupancy_series.loads(data)
+            return True
+    except Exception as e:
+        print(f"[WARNING] Failed to restore occupancy time series: {e}")
+    return False
+
+
+def get_timeseries_window(seconds, resolution=None):
+    """Time-series points for the last `seconds`; fan-out workers read the producer's copy"""
+    global timeseries_saved_at
+
+    if not cluster.producer and time.time() - timeseries_saved_at >= TIMESERIES_PERSIST_INTERVAL:
+        restore_timeseries()
+        timeseries_saved_at = time.time()
+
+    return occupancy_series.window(seconds, resolution)
+
+
+def sample_timeseries():
+    """Background thread recording the occupancy counters into the time series every second; producer only"""
+    while True:
+        try:
+            if cluster.producer:
+                record_timeseries(occupancy_counters.read() or occupancy_counters.rebuild())
+        except Exception as e:
+            print(f"[WARNING] Failed to sample occupancy: {e}")
+        time.sleep(TIMESERIES_SAMPLE_INTERVAL)
+
+
 def update_real_time_data():
-    """Background thread to update real-time data and emit to clients"""
+    """Background thread to update subscribed topics and emit them to their rooms"""
     while True:
         try:
-            # Update data
-            old_stats = real_time_data.get('stats', {})
-            new_stats = get_system_statistics()
-
-            real_time_data['stats'] = new_stats
-            real_time_data['recent_entries'] = get_recent_entries()
-            real_time_data['current_inside'] = get_cars_inside()
-            real_time_data['recent_logs'] = get_recent_logs()
-            real_time_data['system_health'] = get_system_health()
-            real_time_data['hourly_stats'] = get_hourly_statistics()
-
-            # Check for significant changes and emit alerts
-            if old_stats:
-                if new_stats['cars_inside'] != old_stats.get('cars_inside', 0):
-                    socketio.emit('occupancy_change', {
-                        'new_count': new_stats['cars_inside'],
-                        'old_count': old_stats.get('cars_inside', 0),
-                        'timestamp': datetime.now().isoformat()
-                    })
-
-                if new_stats['unpaid_entries'] > old_stats.get('unpaid_entries', 0):
-                    socketio.emit('payment_alert', {
-                        'unpaid_count': new_stats['unpaid_entries'],
-                        'message': f"{new_stats['unpaid_entries']} vehicles need to pay",
-                        'timestamp': datetime.now().isoformat()
-                    })
-
-            # Emit updated data to all connected clients
-            socketio.emit('data_update', real_time_data)
-
-            time.sleep(2)  # Update every 2 seconds
+            # Every worker advertises its clients' topics; only the producer computes
+            local_topics = get_active_topics()
+            cluster.publish_topics(local_topics)
+
+            if not cluster.is_producer():
+                time.sleep(UPDATE_INTERVAL)
+                continue
+
+            cycle_started = time.perf_counter()
+            topics = cluster.cluster_topics(local_topics)
+            payloads = {}
+
+            # The statistics scan runs only for subscribed stats-derived topics, which share it
+            stats_topics = topics.keys() & STATS_TOPICS.keys()
+            if stats_topics:
+                old_stats = real_time_data.get('stats', {})
+                new_stats = get_system_statistics()
+                real_time_data['stats'] = new_stats
+                emit_stats_events(old_stats, new_stats, topics)
+
+                for topic in stats_topics:
+                    payloads[topic] = STATS_TOPICS[topic](new_stats)
+
+            for topic in topics.keys() & TOPIC_PROVIDERS.keys():
+                payloads[topic] = TOPIC_PROVIDERS[topic]()
+
+            # Encode once per variant in use, not once per client
+            emit_started = time.perf_counter()
+            for topic, payload in payloads.items():
+                real_time_data[topic] = payload
+                for variant in topics[topic]:
+                    socketio.emit('data_update', encode_payload({topic: payload}, variant),
+                                  to=topic_room(topic, variant))
+                    EMITTED_PAYLOADS.inc(topic=topic)
+            EMIT_SECONDS.observe(time.perf_counter() - emit_started)
+
+            cluster.store_snapshot(payloads)
+            UPDATE_SECONDS.observe(time.perf_counter() - cycle_started)
+
+            time.sleep(UPDATE_INTERVAL)
         except Exception as e:
             print(f"Error updating real-time data: {e}")
             time.sleep(5)
@@ -296,779 +501,216 @@ def get_recent_logs(limit=20):
     return list(reversed(logs)) if logs else []
 
 
-# Start background thread
-data_thread = threading.Thread(target=update_real_time_data, daemon=True)
-data_thread.start()
+# Topics derived from the shared statistics snapshot
+STATS_TOPICS = {
+    'stats': lambda stats: stats,
+    'occupancy': get_occupancy_panel,
+    'revenue': get_revenue_panel
+}
 
+# Topics computed by their own query
+TOPIC_PROVIDERS = {
+    'recent_entries': get_recent_entries,
+    'current_inside': get_cars_inside,
+    'recent_logs': get_recent_logs,
+    'system_health': get_system_health,
+    'hourly_stats': get_hourly_statistics,
+    'analytics': lambda: history_analytics.get_window(ANALYTICS_WINDOW),
+    'dwell_percentiles': dwell_sketches.percentiles,
+    'frequent_plates': heavy_hitters.summary,
+    'lane_metrics': lane_metrics.summary
+}
 
-@app.route('/')
-def dashboard():
-    return '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Smart Parking Dashboard - WebSocket Edition</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <script src="https://cdn.socket.io/4.7.4/socket.io.min.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <script>
-        tailwind.config = {
-            theme: {
-                extend: {
-                    animation: {
-                        'fade-in': 'fadeIn 0.5s ease-in-out',
-                        'slide-up': 'slideUp 0.3s ease-out',
-                        'pulse-slow': 'pulse 3s infinite',
-                        'bounce-gentle': 'bounceGentle 0.6s ease-in-out',
-                        'scale-up': 'scaleUp 0.2s ease-out',
-                    },
-                    keyframes: {
-                        fadeIn: {
-                            '0%': { opacity: '0', transform: 'translateY(10px)' },
-                            '100%': { opacity: '1', transform: 'translateY(0)' }
-                        },
-                        slideUp: {
-                            '0%': { opacity: '0', transform: 'translateY(20px)' },
-                            '100%': { opacity: '1', transform: 'translateY(0)' }
-                        },
-                        bounceGentle: {
-                            '0%, 100%': { transform: 'scale(1)' },
-                            '50%': { transform: 'scale(1.05)' }
-                        },
-                        scaleUp: {
-                            '0%': { transform: 'scale(0.95)' },
-                            '100%': { transform: 'scale(1)' }
-                        }
-                    }
-                }
-            }
-        }
-    </script>
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-    <style>
-        .notification {
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            z-index: 1000;
-            max-width: 400px;
-        }
+ALL_TOPICS = set(STATS_TOPICS) | set(TOPIC_PROVIDERS)
 
-        .chart-container {
-            position: relative;
-            height: 300px;
-        }
 
-        .status-indicator {
-            width: 12px;
-            height: 12px;
-            border-radius: 50%;
-            display: inline-block;
-            margin-right: 8px;
-        }
+# Rate-limited integrity checker; only the producer walks the keyspace
+integrity_checker = IntegrityChecker(repair=INTEGRITY_REPAIR, keys_per_second=INTEGRITY_KEYS_PER_SECOND,
+                                     should_run=lambda: cluster.producer)
+integrity_checker.start()
 
-        .status-healthy { background-color: #22c55e; }
-        .status-warning { background-color: #f59e0b; }
-        .status-error { background-color: #ef4444; }
 
-        .connection-status {
-            transition: all 0.3s ease;
-        }
+def emit_overstay_alert(alert):
+    """Broadcast a threshold crossing to every client, whatever panels it shows"""
+    socketio.emit('overstay_alert', alert)
 
-        .connected { color: #22c55e; }
-        .disconnected { color: #ef4444; }
-    </style>
-</head>
-<body class="bg-gradient-to-br from-blue-50 via-indigo-50 to-purple-50 min-h-screen">
-    <!-- Notification Container -->
-    <div id="notification-container" class="notification"></div>
-
-    <!-- Header -->
-    <header class="bg-white/70 backdrop-blur-lg border-b border-white/20 sticky top-0 z-40">
-        <div class="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8">
-            <div class="flex items-center justify-between h-16">
-                <div class="flex items-center space-x-4">
-                    <div class="bg-gradient-to-r from-blue-600 to-purple-600 p-2 rounded-xl">
-                        <i class="fas fa-car text-white text-xl"></i>
-                    </div>
-                    <h1 class="text-2xl font-bold bg-gradient-to-r from-blue-600 to-purple-600 bg-clip-text text-transparent">
-                        Smart Parking Dashboard
-                    </h1>
-                    <span class="text-xs bg-blue-100 text-blue-800 px-2 py-1 rounded-full">WebSocket</span>
-                </div>
-                <div class="flex items-center space-x-4">
-                    <div class="connection-status" id="connection-status">
-                        <span class="status-indicator" id="status-indicator"></span>
-                        <span id="status-text">Connecting...</span>
-                    </div>
-                    <div class="text-sm text-gray-500" id="last-updated">
-                        Last updated: Now
-                    </div>
-                </div>
-            </div>
-        </div>
-    </header>
-
-    <!-- Main Content -->
-    <main class="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-8">
-        <!-- Enhanced Stats Grid -->
-        <div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-5 gap-6 mb-8">
-            <!-- Cars Inside Card -->
-            <div class="bg-white/70 backdrop-blur-lg rounded-2xl p-6 border border-white/20 shadow-xl hover:shadow-2xl transition-all duration-300 hover:-translate-y-1">
-                <div class="flex items-center justify-between">
-                    <div>
-                        <p class="text-sm font-medium text-gray-600">Cars Inside</p>
-                        <p class="text-3xl font-bold text-blue-600" id="cars-inside">0</p>
-                        <p class="text-xs text-gray-500 mt-1">of <span id="max-capacity">100</span> capacity</p>
-                    </div>
-                    <div class="bg-blue-100 p-3 rounded-xl">
-                        <i class="fas fa-car text-blue-600 text-xl"></i>
-                    </div>
-                </div>
-                <div class="mt-4">
-                    <div class="bg-blue-100 rounded-full h-2">
-                        <div class="bg-blue-600 rounded-full h-2 transition-all duration-500" id="occupancy-bar" style="width: 0%"></div>
-                    </div>
-                    <p class="text-xs text-gray-500 mt-1"><span id="occupancy-rate">0</span>% occupancy</p>
-                </div>
-            </div>
-
-            <!-- Unpaid Entries Card -->
-            <div class="bg-white/70 backdrop-blur-lg rounded-2xl p-6 border border-white/20 shadow-xl hover:shadow-2xl transition-all duration-300 hover:-translate-y-1">
-                <div class="flex items-center justify-between">
-                    <div>
-                        <p class="text-sm font-medium text-gray-600">Unpaid</p>
-                        <p class="text-3xl font-bold text-red-600" id="unpaid-entries">0</p>
-                        <p class="text-xs text-gray-500 mt-1">require payment</p>
-                    </div>
-                    <div class="bg-red-100 p-3 rounded-xl">
-                        <i class="fas fa-exclamation-triangle text-red-600 text-xl"></i>
-                    </div>
-                </div>
-                <div class="mt-4">
-                    <div class="bg-red-100 rounded-full h-2">
-                        <div class="bg-red-600 rounded-full h-2 transition-all duration-500" id="unpaid-bar" style="width: 0%"></div>
-                    </div>
-                </div>
-            </div>
-
-            <!-- Revenue Card -->
-            <div class="bg-white/70 backdrop-blur-lg rounded-2xl p-6 border border-white/20 shadow-xl hover:shadow-2xl transition-all duration-300 hover:-translate-y-1">
-                <div class="flex items-center justify-between">
-                    <div>
-                        <p class="text-sm font-medium text-gray-600">Revenue</p>
-                        <p class="text-3xl font-bold text-green-600">
-                            <span id="total-revenue">0</span>
-                            <span class="text-sm">RWF</span>
-                        </p>
-                        <p class="text-xs text-gray-500 mt-1">total collected</p>
-                    </div>
-                    <div class="bg-green-100 p-3 rounded-xl">
-                        <i class="fas fa-coins text-green-600 text-xl"></i>
-                    </div>
-                </div>
-                <div class="mt-4">
-                    <div class="bg-green-100 rounded-full h-2">
-                        <div class="bg-green-600 rounded-full h-2 transition-all duration-500" id="revenue-bar" style="width: 0%"></div>
-                    </div>
-                </div>
-            </div>
-
-            <!-- Today's Entries Card -->
-            <div class="bg-white/70 backdrop-blur-lg rounded-2xl p-6 border border-white/20 shadow-xl hover:shadow-2xl transition-all duration-300 hover:-translate-y-1">
-                <div class="flex items-center justify-between">
-                    <div>
-                        <p class="text-sm font-medium text-gray-600">Today</p>
-                        <p class="text-3xl font-bold text-purple-600" id="today-entries">0</p>
-                        <p class="text-xs text-gray-500 mt-1">entries today</p>
-                    </div>
-                    <div class="bg-purple-100 p-3 rounded-xl">
-                        <i class="fas fa-calendar-day text-purple-600 text-xl"></i>
-                    </div>
-                </div>
-            </div>
-
-            <!-- System Health Card -->
-            <div class="bg-white/70 backdrop-blur-lg rounded-2xl p-6 border border-white/20 shadow-xl hover:shadow-2xl transition-all duration-300 hover:-translate-y-1">
-                <div class="flex items-center justify-between">
-                    <div>
-                        <p class="text-sm font-medium text-gray-600">System</p>
-                        <p class="text-sm font-bold" id="system-status">Healthy</p>
-                        <p class="text-xs text-gray-500 mt-1" id="redis-memory">Memory: N/A</p>
-                    </div>
-                    <div class="bg-gray-100 p-3 rounded-xl">
-                        <i class="fas fa-server text-gray-600 text-xl"></i>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <!-- Charts Section -->
-        <div class="grid grid-cols-1 lg:grid-cols-2 gap-8 mb-8">
-            <div class="bg-white/70 backdrop-blur-lg rounded-2xl p-6 border border-white/20 shadow-xl">
-                <h3 class="text-lg font-bold text-gray-800 mb-4">Hourly Activity (Last 24h)</h3>
-                <div class="chart-container">
-                    <canvas id="hourlyChart"></canvas>
-                </div>
-            </div>
-
-            <div class="bg-white/70 backdrop-blur-lg rounded-2xl p-6 border border-white/20 shadow-xl">
-                <h3 class="text-lg font-bold text-gray-800 mb-4">Revenue Trend</h3>
-                <div class="chart-container">
-                    <canvas id="revenueChart"></canvas>
-                </div>
-            </div>
-        </div>
-
-        <!-- Main Dashboard Grid -->
-        <div class="grid grid-cols-1 lg:grid-cols-3 gap-8">
-            <!-- Cars Currently Inside -->
-            <div class="lg:col-span-2 bg-white/70 backdrop-blur-lg rounded-2xl p-6 border border-white/20 shadow-xl">
-                <div class="flex items-center justify-between mb-6">
-                    <h2 class="text-xl font-bold text-gray-800 flex items-center">
-                        <i class="fas fa-car mr-3 text-blue-600"></i>
-                        Cars Currently Inside
-                    </h2>
-                    <div class="flex items-center space-x-2">
-                        <div class="bg-blue-100 text-blue-800 px-3 py-1 rounded-full text-sm font-medium">
-                            <span id="inside-count">0</span> Active
-                        </div>
-                        <button onclick="toggleAutoRefresh()" class="bg-gray-100 hover:bg-gray-200 p-2 rounded-lg transition-colors">
-                            <i class="fas fa-sync-alt" id="refresh-icon"></i>
-                        </button>
-                    </div>
-                </div>
-
-                <!-- Search and Filter Bar -->
-                <div class="mb-6 flex space-x-4">
-                    <div class="flex-1 relative">
-                        <input type="text" id="search-cars" placeholder="Search by plate number..." 
-                               class="w-full pl-10 pr-4 py-3 bg-white/50 border border-gray-200 rounded-xl focus:ring-2 focus:ring-blue-500 focus:border-transparent transition-all duration-200">
-                        <i class="fas fa-search absolute left-3 top-1/2 transform -translate-y-1/2 text-gray-400"></i>
-                    </div>
-                    <select id="filter-status" class="px-4 py-3 bg-white/50 border border-gray-200 rounded-xl focus:ring-2 focus:ring-blue-500">
-                        <option value="all">All Status</option>
-                        <option value="paid">Paid</option>
-                        <option value="unpaid">Unpaid</option>
-                    </select>
-                    <select id="sort-by" class="px-4 py-3 bg-white/50 border border-gray-200 rounded-xl focus:ring-2 focus:ring-blue-500">
-                        <option value="time">Sort by Time</option>
-                        <option value="plate">Sort by Plate</option>
-                        <option value="duration">Sort by Duration</option>
-                    </select>
-                </div>
-
-                <!-- Cars List -->
-                <div class="space-y-4 max-h-96 overflow-y-auto" id="cars-list">
-                    <!-- Cars will be populated here -->
-                </div>
-            </div>
-
-            <!-- Real-time Activity -->
-            <div class="bg-white/70 backdrop-blur-lg rounded-2xl p-6 border border-white/20 shadow-xl">
-                <div class="flex items-center justify-between mb-6">
-                    <h2 class="text-xl font-bold text-gray-800 flex items-center">
-                        <i class="fas fa-bolt mr-3 text-yellow-600"></i>
-                        Live Activity
-                    </h2>
-                    <div class="bg-yellow-100 text-yellow-800 px-2 py-1 rounded-full text-xs font-medium">
-                        <i class="fas fa-circle animate-pulse mr-1"></i>
-                        LIVE
-                    </div>
-                </div>
-
-                <div class="space-y-3 max-h-96 overflow-y-auto" id="activity-list">
-                    <!-- Activity will be populated here -->
-                </div>
-            </div>
-        </div>
-
-        <!-- Recent Entries Table -->
-        <div class="mt-8 bg-white/70 backdrop-blur-lg rounded-2xl p-6 border border-white/20 shadow-xl">
-            <div class="flex items-center justify-between mb-6">
-                <h2 class="text-xl font-bold text-gray-800 flex items-center">
-                    <i class="fas fa-list mr-3 text-indigo-600"></i>
-                    Recent Entries
-                </h2>
-                <button onclick="exportData()" class="bg-indigo-100 hover:bg-indigo-200 text-indigo-800 px-4 py-2 rounded-lg transition-colors">
-                    <i class="fas fa-download mr-2"></i>
-                    Export CSV
-                </button>
-            </div>
-
-            <div class="overflow-x-auto">
-                <table class="w-full">
-                    <thead>
-                        <tr class="border-b border-gray-200">
-                            <th class="text-left py-3 px-4 font-semibold text-gray-700">ID</th>
-                            <th class="text-left py-3 px-4 font-semibold text-gray-700">Plate</th>
-                            <th class="text-left py-3 px-4 font-semibold text-gray-700">Entry</th>
-                            <th class="text-left py-3 px-4 font-semibold text-gray-700">Exit</th>
-                            <th class="text-left py-3 px-4 font-semibold text-gray-700">Duration</th>
-                            <th class="text-left py-3 px-4 font-semibold text-gray-700">Payment</th>
-                            <th class="text-left py-3 px-4 font-semibold text-gray-700">Status</th>
-                            <th class="text-left py-3 px-4 font-semibold text-gray-700">Charge</th>
-                        </tr>
-                    </thead>
-                    <tbody id="entries-table">
-                        <!-- Entries will be populated here -->
-                    </tbody>
-                </table>
-            </div>
-        </div>
-    </main>
-
-    <script>
-        // WebSocket connection
-        const socket = io();
-        let isConnected = false;
-        let autoRefresh = true;
-        let hourlyChart, revenueChart;
-
-        // Connection status management
-        socket.on('connect', function() {
-            isConnected = true;
-            updateConnectionStatus(true);
-            showNotification('Connected to server', 'success');
-        });
-
-        socket.on('disconnect', function() {
-            isConnected = false;
-            updateConnectionStatus(false);
-            showNotification('Disconnected from server', 'error');
-        });
-
-        socket.on('connect_error', function() {
-            updateConnectionStatus(false);
-            showNotification('Connection failed', 'error');
-        });
-
-        function updateConnectionStatus(connected) {
-            const statusIndicator = document.getElementById('status-indicator');
-            const statusText = document.getElementById('status-text');
-            const connectionStatus = document.getElementById('connection-status');
-
-            if (connected) {
-                statusIndicator.className = 'status-indicator status-healthy';
-                statusText.textContent = 'Connected';
-                connectionStatus.className = 'connection-status connected';
-            } else {
-                statusIndicator.className = 'status-indicator status-error';
-                statusText.textContent = 'Disconnected';
-                connectionStatus.className = 'connection-status disconnected';
-            }
-        }
 
-        // Real-time data updates
-        socket.on('data_update', function(data) {
-            if (autoRefresh) {
-                updateDashboard(data);
-            }
-        });
-
-        socket.on('occupancy_change', function(data) {
-            showNotification(
-                `Occupancy changed: ${data.old_count} → ${data.new_count} cars`, 
-                'info'
-            );
-        });
-
-        socket.on('payment_alert', function(data) {
-            showNotification(data.message, 'warning');
-        });
-
-        // Notification system
-        function showNotification(message, type = 'info') {
-            const container = document.getElementById('notification-container');
-            const notification = document.createElement('div');
-
-            const colors = {
-                success: 'bg-green-500',
-                error: 'bg-red-500',
-                warning: 'bg-yellow-500',
-                info: 'bg-blue-500'
-            };
-
-            notification.className = `${colors[type]} text-white px-4 py-3 rounded-lg shadow-lg mb-2 animate-slide-up`;
-            notification.innerHTML = `
-                <div class="flex items-center justify-between">
-                    <span>${message}</span>
-                    <button onclick="this.parentElement.parentElement.remove()" class="ml-4">
-                        <i class="fas fa-times"></i>
-                    </button>
-                </div>
-            `;
-
-            container.appendChild(notification);
-
-            // Auto-remove after 5 seconds
-            setTimeout(() => {
-                if (notification.parentElement) {
-                    notification.remove();
-                }
-            }, 5000);
-        }
+def build_plate_index():
+    """Index the plates already in the SQLite history if no index exists yet"""
+    try:
+        if not plate_index.exists():
+            with closing(sqlite3.connect(SQLITE_DB_PATH)) as connection:
+                plate_index.rebuild(connection)
+    except Exception as e:
+        print(f"[WARNING] Failed to build plate index: {e}")
 
-        let maxValues = {
-            cars_inside: 1,
-            unpaid_entries: 1,
-            total_revenue: 1,
-            total_entries: 1
-        };
-
-        function updateProgressBars(stats) {
-            // Update max values
-            maxValues.cars_inside = Math.max(maxValues.cars_inside, stats.cars_inside);
-            maxValues.unpaid_entries = Math.max(maxValues.unpaid_entries, stats.unpaid_entries);
-            maxValues.total_revenue = Math.max(maxValues.total_revenue, stats.total_revenue);
-
-            // Update progress bars
-            document.getElementById('occupancy-bar').style.width = `${stats.occupancy_rate}%`;
-            document.getElementById('unpaid-bar').style.width = 
-                `${(stats.unpaid_entries / maxValues.unpaid_entries) * 100}%`;
-            document.getElementById('revenue-bar').style.width = 
-                `${(stats.total_revenue / maxValues.total_revenue) * 100}%`;
-        }
 
-        function updateDashboard(data) {
-            // Update statistics
-            document.getElementById('cars-inside').textContent = data.stats.cars_inside;
-            document.getElementById('unpaid-entries').textContent = data.stats.unpaid_entries;
-            document.getElementById('total-revenue').textContent = Math.round(data.stats.total_revenue);
-            document.getElementById('today-entries').textContent = data.stats.today_entries;
-            document.getElementById('inside-count').textContent = data.stats.cars_inside;
-            document.getElementById('max-capacity').textContent = data.stats.max_capacity;
-            document.getElementById('occupancy-rate').textContent = Math.round(data.stats.occupancy_rate);
+threading.Thread(target=build_plate_index, daemon=True).start()
 
-            // Update system health
-            const systemHealth = data.system_health;
-            document.getElementById('system-status').textContent = systemHealth.system_status;
-            document.getElementById('redis-memory').textContent = `Memory: ${systemHealth.redis_memory || 'N/A'}`;
 
-            // Update progress bars
-            updateProgressBars(data.stats);
+# Wakes only when a car crosses an overstay or unpaid threshold; producer only
+overstay_scheduler = OverstayScheduler(on_alert=emit_overstay_alert, should_run=lambda: cluster.producer)
+overstay_scheduler.start()
 
-            // Update cars list with enhanced filtering and sorting
-            updateCarsList(data.current_inside);
 
-            // Update activity list
-            updateActivityList(data.recent_logs);
+def emit_anomaly_alert(anomaly):
+    """Broadcast an escalated security anomaly to every client"""
+    socketio.emit('anomaly_alert', anomaly)
 
-            // Update entries table
-            updateEntriesTable(data.recent_entries);
 
-            // Update charts
-            updateCharts(data.hourly_stats);
+# Sliding-window detector over the alert and log streams; producer only
+anomaly_detector = AnomalyDetector(on_anomaly=emit_anomaly_alert, should_run=lambda: cluster.producer)
+anomaly_detector.start()
 
-            // Update last updated time
-            document.getElementById('last-updated').textContent = 
-                `Last updated: ${new Date().toLocaleTimeString()}`;
-        }
 
-        function updateCarsList(cars) {
-            const carsList = document.getElementById('cars-list');
-            const searchTerm = document.getElementById('search-cars').value.toLowerCase();
-            const filterStatus = document.getElementById('filter-status').value;
-            const sortBy = document.getElementById('sort-by').value;
-
-            // Filter cars
-            let filteredCars = cars.filter(car => {
-                const matchesSearch = car.plate.toLowerCase().includes(searchTerm);
-                const matchesFilter = filterStatus === 'all' || 
-                                    car.status.toLowerCase() === filterStatus;
-                return matchesSearch && matchesFilter;
-            });
-
-            // Sort cars
-            filteredCars.sort((a, b) => {
-                switch(sortBy) {
-                    case 'plate':
-                        return a.plate.localeCompare(b.plate);
-                    case 'duration':
-                        return b.duration_hours - a.duration_hours;
-                    default:
-                        return new Date(b.entry_time) - new Date(a.entry_time);
-                }
-            });
-
-            carsList.innerHTML = '';
-
-            if (filteredCars.length === 0) {
-                carsList.innerHTML = `
-                    <div class="text-center py-8 text-gray-500">
-                        <i class="fas fa-car text-4xl mb-4"></i>
-                        <p>No cars match your criteria</p>
-                    </div>
-                `;
-            } else {
-                filteredCars.forEach((car, index) => {
-                    const carDiv = document.createElement('div');
-                    carDiv.className = 'bg-white/50 rounded-xl p-4 border border-gray-100 hover:shadow-md transition-all duration-200 animate-fade-in car-item';
-                    carDiv.style.animationDelay = `${index * 0.05}s`;
-
-                    const statusClass = car.status === 'Paid' ? 'bg-green-100 text-green-800' : 'bg-red-100 text-red-800';
-                    const statusIcon = car.status === 'Paid' ? 'fas fa-check-circle' : 'fas fa-clock';
-                    const priorityClass = car.priority === 'high' ? 'border-red-300' : 
-                                        car.priority === 'medium' ? 'border-yellow-300' : 'border-gray-100';
-
-                    carDiv.className += ` ${priorityClass}`;
-
-                    carDiv.innerHTML = `
-                        <div class="flex items-center justify-between">
-                            <div class="flex items-center space-x-4">
-                                <div class="bg-gradient-to-r from-blue-500 to-purple-500 p-2 rounded-lg text-white">
-                                    <i class="fas fa-car"></i>
-                                </div>
-                                <div>
-                                    <h3 class="font-bold text-lg text-gray-800 car-plate">${car.plate}</h3>
-                                    <p class="text-sm text-gray-600">Entry: ${car.entry_time}</p>
-                                    <p class="text-sm text-gray-600">Duration: ${car.duration_hours}h | Charge: ${car.charge} RWF</p>
-                                </div>
-                            </div>
-                            <div class="text-right">
-                                <span class="${statusClass} px-3 py-1 rounded-full text-sm font-medium">
-                                    <i class="${statusIcon} mr-1"></i>
-                                    ${car.status}
-                                </span>
-                                ${car.priority === 'high' ? '<div class="text-xs text-red-600 mt-1">⚠️ Long stay</div>' : ''}
-                            </div>
-                        </div>
-                    `;
-                    carsList.appendChild(carDiv);
-                });
-            }
-        }
+# Start background threads last: their topics read the overstay scheduler's priorities
+restore_timeseries()
+data_thread = threading.Thread(target=update_real_time_data, daemon=True)
+data_thread.start()
+threading.Thread(target=sample_timeseries, daemon=True).start()
 
-        function updateActivityList(logs) {
-            const activityList = document.getElementById('activity-list');
-            activityList.innerHTML = '';
-
-            logs.slice(0, 15).forEach((log, index) => {
-                const logDiv = document.createElement('div');
-                logDiv.className = 'bg-white/50 rounded-lg p-3 border border-gray-100 animate-fade-in';
-                logDiv.style.animationDelay = `${index * 0.02}s`;
-
-                // Parse log for better display
-                let logClass = 'text-gray-700';
-                let logIcon = 'fas fa-info-circle';
-
-                if (log.includes('ENTRY GRANTED')) {
-                    logClass = 'text-green-700';
-                    logIcon = 'fas fa-sign-in-alt';
-                } else if (log.includes('EXIT GRANTED')) {
-                    logClass = 'text-blue-700';
-                    logIcon = 'fas fa-sign-out-alt';
-                } else if (log.includes('DENIED')) {
-                    logClass = 'text-red-700';
-                    logIcon = 'fas fa-times-circle';
-                } else if (log.includes('PAYMENT')) {
-                    logClass = 'text-purple-700';
-                    logIcon = 'fas fa-credit-card';
-                }
-
-                logDiv.innerHTML = `
-                    <div class="flex items-start space-x-2">
-                        <i class="${logIcon} ${logClass} mt-1"></i>
-                        <span class="text-sm ${logClass}">${log}</span>
-                    </div>
-                `;
-                activityList.appendChild(logDiv);
-            });
-        }
 
-        function updateEntriesTable(entries) {
-            const entriesTable = document.getElementById('entries-table');
-            entriesTable.innerHTML = '';
-
-            entries.forEach(entry => {
-                const row = document.createElement('tr');
-                row.className = 'border-b border-gray-100 hover:bg-white/50 transition-colors duration-200';
-
-                const paymentClass = entry.payment_status === 'Paid' ? 'bg-green-100 text-green-800' : 'bg-red-100 text-red-800';
-                const statusClass = entry.exit_status === 'Exited' ? 'bg-blue-100 text-blue-800' : 'bg-yellow-100 text-yellow-800';
-
-                row.innerHTML = `
-                    <td class="py-3 px-4 text-sm font-medium text-gray-900">#${entry.id}</td>
-                    <td class="py-3 px-4 text-sm font-bold text-gray-900">${entry.plate}</td>
-                    <td class="py-3 px-4 text-sm text-gray-600">${entry.entry_time}</td>
-                    <td class="py-3 px-4 text-sm text-gray-600">${entry.exit_time}</td>
-                    <td class="py-3 px-4 text-sm text-gray-600">${entry.duration}</td>
-                    <td class="py-3 px-4">
-                        <span class="${paymentClass} px-2 py-1 rounded-full text-xs font-medium">
-                            ${entry.payment_status}
-                        </span>
-                    </td>
-                    <td class="py-3 px-4">
-                        <span class="${statusClass} px-2 py-1 rounded-full text-xs font-medium">
-                            ${entry.exit_status}
-                        </span>
-                    </td>
-                    <td class="py-3 px-4 text-sm text-gray-900">${entry.charge} RWF</td>
-                `;
-                entriesTable.appendChild(row);
-            });
-        }
+@app.route('/')
+def dashboard():
+    # The page embeds the latest snapshot so kiosks render before the socket connects
+    requested = request.args.get('topics')
+    topics = [topic for topic in requested.split(',') if topic in ALL_TOPICS] if requested else sorted(ALL_TOPICS)
+    initial_data = get_cached_payloads(topics)
+    return compressed_response(render_template('dashboard.html', initial_data=initial_data), request)
 
-        function initializeCharts() {
-            // Hourly Activity Chart
-            const hourlyCtx = document.getElementById('hourlyChart').getContext('2d');
-            hourlyChart = new Chart(hourlyCtx, {
-                type: 'bar',
-                data: {
-                    labels: [],
-                    datasets: [{
-                        label: 'Entries',
-                        data: [],
-                        backgroundColor: 'rgba(59, 130, 246, 0.6)',
-                        borderColor: 'rgba(59, 130, 246, 1)',
-                        borderWidth: 1
-                    }, {
-                        label: 'Exits',
-                        data: [],
-                        backgroundColor: 'rgba(16, 185, 129, 0.6)',
-                        borderColor: 'rgba(16, 185, 129, 1)',
-                        borderWidth: 1
-                    }]
-                },
-                options: {
-                    responsive: true,
-                    maintainAspectRatio: false,
-                    scales: {
-                        y: {
-                            beginAtZero: true
-                        }
-                    }
-                }
-            });
-
-            // Revenue Chart
-            const revenueCtx = document.getElementById('revenueChart').getContext('2d');
-            revenueChart = new Chart(revenueCtx, {
-                type: 'line',
-                data: {
-                    labels: [],
-                    datasets: [{
-                        label: 'Revenue (RWF)',
-                        data: [],
-                        borderColor: 'rgba(34, 197, 94, 1)',
-                        backgroundColor: 'rgba(34, 197, 94, 0.1)',
-                        fill: true,
-                        tension: 0.4
-                    }]
-                },
-                options: {
-                    responsive: true,
-                    maintainAspectRatio: false,
-                    scales: {
-                        y: {
-                            beginAtZero: true
-                        }
-                    }
-                }
-            });
-        }
 
-        function updateCharts(hourlyStats) {
-            if (!hourlyChart || !revenueChart) return;
+@app.route('/api/analytics')
+def analytics_api():
+    """Analytics for ?window=24h|7d|30d|365d"""
+    window = request.args.get('window', ANALYTICS_WINDOW)
+    if window not in WINDOWS:
+        return jsonify({'error': f"Unknown window, expected one of: {', '.join(WINDOWS)}"}), 400
+    return jsonify(history_analytics.get_window(window))
+
 
-            const labels = hourlyStats.map(stat => stat.hour);
-            const entries = hourlyStats.map(stat => stat.entries);
-            const exits = hourlyStats.map(stat => stat.exits);
-            const revenue = hourlyStats.map(stat => stat.revenue);
+@app.route('/api/timeseries')
+def timeseries_api():
+    """Occupancy time series for ?window=<seconds>[&resolution=<seconds>]"""
+    try:
+        window = int(request.args.get('window', 3600))
+        resolution = request.args.get('resolution', type=int)
+        return jsonify(get_timeseries_window(window, resolution))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-            hourlyChart.data.labels = labels;
-            hourlyChart.data.datasets[0].data = entries;
-            hourlyChart.data.datasets[1].data = exits;
-            hourlyChart.update('none');
 
-            revenueChart.data.labels = labels;
-            revenueChart.data.datasets[0].data = revenue;
-            revenueChart.update('none');
-        }
+@app.route('/api/search')
+def search_api():
+    """Sessions of plates containing ?q=, newest first; page with ?before=<next_before>"""
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({'error': 'Missing search query'}), 400
 
-        function toggleAutoRefresh() {
-            autoRefresh = !autoRefresh;
-            const icon = document.getElementById('refresh-icon');
-
-            if (autoRefresh) {
-                icon.classList.remove('text-red-500');
-                icon.classList.add('text-green-500');
-                showNotification('Auto-refresh enabled', 'success');
-            } else {
-                icon.classList.remove('text-green-500');
-                icon.classList.add('text-red-500');
-                showNotification('Auto-refresh disabled', 'warning');
-            }
-        }
+    try:
+        limit = request.args.get('limit', 20, type=int)
+        before = request.args.get('before', type=int)
+        with closing(sqlite3.connect(SQLITE_DB_PATH)) as connection:
+            return jsonify(plate_index.search(connection, query, limit, before))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        function exportData() {
-            // Request data export
-            socket.emit('export_request');
-            showNotification('Preparing export...', 'info');
-        }
 
-        // Event listeners
-        document.getElementById('search-cars').addEventListener('input', function() {
-            if (window.currentCarsData) {
-                updateCarsList(window.currentCarsData);
-            }
-        });
-
-        document.getElementById('filter-status').addEventListener('change', function() {
-            if (window.currentCarsData) {
-                updateCarsList(window.currentCarsData);
-            }
-        });
-
-        document.getElementById('sort-by').addEventListener('change', function() {
-            if (window.currentCarsData) {
-                updateCarsList(window.currentCarsData);
-            }
-        });
-
-        // Store current data globally for filtering
-        socket.on('data_update', function(data) {
-            window.currentCarsData = data.current_inside;
-        });
-
-        // Initialize charts when page loads
-        document.addEventListener('DOMContentLoaded', function() {
-            initializeCharts();
-        });
-
-        // Export functionality
-        socket.on('export_ready', function(data) {
-            const blob = new Blob([data.csv], { type: 'text/csv' });
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = `parking_data_${new Date().toISOString().split('T')[0]}.csv`;
-            a.click();
-            window.URL.revokeObjectURL(url);
-            showNotification('Export completed!', 'success');
-        });
-    </script>
-</body>
-</html>
-    '''
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text-format metrics of every service, as last flushed to Redis"""
+    return Response(metrics.render_text(r), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/assets/<path:filename>')
+def static_asset(filename):
+    return assets.response(filename, request)
+
 
 
 # WebSocket event handlers
 @socketio.on('connect')
 def handle_connect():
     connected_clients.add(request.sid)
-    emit('connected', {'message': 'Connected to parking dashboard'})
+    CONNECTED_CLIENTS.set(len(connected_clients))
+
+    # Clients ask for a payload encoding in the connection query string
+    variant = negotiate(request.args.get('encoding'), request.args.get('compression'))
+    with subscriptions_lock:
+        client_variants[request.sid] = variant
+
+    emit('connected', {
+        'message': 'Connected to parking dashboard',
+        'topics': sorted(ALL_TOPICS),
+        'encoding': variant,
+        'encodings': supported_encodings()
+    })
     print(f"Client {request.sid} connected. Total clients: {len(connected_clients)}")
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     connected_clients.discard(request.sid)
+    CONNECTED_CLIENTS.set(len(connected_clients))
+    with subscriptions_lock:
+        for sids in topic_subscribers.values():
+            sids.discard(request.sid)
+        client_variants.pop(request.sid, None)
     print(f"Client {request.sid} disconnected. Total clients: {len(connected_clients)}")
 
 
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """Join the rooms for the requested topics and send their latest payloads"""
+    requested = (data or {}).get('topics', [])
+    topics = [topic for topic in requested if topic in ALL_TOPICS]
+
+    with subscriptions_lock:
+        variant = client_variants.get(request.sid, DEFAULT_VARIANT)
+        for topic in topics:
+            topic_subscribers[topic].add(request.sid)
+
+    for topic in topics:
+        join_room(topic_room(topic, variant))
+
+    emit('subscribed', {
+        'topics': topics,
+        'rejected': [topic for topic in requested if topic not in ALL_TOPICS]
+    })
+
+    # Send cached payloads so the panels render before the next update cycle
+    cached = get_cached_payloads(topics)
+    if cached:
+        emit('data_update', encode_payload(cached, variant))
+
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data):
+    """Leave the rooms for the given topics"""
+    topics = [topic for topic in (data or {}).get('topics', []) if topic in ALL_TOPICS]
+
+    with subscriptions_lock:
+        variant = client_variants.get(request.sid, DEFAULT_VARIANT)
+        for topic in topics:
+            topic_subscribers[topic].discard(request.sid)
+
+    for topic in topics:
+        leave_room(topic_room(topic, variant))
+
+    emit('unsubscribed', {'topics': topics})
+
+
+@socketio.on('timeseries_request')
+def handle_timeseries_request(data):
+    """Send one window of the occupancy time series to the requesting client"""
+    try:
+        window = int((data or {}).get('window', 3600))
+        series = get_timeseries_window(window, (data or {}).get('resolution'))
+        series['window'] = window
+        emit('timeseries_data', series)
+    except (TypeError, ValueError) as e:
+        emit('timeseries_error', {'error': str(e)})
+
+
 @socketio.on('export_request')
 def handle_export_request():
     """Generate and send CSV export"""
@@ -1100,8 +742,13 @@ def handle_export_request():
 
 if __name__ == '__main__':
     print("🚀 Starting Smart Parking Dashboard with WebSockets...")
-    print("📱 Access the dashboard at: http://localhost:5000")
+    print(f"📱 Access the dashboard at: http://localhost:{DASHBOARD_PORT}")
     print("🔄 Real-time WebSocket updates")
     print("🎨 Enhanced Tailwind CSS styling")
     print("📊 Interactive charts and analytics")
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000,allow_unsafe_werkzeug=True)
\ No newline at end of file
+    if MESSAGE_QUEUE:
+        print(f"🧩 Cluster worker {cluster.worker_id} via {MESSAGE_QUEUE}")
+    try:
+        socketio.run(app, debug=DASHBOARD_DEBUG, host='0.0.0.0', port=DASHBOARD_PORT, allow_unsafe_werkzeug=True)
+    finally:
+        cluster.leave()
\ No newline at end of file
@@ -0,0 +1,177 @@
+import heapq
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from database.db_manager import DatabaseManager
+
+
+# Alert thresholds: (name, hours after entry, severity, applies only while unpaid)
+THRESHOLDS = (
+    ('unpaid', 4, 'MEDIUM', True),
+    ('overstay', 12, 'MEDIUM', False),
+    ('long_overstay', 24, 'HIGH', False),
+)
+
+# Priority shown in the cars-inside panel once a threshold has been crossed
+PRIORITIES = {'overstay': 'medium', 'long_overstay': 'high'}
+PRIORITY_ORDER = ('normal', 'medium', 'high')
+
+FIRED_TTL = 7 * 86400  # Seconds an alert stays marked as sent
+
+
+class OverstayScheduler:
+    """Timer service that alerts when a parked car crosses a threshold.
+
+    Every car inside gets one timer per threshold, due at its entry time plus
+    the threshold, kept in a min-heap. The thread sleeps until the earliest
+    timer or the next check for new entries, so work is one HGETALL per
+    crossing plus a GET of next_entry_id per poll, independent of how many
+    cars are parked or how often the dashboard refreshes.
+
+    When a timer is due the entry is re-read; cars that have left, or paid
+    for the unpaid threshold, are dropped. Otherwise a security alert is
+    logged and on_alert is called. Sent alerts are marked in Redis with
+    SET NX, so a restart or a new producer does not repeat them.
+    """
+
+    FIRED_KEY = 'overstay:{}:{}'
+
+    def __init__(self, on_alert: Optional[Callable[[Dict], None]] = None, poll_interval: float = 2.0,
+                 reload_interval: int = 3600, should_run: Optional[Callable[[], bool]] = None):
+        self.on_alert = on_alert or (lambda alert: None)
+        self.poll_interval = poll_interval
+        self.reload_interval = reload_interval
+        self.should_run = should_run or (lambda: True)
+        self.db_manager = None
+        self.heap: List[tuple] = []  # (due epoch, entry id, threshold index)
+        self.last_entry_id = 0
+        self.priorities: Dict[str, str] = {}  # entry id -> priority of crossed thresholds
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        """Start the scheduler thread"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stopped.set()
+
+    def priority(self, entry_id) -> str:
+        """Panel priority of a car inside; no duration arithmetic per refresh"""
+        return self.priorities.get(str(entry_id), 'normal')
+
+    def run(self):
+        """Scheduler loop; owns a DatabaseManager rather than sharing the dashboard's SQLite connection"""
+        self.db_manager = DatabaseManager()
+        loaded_at = 0
+
+        while not self.stopped.is_set():
+            if not self.should_run():
+                loaded_at = 0
+                self.stopped.wait(self.poll_interval)
+                continue
+
+            try:
+                # Periodic reloads drop state for cars that left after their last timer
+                if time.time() - loaded_at > self.reload_interval:
+                    self.load()
+                    loaded_at = time.time()
+
+                self.fire_due()
+                self.poll_new_entries()
+            except Exception as e:
+                print(f"[OVERSTAY] Scheduler step failed: {e}")
+
+            # Sleep until the next crossing, but wake to pick up new entries
+            wait = self.poll_interval
+            if self.heap:
+                wait = min(wait, max(self.heap[0][0] - time.time(), 0))
+            self.stopped.wait(wait)
+
+    def load(self):
+        """Schedule every car inside, and mark the thresholds they have already crossed"""
+        redis_client = self.db_manager.redis_client
+        self.heap = []
+        self.priorities = {}
+        self.last_entry_id = int(redis_client.get('next_entry_id') or 0)
+
+        entry_ids = [key.split(':', 1)[1] for key in redis_client.scan_iter('entry:*', count=500)]
+        self.schedule_entries(entry_ids)
+        print(f"[OVERSTAY] Scheduled {len(self.heap)} timers for {len(entry_ids)} entries")
+
+    def poll_new_entries(self):
+        """Schedule entries created since the last poll"""
+        current = int(self.db_manager.redis_client.get('next_entry_id') or 0)
+        if current > self.last_entry_id:
+            self.schedule_entries([str(entry_id) for entry_id in range(self.last_entry_id + 1, current + 1)])
+            self.last_entry_id = current
+
+    def schedule_entries(self, entry_ids: List[str]):
+        """Push a timer for each threshold of each car still inside"""
+        pipe = self.db_manager.redis_client.pipeline(transaction=False)
+        for entry_id in entry_ids:
+            pipe.hgetall(f"entry:{entry_id}")
+
+        for entry_id, data in zip(entry_ids, pipe.execute()):
+            if not data or data.get('exit_status') == '1':
+                continue
+            try:
+                entered = datetime.strptime(data['entry_timestamp'], '%Y-%m-%d %H:%M:%S').timestamp()
+            except (KeyError, ValueError):
+                continue
+
+            for index, (_, hours, _, unpaid_only) in enumerate(THRESHOLDS):
+                if unpaid_only and data.get('payment_status') == '1':
+                    continue
+                heapq.heappush(self.heap, (entered + hours * 3600, int(entry_id), index))
+
+    def fire_due(self):
+        """Pop and handle every timer that is due"""
+        now = time.time()
+        while self.heap and self.heap[0][0] <= now and not self.stopped.is_set():
+            due, entry_id, index = heapq.heappop(self.heap)
+            self.cross(entry_id, index, due)
+
+    def cross(self, entry_id: int, index: int, due: float):
+        """A car reached a threshold; alert if it still applies"""
+        name, hours, severity, unpaid_only = THRESHOLDS[index]
+        data = self.db_manager.redis_client.hgetall(f"entry:{entry_id}")
+
+        if not data or data.get('exit_status') == '1':
+            self.priorities.pop(str(entry_id), None)
+            return
+        if unpaid_only and data.get('payment_status') == '1':
+            return
+
+        priority = PRIORITIES.get(name)
+        if priority and PRIORITY_ORDER.index(priority) > PRIORITY_ORDER.index(self.priority(entry_id)):
+            self.priorities[str(entry_id)] = priority
+
+        # Only the first process to mark the crossing sends the alert
+        marked = self.db_manager.redis_client.set(self.FIRED_KEY.format(entry_id, name), 1, nx=True, ex=FIRED_TTL)
+        if not marked:
+            return
+
+        plate = data.get('plate_number', '')
+        status = 'unpaid' if data.get('payment_status') != '1' else 'paid'
+        message = f"Vehicle {plate} has been parked over {hours}h ({status}) - Entry ID: {entry_id}"
+        self.db_manager.log_security_alert(plate, message, severity)
+
+        alert = {
+            'entry_id': entry_id,
+            'plate': plate,
+            'threshold': name,
+            'hours': hours,
+            'severity': severity,
+            'payment_status': status,
+            'entry_time': data.get('entry_timestamp'),
+            'message': message,
+            'timestamp': datetime.now().isoformat(),
+            'delay_seconds': round(max(time.time() - due, 0), 1)
+        }
+        print(f"[OVERSTAY] {message}")
+        self.on_alert(alert)
@@ -0,0 +1,86 @@
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # Binary encoding is optional; clients fall back to JSON
+    msgpack = None
+
+
+# Payload encodings a client can negotiate at connect:
+#   json     - plain Socket.IO JSON, the default and fallback
+#   columnar - lists of rows are sent as one key list plus value arrays
+#   msgpack  - columnar payload packed with MessagePack into a binary frame
+DEFAULT_VARIANT = 'json'
+COMPRESSIONS = {'deflate'}
+COMPRESSION_THRESHOLD = 1024  # Bytes; smaller bodies are not worth compressing
+COMPRESSION_LEVEL = 6
+
+
+def supported_encodings():
+    """Encodings available in this process"""
+    encodings = ['json', 'columnar']
+    if msgpack is not None:
+        encodings.append('msgpack')
+    return encodings
+
+
+def negotiate(encoding=None, compression=None):
+    """Pick the variant to serve a client from its requested encoding and compression.
+
+    Unknown or unavailable options fall back to plain JSON. The variant is a
+    string such as 'json', 'columnar' or 'msgpack+deflate'.
+    """
+    encoding = (encoding or DEFAULT_VARIANT).lower()
+    if encoding not in supported_encodings():
+        encoding = DEFAULT_VARIANT
+
+    compression = (compression or '').lower()
+    if compression in COMPRESSIONS and encoding != DEFAULT_VARIANT:
+        return f"{encoding}+{compression}"
+    return encoding
+
+
+def to_columnar(value):
+    """Replace lists of dict rows with {'__columns__': [...], '__rows__': [[...]]}"""
+    if isinstance(value, dict):
+        return {key: to_columnar(item) for key, item in value.items()}
+
+    if isinstance(value, list) and value and all(isinstance(row, dict) for row in value):
+        columns = list(value[0])
+        for row in value[1:]:
+            for key in row:
+                if key not in columns:
+                    columns.append(key)
+        return {
+            '__columns__': columns,
+            '__rows__': [[row.get(column) for column in columns] for row in value]
+        }
+
+    return value
+
+
+def encode_payload(payload, variant=DEFAULT_VARIANT):
+    """Encode a data_update payload for the given variant.
+
+    JSON clients receive the payload unchanged. Other variants receive an
+    envelope {'enc': encoding, 'z': compressed, 'body': ...} where body is a
+    columnar dict, or bytes for msgpack and compressed bodies.
+    """
+    if variant == DEFAULT_VARIANT:
+        return payload
+
+    encoding, _, compression = variant.partition('+')
+    body = to_columnar(payload)
+
+    if encoding == 'msgpack':
+        body = msgpack.packb(body, use_bin_type=True)
+    elif compression:
+        body = json.dumps(body, separators=(',', ':')).encode('utf-8')
+
+    compressed = False
+    if compression == 'deflate' and len(body) >= COMPRESSION_THRESHOLD:
+        body = zlib.compress(body, COMPRESSION_LEVEL)
+        compressed = True
+
+    return {'enc': encoding, 'z': compressed, 'body': body}
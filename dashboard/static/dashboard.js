@@ -0,0 +1,768 @@
+// WebSocket connection. Ask for msgpack + deflate payloads when this
+// browser can decode them; ?encoding=json forces the plain fallback.
+const pageParams = new URLSearchParams(window.location.search);
+const canDecodeBinary = typeof DecompressionStream !== 'undefined' && typeof MessagePack !== 'undefined';
+const socket = io({
+    query: {
+        encoding: pageParams.get('encoding') || (canDecodeBinary ? 'msgpack' : 'json'),
+        compression: pageParams.get('compression') || (canDecodeBinary ? 'deflate' : '')
+    }
+});
+let isConnected = false;
+let autoRefresh = true;
+let hourlyChart, revenueChart, occupancyHistoryChart, weekdayRevenueChart, timeseriesChart;
+
+// Connection status management
+// Panels this page displays; kiosks can narrow it with ?topics=occupancy
+const DEFAULT_TOPICS = ['stats', 'recent_entries', 'current_inside', 'recent_logs',
+                        'system_health', 'hourly_stats', 'occupancy', 'revenue', 'analytics',
+                        'dwell_percentiles', 'frequent_plates', 'lane_metrics'];
+const topicsParam = pageParams.get('topics');
+const subscribedTopics = topicsParam ? topicsParam.split(',') : DEFAULT_TOPICS;
+
+socket.on('connect', function() {
+    isConnected = true;
+    updateConnectionStatus(true);
+    socket.emit('subscribe', { topics: subscribedTopics });
+    showNotification('Connected to server', 'success');
+});
+
+socket.on('disconnect', function() {
+    isConnected = false;
+    updateConnectionStatus(false);
+    showNotification('Disconnected from server', 'error');
+});
+
+socket.on('connect_error', function() {
+    updateConnectionStatus(false);
+    showNotification('Connection failed', 'error');
+});
+
+function updateConnectionStatus(connected) {
+    const statusIndicator = document.getElementById('status-indicator');
+    const statusText = document.getElementById('status-text');
+    const connectionStatus = document.getElementById('connection-status');
+
+    if (connected) {
+        statusIndicator.className = 'status-indicator status-healthy';
+        statusText.textContent = 'Connected';
+        connectionStatus.className = 'connection-status connected';
+    } else {
+        statusIndicator.className = 'status-indicator status-error';
+        statusText.textContent = 'Disconnected';
+        connectionStatus.className = 'connection-status disconnected';
+    }
+}
+
+// Expand {'__columns__', '__rows__'} tables back into row objects
+function fromColumnar(value) {
+    if (Array.isArray(value)) {
+        return value.map(fromColumnar);
+    }
+    if (value && typeof value === 'object') {
+        if (value.__columns__) {
+            return value.__rows__.map(row =>
+                Object.fromEntries(value.__columns__.map((column, i) => [column, row[i]])));
+        }
+        return Object.fromEntries(Object.entries(value).map(([key, item]) => [key, fromColumnar(item)]));
+    }
+    return value;
+}
+
+// Decode a negotiated payload envelope; plain JSON payloads pass through
+async function decodePayload(data) {
+    if (!data || data.enc === undefined || data.body === undefined) {
+        return data;
+    }
+
+    let body = data.body;
+    if (body instanceof ArrayBuffer || ArrayBuffer.isView(body)) {
+        // A view may cover only part of its buffer, so keep its offset and length
+        let bytes = body instanceof ArrayBuffer
+            ? new Uint8Array(body)
+            : new Uint8Array(body.buffer, body.byteOffset, body.byteLength);
+        if (data.z) {
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+            bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+        }
+        body = data.enc === 'msgpack' ? MessagePack.decode(bytes) : JSON.parse(new TextDecoder().decode(bytes));
+    }
+    return fromColumnar(body);
+}
+
+// Real-time data updates
+socket.on('data_update', async function(raw) {
+    const data = await decodePayload(raw);
+
+    // Store current data globally for filtering
+    if (data.current_inside) {
+        window.currentCarsData = data.current_inside;
+    }
+
+    if (autoRefresh) {
+        updateDashboard(data);
+    }
+});
+
+socket.on('occupancy_change', function(data) {
+    showNotification(
+        `Occupancy changed: ${data.old_count} → ${data.new_count} cars`, 
+        'info'
+    );
+});
+
+socket.on('payment_alert', function(data) {
+    showNotification(data.message, 'warning');
+});
+
+socket.on('overstay_alert', function(data) {
+    showNotification(data.message, data.severity === 'HIGH' ? 'error' : 'warning');
+});
+
+socket.on('anomaly_alert', function(data) {
+    showNotification(data.message, 'error');
+});
+
+// Notification system
+function showNotification(message, type = 'info') {
+    const container = document.getElementById('notification-container');
+    const notification = document.createElement('div');
+
+    const colors = {
+        success: 'bg-green-500',
+        error: 'bg-red-500',
+        warning: 'bg-yellow-500',
+        info: 'bg-blue-500'
+    };
+
+    notification.className = `${colors[type]} text-white px-4 py-3 rounded-lg shadow-lg mb-2 animate-slide-up`;
+    notification.innerHTML = `
+        <div class="flex items-center justify-between">
+            <span>${message}</span>
+            <button onclick="this.parentElement.parentElement.remove()" class="ml-4">
+                <i class="fas fa-times"></i>
+            </button>
+        </div>
+    `;
+
+    container.appendChild(notification);
+
+    // Auto-remove after 5 seconds
+    setTimeout(() => {
+        if (notification.parentElement) {
+            notification.remove();
+        }
+    }, 5000);
+}
+
+let maxValues = {
+    cars_inside: 1,
+    unpaid_entries: 1,
+    total_revenue: 1,
+    total_entries: 1
+};
+
+function updateProgressBars(stats) {
+    // Update max values
+    maxValues.cars_inside = Math.max(maxValues.cars_inside, stats.cars_inside);
+    maxValues.unpaid_entries = Math.max(maxValues.unpaid_entries, stats.unpaid_entries);
+    maxValues.total_revenue = Math.max(maxValues.total_revenue, stats.total_revenue);
+
+    // Update progress bars
+    document.getElementById('occupancy-bar').style.width = `${stats.occupancy_rate}%`;
+    document.getElementById('unpaid-bar').style.width = 
+        `${(stats.unpaid_entries / maxValues.unpaid_entries) * 100}%`;
+    document.getElementById('revenue-bar').style.width = 
+        `${(stats.total_revenue / maxValues.total_revenue) * 100}%`;
+}
+
+function updateStats(stats) {
+    document.getElementById('cars-inside').textContent = stats.cars_inside;
+    document.getElementById('unpaid-entries').textContent = stats.unpaid_entries;
+    document.getElementById('total-revenue').textContent = Math.round(stats.total_revenue);
+    document.getElementById('today-entries').textContent = stats.today_entries;
+    document.getElementById('inside-count').textContent = stats.cars_inside;
+    document.getElementById('max-capacity').textContent = stats.max_capacity;
+    document.getElementById('occupancy-rate').textContent = Math.round(stats.occupancy_rate);
+
+    // Update progress bars
+    updateProgressBars(stats);
+}
+
+function updateDashboard(data) {
+    // Each update carries only the topics that changed
+    if (data.stats) {
+        updateStats(data.stats);
+    }
+
+    // Kiosk and finance panels subscribe to these subsets only
+    if (data.occupancy) {
+        document.getElementById('cars-inside').textContent = data.occupancy.cars_inside;
+        document.getElementById('max-capacity').textContent = data.occupancy.max_capacity;
+        document.getElementById('occupancy-rate').textContent = Math.round(data.occupancy.occupancy_rate);
+        document.getElementById('occupancy-bar').style.width = `${data.occupancy.occupancy_rate}%`;
+    }
+
+    if (data.revenue) {
+        document.getElementById('total-revenue').textContent = Math.round(data.revenue.total_revenue);
+        document.getElementById('unpaid-entries').textContent = data.revenue.unpaid_entries;
+    }
+
+    // Update system health
+    if (data.system_health) {
+        const systemHealth = data.system_health;
+        document.getElementById('system-status').textContent = systemHealth.system_status;
+        document.getElementById('redis-memory').textContent = `Memory: ${systemHealth.redis_memory || 'N/A'}`;
+    }
+
+    // Update cars list with enhanced filtering and sorting
+    if (data.current_inside) {
+        updateCarsList(data.current_inside);
+    }
+
+    // Update activity list
+    if (data.recent_logs) {
+        updateActivityList(data.recent_logs);
+    }
+
+    // Update entries table
+    if (data.recent_entries) {
+        updateEntriesTable(data.recent_entries);
+    }
+
+    // Update charts
+    if (data.hourly_stats) {
+        updateCharts(data.hourly_stats);
+    }
+
+    if (data.analytics) {
+        updateAnalytics(data.analytics);
+    }
+
+    if (data.dwell_percentiles) {
+        updateDwellPercentiles(data.dwell_percentiles);
+    }
+
+    if (data.frequent_plates) {
+        updateFrequentPlates(data.frequent_plates);
+    }
+
+    if (data.lane_metrics) {
+        updateLaneMetrics(data.lane_metrics);
+    }
+
+    // Update last updated time
+    document.getElementById('last-updated').textContent = 
+        `Last updated: ${new Date().toLocaleTimeString()}`;
+}
+
+function updateCarsList(cars) {
+    const carsList = document.getElementById('cars-list');
+    const searchTerm = document.getElementById('search-cars').value.toLowerCase();
+    const filterStatus = document.getElementById('filter-status').value;
+    const sortBy = document.getElementById('sort-by').value;
+
+    // Filter cars
+    let filteredCars = cars.filter(car => {
+        const matchesSearch = car.plate.toLowerCase().includes(searchTerm);
+        const matchesFilter = filterStatus === 'all' || 
+                            car.status.toLowerCase() === filterStatus;
+        return matchesSearch && matchesFilter;
+    });
+
+    // Sort cars
+    filteredCars.sort((a, b) => {
+        switch(sortBy) {
+            case 'plate':
+                return a.plate.localeCompare(b.plate);
+            case 'duration':
+                return b.duration_hours - a.duration_hours;
+            default:
+                return new Date(b.entry_time) - new Date(a.entry_time);
+        }
+    });
+
+    carsList.innerHTML = '';
+
+    if (filteredCars.length === 0) {
+        carsList.innerHTML = `
+            <div class="text-center py-8 text-gray-500">
+                <i class="fas fa-car text-4xl mb-4"></i>
+                <p>No cars match your criteria</p>
+            </div>
+        `;
+    } else {
+        filteredCars.forEach((car, index) => {
+            const carDiv = document.createElement('div');
+            carDiv.className = 'bg-white/50 rounded-xl p-4 border border-gray-100 hover:shadow-md transition-all duration-200 animate-fade-in car-item';
+            carDiv.style.animationDelay = `${index * 0.05}s`;
+
+            const statusClass = car.status === 'Paid' ? 'bg-green-100 text-green-800' : 'bg-red-100 text-red-800';
+            const statusIcon = car.status === 'Paid' ? 'fas fa-check-circle' : 'fas fa-clock';
+            const priorityClass = car.priority === 'high' ? 'border-red-300' : 
+                                car.priority === 'medium' ? 'border-yellow-300' : 'border-gray-100';
+
+            carDiv.className += ` ${priorityClass}`;
+
+            carDiv.innerHTML = `
+                <div class="flex items-center justify-between">
+                    <div class="flex items-center space-x-4">
+                        <div class="bg-gradient-to-r from-blue-500 to-purple-500 p-2 rounded-lg text-white">
+                            <i class="fas fa-car"></i>
+                        </div>
+                        <div>
+                            <h3 class="font-bold text-lg text-gray-800 car-plate">${car.plate}</h3>
+                            <p class="text-sm text-gray-600">Entry: ${car.entry_time}</p>
+                            <p class="text-sm text-gray-600">Duration: ${car.duration_hours}h | Charge: ${car.charge} RWF</p>
+                        </div>
+                    </div>
+                    <div class="text-right">
+                        <span class="${statusClass} px-3 py-1 rounded-full text-sm font-medium">
+                            <i class="${statusIcon} mr-1"></i>
+                            ${car.status}
+                        </span>
+                        ${car.priority === 'high' ? '<div class="text-xs text-red-600 mt-1">⚠️ Long stay</div>' : ''}
+                    </div>
+                </div>
+            `;
+            carsList.appendChild(carDiv);
+        });
+    }
+}
+
+function updateActivityList(logs) {
+    const activityList = document.getElementById('activity-list');
+    activityList.innerHTML = '';
+
+    logs.slice(0, 15).forEach((log, index) => {
+        const logDiv = document.createElement('div');
+        logDiv.className = 'bg-white/50 rounded-lg p-3 border border-gray-100 animate-fade-in';
+        logDiv.style.animationDelay = `${index * 0.02}s`;
+
+        // Parse log for better display
+        let logClass = 'text-gray-700';
+        let logIcon = 'fas fa-info-circle';
+
+        if (log.includes('ENTRY GRANTED')) {
+            logClass = 'text-green-700';
+            logIcon = 'fas fa-sign-in-alt';
+        } else if (log.includes('EXIT GRANTED')) {
+            logClass = 'text-blue-700';
+            logIcon = 'fas fa-sign-out-alt';
+        } else if (log.includes('DENIED')) {
+            logClass = 'text-red-700';
+            logIcon = 'fas fa-times-circle';
+        } else if (log.includes('PAYMENT')) {
+            logClass = 'text-purple-700';
+            logIcon = 'fas fa-credit-card';
+        }
+
+        logDiv.innerHTML = `
+            <div class="flex items-start space-x-2">
+                <i class="${logIcon} ${logClass} mt-1"></i>
+                <span class="text-sm ${logClass}">${log}</span>
+            </div>
+        `;
+        activityList.appendChild(logDiv);
+    });
+}
+
+function updateEntriesTable(entries) {
+    const entriesTable = document.getElementById('entries-table');
+    entriesTable.innerHTML = '';
+
+    entries.forEach(entry => {
+        entriesTable.appendChild(createEntryRow(entry));
+    });
+}
+
+function createEntryRow(entry) {
+    const row = document.createElement('tr');
+    row.className = 'border-b border-gray-100 hover:bg-white/50 transition-colors duration-200';
+
+    const paymentClass = entry.payment_status === 'Paid' ? 'bg-green-100 text-green-800' : 'bg-red-100 text-red-800';
+    const statusClass = entry.exit_status === 'Exited' ? 'bg-blue-100 text-blue-800' : 'bg-yellow-100 text-yellow-800';
+
+    row.innerHTML = `
+        <td class="py-3 px-4 text-sm font-medium text-gray-900">#${entry.id}</td>
+        <td class="py-3 px-4 text-sm font-bold text-gray-900">${entry.plate}</td>
+        <td class="py-3 px-4 text-sm text-gray-600">${entry.entry_time}</td>
+        <td class="py-3 px-4 text-sm text-gray-600">${entry.exit_time}</td>
+        <td class="py-3 px-4 text-sm text-gray-600">${entry.duration}</td>
+        <td class="py-3 px-4">
+            <span class="${paymentClass} px-2 py-1 rounded-full text-xs font-medium">
+                ${entry.payment_status}
+            </span>
+        </td>
+        <td class="py-3 px-4">
+            <span class="${statusClass} px-2 py-1 rounded-full text-xs font-medium">
+                ${entry.exit_status}
+            </span>
+        </td>
+        <td class="py-3 px-4 text-sm text-gray-900">${entry.charge} RWF</td>
+    `;
+    return row;
+}
+
+function initializeCharts() {
+    // Hourly Activity Chart
+    const hourlyCtx = document.getElementById('hourlyChart').getContext('2d');
+    hourlyChart = new Chart(hourlyCtx, {
+        type: 'bar',
+        data: {
+            labels: [],
+            datasets: [{
+                label: 'Entries',
+                data: [],
+                backgroundColor: 'rgba(59, 130, 246, 0.6)',
+                borderColor: 'rgba(59, 130, 246, 1)',
+                borderWidth: 1
+            }, {
+                label: 'Exits',
+                data: [],
+                backgroundColor: 'rgba(16, 185, 129, 0.6)',
+                borderColor: 'rgba(16, 185, 129, 1)',
+                borderWidth: 1
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            scales: {
+                y: {
+                    beginAtZero: true
+                }
+            }
+        }
+    });
+
+    // Revenue Chart
+    const revenueCtx = document.getElementById('revenueChart').getContext('2d');
+    revenueChart = new Chart(revenueCtx, {
+        type: 'line',
+        data: {
+            labels: [],
+            datasets: [{
+                label: 'Revenue (RWF)',
+                data: [],
+                borderColor: 'rgba(34, 197, 94, 1)',
+                backgroundColor: 'rgba(34, 197, 94, 0.1)',
+                fill: true,
+                tension: 0.4
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            scales: {
+                y: {
+                    beginAtZero: true
+                }
+            }
+        }
+    });
+}
+
+function initializeAnalyticsCharts() {
+    occupancyHistoryChart = new Chart(document.getElementById('occupancyHistoryChart').getContext('2d'), {
+        type: 'line',
+        data: {
+            labels: [],
+            datasets: [{
+                label: 'Cars inside',
+                data: [],
+                borderColor: 'rgba(20, 184, 166, 1)',
+                backgroundColor: 'rgba(20, 184, 166, 0.1)',
+                fill: true,
+                pointRadius: 0
+            }]
+        },
+        options: { responsive: true, maintainAspectRatio: false, scales: { y: { beginAtZero: true } } }
+    });
+
+    weekdayRevenueChart = new Chart(document.getElementById('weekdayRevenueChart').getContext('2d'), {
+        type: 'bar',
+        data: {
+            labels: [],
+            datasets: [{
+                label: 'Revenue by weekday (RWF)',
+                data: [],
+                backgroundColor: 'rgba(34, 197, 94, 0.6)'
+            }]
+        },
+        options: { responsive: true, maintainAspectRatio: false, scales: { y: { beginAtZero: true } } }
+    });
+}
+
+function updateCharts(hourlyStats) {
+    if (!hourlyChart || !revenueChart) return;
+
+    const labels = hourlyStats.map(stat => stat.hour);
+    const entries = hourlyStats.map(stat => stat.entries);
+    const exits = hourlyStats.map(stat => stat.exits);
+    const revenue = hourlyStats.map(stat => stat.revenue);
+
+    hourlyChart.data.labels = labels;
+    hourlyChart.data.datasets[0].data = entries;
+    hourlyChart.data.datasets[1].data = exits;
+    hourlyChart.update('none');
+
+    revenueChart.data.labels = labels;
+    revenueChart.data.datasets[0].data = revenue;
+    revenueChart.update('none');
+}
+
+function updateAnalytics(analytics) {
+    const percentiles = analytics.dwell.percentiles;
+    document.getElementById('analytics-window').textContent = analytics.window;
+    document.getElementById('analytics-sessions').textContent = analytics.sessions;
+    document.getElementById('analytics-p50').textContent = percentiles.p50 !== undefined ? `${percentiles.p50}h` : '-';
+    document.getElementById('analytics-p95').textContent = percentiles.p95 !== undefined ? `${percentiles.p95}h` : '-';
+    document.getElementById('analytics-busiest').textContent = analytics.peaks.busiest_hour || '-';
+    document.getElementById('analytics-peaks').textContent = analytics.peaks.peak_hours.join(', ') || '-';
+    document.getElementById('analytics-generated').textContent =
+        `Computed ${analytics.generated_at} in ${analytics.compute_ms} ms`;
+
+    if (!occupancyHistoryChart || !weekdayRevenueChart) return;
+
+    occupancyHistoryChart.data.labels = analytics.occupancy.timestamps;
+    occupancyHistoryChart.data.datasets[0].data = analytics.occupancy.inside;
+    occupancyHistoryChart.update('none');
+
+    weekdayRevenueChart.data.labels = analytics.revenue.weekdays;
+    weekdayRevenueChart.data.datasets[0].data = analytics.revenue.by_weekday;
+    weekdayRevenueChart.update('none');
+}
+
+function updateDwellPercentiles(windows) {
+    const table = document.getElementById('dwell-percentiles-table');
+    const format = value => value === null || value === undefined ? '-' : value;
+    table.innerHTML = '';
+
+    Object.entries(windows).forEach(([window, summary]) => {
+        const row = document.createElement('tr');
+        row.className = 'border-b border-gray-100';
+        row.innerHTML = `
+            <td class="py-2 px-3 font-medium text-gray-800">${window}</td>
+            <td class="py-2 px-3 text-gray-600">${summary.count}</td>
+            <td class="py-2 px-3 text-gray-600">${format(summary.p50)}</td>
+            <td class="py-2 px-3 text-gray-600">${format(summary.p95)}</td>
+            <td class="py-2 px-3 text-gray-600">${format(summary.p99)}</td>
+        `;
+        table.appendChild(row);
+    });
+}
+
+function updateFrequentPlates(kinds) {
+    const container = document.getElementById('frequent-plates');
+    container.innerHTML = '';
+
+    Object.values(kinds).forEach(kind => {
+        [['day', 'Today'], ['month', 'This month']].forEach(([period, title]) => {
+            const rows = kind[period].map(item => `
+                <li class="flex justify-between py-1 text-sm">
+                    <span class="font-bold text-gray-800">${item.plate}</span>
+                    <span class="text-gray-600">${item.count}</span>
+                </li>`).join('');
+
+            const column = document.createElement('div');
+            column.innerHTML = `
+                <h3 class="text-sm font-semibold text-gray-700 mb-2">${kind.label} - ${title}</h3>
+                <ol class="divide-y divide-gray-100">${rows || '<li class="py-1 text-sm text-gray-500">No data yet</li>'}</ol>
+            `;
+            container.appendChild(column);
+        });
+    });
+}
+
+function updateLaneMetrics(lanes) {
+    const table = document.getElementById('lane-metrics-table');
+    const seconds = value => value === null || value === undefined ? '-' : `${value}s`;
+    table.innerHTML = '';
+
+    Object.entries(lanes).forEach(([lane, summary]) => {
+        const decisions = Object.entries(summary.decisions)
+            .map(([decision, count]) => `${decision} ${count}`).join(', ') || '-';
+        const row = document.createElement('tr');
+        row.className = 'border-b border-gray-100';
+        row.innerHTML = `
+            <td class="py-2 px-3 font-medium text-gray-800 capitalize">${lane}</td>
+            <td class="py-2 px-3 text-gray-600">${summary.throughput_per_min}</td>
+            <td class="py-2 px-3 text-gray-600">${summary.peak_per_min}</td>
+            <td class="py-2 px-3 text-gray-600">${seconds(summary.avg_seconds.queue)}</td>
+            <td class="py-2 px-3 text-gray-600">${seconds(summary.avg_seconds.confirm)} / ${seconds(summary.avg_seconds.decision)} / ${seconds(summary.avg_seconds.gate)}</td>
+            <td class="py-2 px-3 text-gray-600">${summary.gate_utilisation}%</td>
+            <td class="py-2 px-3 text-gray-600">${decisions}</td>
+            <td class="py-2 px-3 text-gray-600">${summary.abandoned}</td>
+        `;
+        table.appendChild(row);
+    });
+
+    if (!table.children.length) {
+        table.innerHTML = '<tr><td colspan="8" class="py-2 px-3 text-gray-500">No lane activity yet</td></tr>';
+    }
+}
+
+// Points copied into a short sampling gap are drawn dashed rather than as measured data
+let timeseriesFilled = [];
+
+function filledDash(ctx) {
+    return timeseriesFilled[ctx.p1DataIndex] ? [4, 4] : undefined;
+}
+
+function initializeTimeseriesChart() {
+    timeseriesChart = new Chart(document.getElementById('timeseriesChart').getContext('2d'), {
+        type: 'line',
+        data: {
+            labels: [],
+            datasets: [{
+                label: 'Cars inside',
+                data: [],
+                borderColor: 'rgba(59, 130, 246, 1)',
+                backgroundColor: 'rgba(59, 130, 246, 0.1)',
+                fill: true,
+                pointRadius: 0,
+                segment: { borderDash: filledDash }
+            }, {
+                label: 'Unpaid',
+                data: [],
+                borderColor: 'rgba(239, 68, 68, 1)',
+                pointRadius: 0,
+                segment: { borderDash: filledDash }
+            }]
+        },
+        options: { responsive: true, maintainAspectRatio: false, animation: false, scales: { y: { beginAtZero: true } } }
+    });
+}
+
+function requestTimeseries() {
+    const window = parseInt(document.getElementById('timeseries-window').value, 10);
+    socket.emit('timeseries_request', { window: window });
+}
+
+socket.on('timeseries_data', function(series) {
+    if (!timeseriesChart) return;
+
+    const showDate = series.window > 86400;
+    timeseriesChart.data.labels = series.timestamps.map(t => {
+        const date = new Date(t * 1000);
+        return showDate ? date.toLocaleString() : date.toLocaleTimeString();
+    });
+    timeseriesChart.data.datasets[0].data = series.occupancy;
+    timeseriesChart.data.datasets[1].data = series.unpaid;
+    timeseriesFilled = series.filled || [];
+    timeseriesChart.update('none');
+});
+
+document.getElementById('timeseries-window').addEventListener('change', requestTimeseries);
+
+function toggleAutoRefresh() {
+    autoRefresh = !autoRefresh;
+    const icon = document.getElementById('refresh-icon');
+
+    if (autoRefresh) {
+        icon.classList.remove('text-red-500');
+        icon.classList.add('text-green-500');
+        showNotification('Auto-refresh enabled', 'success');
+    } else {
+        icon.classList.remove('text-green-500');
+        icon.classList.add('text-red-500');
+        showNotification('Auto-refresh disabled', 'warning');
+    }
+}
+
+function exportData() {
+    // Request data export
+    socket.emit('export_request');
+    showNotification('Preparing export...', 'info');
+}
+
+// Plate history search over every stored session, paged by entry id
+let plateSearchQuery = '';
+let plateSearchBefore = null;
+let plateSearchTimer = null;
+
+async function searchPlates(query, before = null) {
+    const params = new URLSearchParams({ q: query, limit: 20 });
+    if (before !== null) params.set('before', before);
+
+    const response = await fetch(`/api/search?${params}`);
+    const result = await response.json();
+    if (!response.ok || query !== plateSearchQuery) return;
+
+    const table = document.getElementById('plate-search-results');
+    if (before === null) table.innerHTML = '';
+    result.sessions.forEach(session => table.appendChild(createEntryRow(session)));
+
+    plateSearchBefore = result.next_before;
+    document.getElementById('plate-search-more').classList.toggle('hidden', plateSearchBefore === null);
+    document.getElementById('plate-search-summary').textContent = result.plates.length
+        ? `${result.plates.length} matching plate${result.plates.length === 1 ? '' : 's'}`
+        : 'No matching plates';
+}
+
+function loadMorePlateResults() {
+    if (plateSearchQuery && plateSearchBefore !== null) {
+        searchPlates(plateSearchQuery, plateSearchBefore);
+    }
+}
+
+document.getElementById('plate-search').addEventListener('input', function() {
+    clearTimeout(plateSearchTimer);
+    plateSearchQuery = this.value.trim();
+    if (!plateSearchQuery) {
+        document.getElementById('plate-search-results').innerHTML = '';
+        document.getElementById('plate-search-more').classList.add('hidden');
+        return;
+    }
+    plateSearchTimer = setTimeout(() => searchPlates(plateSearchQuery), 250);
+});
+
+// Event listeners
+document.getElementById('search-cars').addEventListener('input', function() {
+    if (window.currentCarsData) {
+        updateCarsList(window.currentCarsData);
+    }
+});
+
+document.getElementById('filter-status').addEventListener('change', function() {
+    if (window.currentCarsData) {
+        updateCarsList(window.currentCarsData);
+    }
+});
+
+document.getElementById('sort-by').addEventListener('change', function() {
+    if (window.currentCarsData) {
+        updateCarsList(window.currentCarsData);
+    }
+});
+
+// Initialize charts when page loads
+document.addEventListener('DOMContentLoaded', function() {
+    initializeCharts();
+    initializeAnalyticsCharts();
+    initializeTimeseriesChart();
+    requestTimeseries();
+    setInterval(requestTimeseries, 10000);
+
+    // Render the snapshot embedded in the page before the first socket update
+    const initialData = JSON.parse(document.getElementById('initial-data').textContent || '{}');
+    if (Object.keys(initialData).length) {
+        if (initialData.current_inside) {
+            window.currentCarsData = initialData.current_inside;
+        }
+        updateDashboard(initialData);
+    }
+});
+
+// Export functionality
+socket.on('export_ready', function(data) {
+    const blob = new Blob([data.csv], { type: 'text/csv' });
+    const url = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = `parking_data_${new Date().toISOString().split('T')[0]}.csv`;
+    a.click();
+    window.URL.revokeObjectURL(url);
+    showNotification('Export completed!', 'success');
+});
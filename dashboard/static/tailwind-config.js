@@ -0,0 +1,31 @@
+tailwind.config = {
+    theme: {
+        extend: {
+            animation: {
+                'fade-in': 'fadeIn 0.5s ease-in-out',
+                'slide-up': 'slideUp 0.3s ease-out',
+                'pulse-slow': 'pulse 3s infinite',
+                'bounce-gentle': 'bounceGentle 0.6s ease-in-out',
+                'scale-up': 'scaleUp 0.2s ease-out',
+            },
+            keyframes: {
+                fadeIn: {
+                    '0%': { opacity: '0', transform: 'translateY(10px)' },
+                    '100%': { opacity: '1', transform: 'translateY(0)' }
+                },
+                slideUp: {
+                    '0%': { opacity: '0', transform: 'translateY(20px)' },
+                    '100%': { opacity: '1', transform: 'translateY(0)' }
+                },
+                bounceGentle: {
+                    '0%, 100%': { transform: 'scale(1)' },
+                    '50%': { transform: 'scale(1.05)' }
+                },
+                scaleUp: {
+                    '0%': { transform: 'scale(0.95)' },
+                    '100%': { transform: 'scale(1)' }
+                }
+            }
+        }
+    }
+}
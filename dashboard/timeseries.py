@@ -0,0 +1,183 @@
+import io
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+
+# Samples kept per metric: (seconds per point, number of points)
+RESOLUTIONS = (
+    (1, 3600),     # 1 s for the last hour
+    (60, 1440),    # 1 min for the last day
+    (900, 2880),   # 15 min for the last month
+)
+
+# How samples within one point are combined
+AGGREGATIONS = {
+    'occupancy': 'mean',
+    'unpaid': 'mean',
+    'revenue': 'last',  # Cumulative total, so the latest value is the point's value
+}
+
+# Gaps up to this long (a few missed 1 s samples) are filled with copies of
+# the previous point, flagged as filled; longer gaps are left empty.
+MAX_FILL_SECONDS = 10
+
+
+class RingSeries:
+    """Fixed-size ring of points at one resolution, indexed by time slot.
+
+    Position slot % capacity holds the point for that slot; the slots array
+    records which slot a position currently holds, so stale positions from a
+    previous lap are recognised and skipped. The filled array flags points
+    copied into a short gap rather than sampled.
+    """
+
+    def __init__(self, resolution: int, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.slots = np.full(capacity, -1, dtype=np.int64)
+        self.filled = np.zeros(capacity, dtype=bool)
+        self.values = {metric: np.zeros(capacity, dtype=np.float32) for metric in AGGREGATIONS}
+        self.current_slot = None
+        self.pending = {}
+        self.pending_samples = 0
+
+    def add(self, timestamp: float, values: Dict[str, float]):
+        slot = int(timestamp // self.resolution)
+
+        if self.current_slot is not None and slot != self.current_slot:
+            previous = self.aggregate()
+            self.write(self.current_slot, previous)
+
+            gap = slot - self.current_slot - 1
+            if 0 < gap and gap * self.resolution <= MAX_FILL_SECONDS:
+                for missing in range(self.current_slot + 1, slot):
+                    self.write(missing, previous, filled=True)
+            self.pending = {}
+            self.pending_samples = 0
+
+        self.current_slot = slot
+        for metric, value in values.items():
+            if AGGREGATIONS[metric] == 'mean':
+                self.pending[metric] = self.pending.get(metric, 0.0) + value
+            else:
+                self.pending[metric] = value
+        self.pending_samples += 1
+
+    def aggregate(self) -> Dict[str, float]:
+        """Value of the point being accumulated"""
+        return {
+            metric: (value / self.pending_samples if AGGREGATIONS[metric] == 'mean' else value)
+            for metric, value in self.pending.items()
+        }
+
+    def write(self, slot: int, values: Dict[str, float], filled: bool = False):
+        position = slot % self.capacity
+        self.slots[position] = slot
+        self.filled[position] = filled
+        for metric, value in values.items():
+            self.values[metric][position] = value
+
+    def window(self, start: float, end: float) -> Dict:
+        """Points with timestamps in [start, end], including the partial current point"""
+        first = max(int(start // self.resolution), int(end // self.resolution) - self.capacity + 1)
+        wanted = np.arange(first, int(end // self.resolution) + 1, dtype=np.int64)
+        positions = wanted % self.capacity
+        valid = self.slots[positions] == wanted
+
+        result = {
+            'resolution': self.resolution,
+            'timestamps': (wanted[valid] * self.resolution).tolist(),
+            'filled': self.filled[positions[valid]].tolist(),
+        }
+        for metric, values in self.values.items():
+            result[metric] = np.round(values[positions[valid]].astype(np.float64), 2).tolist()
+
+        if self.pending_samples and self.current_slot is not None and first <= self.current_slot:
+            current = self.aggregate()
+            result['timestamps'].append(self.current_slot * self.resolution)
+            result['filled'].append(False)
+            for metric in self.values:
+                result[metric].append(round(current.get(metric, 0.0), 2))
+
+        return result
+
+    @property
+    def span(self) -> int:
+        return self.resolution * self.capacity
+
+
+class OccupancyTimeSeries:
+    """Occupancy, unpaid count and revenue kept at several resolutions.
+
+    Every sample updates all resolutions in O(1), so the finest one holds the
+    last hour at 1 s and the coarser ones hold downsampled history. Memory is
+    fixed by RESOLUTIONS. A window request picks the finest resolution that
+    covers it and slices the rings without touching Redis or SQLite.
+    """
+
+    def __init__(self):
+        self.series = [RingSeries(resolution, capacity) for resolution, capacity in RESOLUTIONS]
+        self.lock = threading.Lock()
+
+    def record(self, values: Dict[str, float], timestamp: Optional[float] = None):
+        timestamp = timestamp or time.time()
+        with self.lock:
+            for series in self.series:
+                series.add(timestamp, values)
+
+    def window(self, seconds: int, resolution: Optional[int] = None) -> Dict:
+        """Points for the last `seconds`, at the given or finest covering resolution"""
+        candidates = [series for series in self.series if resolution in (None, series.resolution)]
+        if not candidates:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        chosen = next((series for series in candidates if series.span >= seconds), candidates[-1])
+        now = time.time()
+        with self.lock:
+            return chosen.window(now - seconds, now)
+
+    def dumps(self) -> bytes:
+        """Serialize every ring, with the point each is still accumulating, for persistence"""
+        arrays = {}
+        with self.lock:
+            for series in self.series:
+                arrays[f"slots_{series.resolution}"] = series.slots.copy()
+                arrays[f"filled_{series.resolution}"] = series.filled.copy()
+                for metric, values in series.values.items():
+                    arrays[f"{metric}_{series.resolution}"] = values.copy()
+                if series.current_slot is not None:
+                    arrays[f"pending_slot_{series.resolution}"] = np.array(
+                        [series.current_slot, series.pending_samples], dtype=np.int64)
+                    arrays[f"pending_values_{series.resolution}"] = np.array(
+                        [series.pending.get(metric, np.nan) for metric in AGGREGATIONS], dtype=np.float64)
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    def loads(self, data: bytes):
+        """Restore rings saved by dumps(); rings whose shape changed are skipped"""
+        with np.load(io.BytesIO(data)) as arrays, self.lock:
+            for series in self.series:
+                slots = arrays.get(f"slots_{series.resolution}")
+                if slots is None or len(slots) != series.capacity:
+                    continue
+                series.slots = slots.copy()
+                filled = arrays.get(f"filled_{series.resolution}")
+                series.filled = filled.copy() if filled is not None else np.zeros(series.capacity, dtype=bool)
+                for metric in series.values:
+                    if f"{metric}_{series.resolution}" in arrays:
+                        series.values[metric] = arrays[f"{metric}_{series.resolution}"].copy()
+
+                # The partial point carries on, so a restart or failover loses none of its samples
+                pending_slot = arrays.get(f"pending_slot_{series.resolution}")
+                pending_values = arrays.get(f"pending_values_{series.resolution}")
+                if pending_slot is not None and pending_values is not None:
+                    series.current_slot, series.pending_samples = int(pending_slot[0]), int(pending_slot[1])
+                    series.pending = {metric: float(value) for metric, value in zip(AGGREGATIONS, pending_values)
+                                      if not np.isnan(value)}
+                else:
+                    series.current_slot, series.pending, series.pending_samples = None, {}, 0
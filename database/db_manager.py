@@ -9,13 +9,56 @@ import sqlite3
 import redis
 import json
 import os
+import time
 from datetime import datetime
+from functools import wraps
 from typing import Dict, Optional, List, Tuple
 
+from analytics.dwell_sketch import DwellSketchStore
+from analytics.heavy_hitters import HeavyHitterTracker
+from database.occupancy_counters import OccupancyCounters
+from database.plate_index import PlateIndex
+from monitoring import metrics
+
+# Redis server shared by every component
+REDIS_URL = os.environ.get('PARKING_REDIS_URL', 'redis://localhost:6379/0')
+
+# SQLite database file, next to this module unless overridden
+SQLITE_DB_PATH = os.environ.get('PARKING_SQLITE_PATH',
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parking_system.db'))
+
+# Lane logs read "<timestamp> - <EVENT> - <plate> - ... - Lane: <name>"
+LANE_SUFFIX = ' - Lane: '
+
+DB_LATENCY = metrics.histogram('parking_db_operation_seconds', 'Latency of DatabaseManager operations',
+                               ('operation',))
+DB_FAILURES = metrics.counter('parking_db_failures_total', 'DatabaseManager operations that failed',
+                              ('operation',))
+
+
+def instrumented(operation: str):
+    """Time a DatabaseManager method and count it as failed when it returns False"""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = method(*args, **kwargs)
+            DB_LATENCY.observe(time.perf_counter() - started, operation=operation)
+            if result is False:
+                DB_FAILURES.inc(operation=operation)
+            return result
+        return wrapper
+    return decorator
+
 
 class DatabaseManager:
     def __init__(self):
-        self.redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+        self.redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+        self.dwell_sketches = DwellSketchStore(self.redis_client)
+        self.plate_index = PlateIndex(self.redis_client)
+        self.heavy_hitters = HeavyHitterTracker(self.redis_client)
+        # Running occupancy totals, kept current by every write of an entry hash below
+        self.occupancy = OccupancyCounters(self.redis_client)
         self.sqlite_connection = None
         self.connect_sqlite()
         self.ensure_tables_exist()
@@ -23,12 +66,9 @@ class DatabaseManager:
     def connect_sqlite(self):
         """Establish SQLite connection"""
         try:
-            # Get the directory where this script is located
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            # Create the database file path relative to the database folder
-            db_path = os.path.join(current_dir, 'parking_system.db')
-
-            self.sqlite_connection = sqlite3.connect(db_path)
+            db_path = SQLITE_DB_PATH
+            # The lanes use the manager from their pipeline's decide thread, not the thread that created it
+            self.sqlite_connection = sqlite3.connect(db_path, check_same_thread=False)
             print(f"[✓] SQLite connection established at: {db_path}")
         except Exception as e:
             print(f"[WARNING] SQLite unavailable, running Redis-only mode: {e}")
@@ -140,12 +180,16 @@ class DatabaseManager:
         self.sqlite_connection.commit()
         cursor.close()
 
+    @instrumented('write_entry')
     def write_entry(self, entry_id: int, entry_data: Dict) -> bool:
         """Write entry to both Redis and SQLite"""
         try:
             # Write to Redis (existing behavior)
+            before = self.occupancy.state(f"entry:{entry_id}")
             self.redis_client.hset(f"entry:{entry_id}", mapping=entry_data)
+            self.occupancy.changed(before, entry_data)
             self.redis_client.sadd(f"entries:{entry_data['plate_number']}", entry_id)
+            self.plate_index.add(entry_data['plate_number'])
 
             # Write to SQLite
             if self.sqlite_connection:
@@ -175,6 +219,7 @@ class DatabaseManager:
             print(f"[ERROR] Failed to write entry {entry_id}: {e}")
             return False
 
+    @instrumented('get_entry')
     def get_entry(self, entry_id: int) -> Optional[Dict]:
         """Get entry from Redis first, fallback to SQLite"""
         try:
@@ -204,6 +249,7 @@ class DatabaseManager:
 
                     # Cache in Redis for future requests
                     self.redis_client.hset(f"entry:{entry_id}", mapping=entry_data)
+                    self.occupancy.changed((None, None, None), entry_data)
                     return entry_data
 
             return None
@@ -211,6 +257,7 @@ class DatabaseManager:
             print(f"[ERROR] Failed to get entry {entry_id}: {e}")
             return None
 
+    @instrumented('get_entries_for_plate')
     def get_entries_for_plate(self, plate_number: str) -> List[str]:
         """Get all entry IDs for a plate number"""
         try:
@@ -237,9 +284,13 @@ class DatabaseManager:
             print(f"[ERROR] Failed to get entries for plate {plate_number}: {e}")
             return []
 
-    def log_message(self, message: str, log_type: str = 'INFO') -> bool:
-        """Log message to both Redis and SQLite"""
+    @instrumented('log_message')
+    def log_message(self, message: str, log_type: str = 'INFO', lane: Optional[str] = None) -> bool:
+        """Log message to both Redis and SQLite; lane events end with the lane's name"""
         try:
+            if lane:
+                message = f"{message}{LANE_SUFFIX}{lane}"
+
             # Redis (existing behavior)
             self.redis_client.rpush("logs", message)
 
@@ -258,7 +309,9 @@ class DatabaseManager:
             print(f"[ERROR] Failed to log message: {e}")
             return False
 
-    def log_security_alert(self, plate_number: Optional[str], alert_message: str, severity: str = 'MEDIUM') -> bool:
+    @instrumented('log_security_alert')
+    def log_security_alert(self, plate_number: Optional[str], alert_message: str, severity: str = 'MEDIUM',
+                           lane: Optional[str] = None) -> bool:
         """Log security alert to both Redis and SQLite"""
         try:
             # Redis
@@ -266,7 +319,8 @@ class DatabaseManager:
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'plate_number': plate_number or '',
                 'alert_message': alert_message,
-                'severity': severity
+                'severity': severity,
+                'lane': lane or ''
             }
             self.redis_client.rpush("security_alerts", json.dumps(alert_data))
 
@@ -285,6 +339,7 @@ class DatabaseManager:
             print(f"[ERROR] Failed to log security alert: {e}")
             return False
 
+    @instrumented('get_unpaid_entries')
     def get_unpaid_entries(self) -> List[Dict]:
         """Get all unpaid entries"""
         try:
@@ -315,17 +370,21 @@ class DatabaseManager:
             print(f"[ERROR] Failed to get unpaid entries: {e}")
             return []
 
+    @instrumented('update_payment_status')
     def update_payment_status(self, entry_id: int, charge_amount: float) -> bool:
         """Update payment status for an entry"""
         try:
             payment_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
             # Update Redis
-            self.redis_client.hset(f"entry:{entry_id}", mapping={
+            payment = {
                 'payment_status': '1',
                 'charge_amount': str(charge_amount),
                 'payment_timestamp': payment_timestamp
-            })
+            }
+            before = self.occupancy.state(f"entry:{entry_id}")
+            self.redis_client.hset(f"entry:{entry_id}", mapping=payment)
+            self.occupancy.changed(before, payment)
 
             # Update SQLite
             if self.sqlite_connection:
@@ -345,16 +404,21 @@ class DatabaseManager:
             print(f"[ERROR] Failed to update payment status for entry {entry_id}: {e}")
             return False
 
+    @instrumented('update_exit_status')
     def update_exit_status(self, entry_id: int) -> bool:
-        """Update exit status for an entry"""
+        """Update exit status for an entry and record its stay in the dwell-time sketches"""
         try:
-            exit_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            exited_at = datetime.now()
+            exit_timestamp = exited_at.strftime('%Y-%m-%d %H:%M:%S')
 
             # Update Redis
-            self.redis_client.hset(f"entry:{entry_id}", mapping={
+            exit_fields = {
                 'exit_status': '1',
                 'exit_timestamp': exit_timestamp
-            })
+            }
+            before = self.occupancy.state(f"entry:{entry_id}")
+            self.redis_client.hset(f"entry:{entry_id}", mapping=exit_fields)
+            self.occupancy.changed(before, exit_fields)
 
             # Update SQLite
             if self.sqlite_connection:
@@ -364,15 +428,49 @@ class DatabaseManager:
                                SET exit_status    = 1,
                                    exit_timestamp = ?
                                WHERE id = ?
-                               """, (datetime.now(), entry_id))
+                               """, (exited_at, entry_id))
                 self.sqlite_connection.commit()
                 cursor.close()
 
+            self.record_dwell_time(entry_id, exited_at)
             return True
         except Exception as e:
             print(f"[ERROR] Failed to update exit status for entry {entry_id}: {e}")
             return False
 
+    def record_dwell_time(self, entry_id: int, exited_at: datetime) -> bool:
+        """Add an exited entry's parking duration to the streaming dwell-time sketches"""
+        try:
+            entry_timestamp = self.redis_client.hget(f"entry:{entry_id}", 'entry_timestamp')
+            if not entry_timestamp:
+                return False
+
+            entry_time = datetime.strptime(entry_timestamp, '%Y-%m-%d %H:%M:%S')
+            self.dwell_sketches.record((exited_at - entry_time).total_seconds(), exited_at)
+            return True
+        except Exception as e:
+            print(f"[WARNING] Failed to record dwell time for entry {entry_id}: {e}")
+            return False
+
+    def record_visit(self, plate_number: str) -> bool:
+        """Count a granted entry towards the frequent-parker rankings"""
+        return self.record_heavy_hitter('visits', plate_number)
+
+    def record_denial(self, plate_number: str) -> bool:
+        """Count a denied exit towards the most-denied rankings"""
+        return self.record_heavy_hitter('denials', plate_number)
+
+    def record_heavy_hitter(self, kind: str, plate_number: Optional[str]) -> bool:
+        """Add one event for a plate to the streaming top-K trackers"""
+        if not plate_number:
+            return False
+        try:
+            self.heavy_hitters.record(kind, plate_number)
+            return True
+        except Exception as e:
+            print(f"[WARNING] Failed to record {kind} for plate {plate_number}: {e}")
+            return False
+
     def get_recent_logs(self, limit: int = 100) -> List[Dict]:
         """Get recent system logs"""
         try:
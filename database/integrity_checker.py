@@ -0,0 +1,237 @@
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from database.db_manager import DatabaseManager
+
+
+class IntegrityChecker:
+    """Incremental data-integrity checker for Redis and SQLite.
+
+    A background thread walks the Redis keyspace in bounded SCAN slices and
+    then the SQLite entries table in bounded id ranges, sleeping between
+    slices to stay within a keys-per-second budget. It checks for:
+
+    - orphaned entries: entry:<id> hashes missing from their entries:<plate> set
+    - dangling members: entries:<plate> members with no entry:<id> hash, or
+      that are not entry ids at all
+    - missing in SQLite / missing in Redis: entries stored in only one database
+    - status mismatches: plate, payment or exit status differing between the two
+
+    Counts for the pass in progress and for the last complete pass are kept
+    in a small Redis hash, so health reads cost one HGETALL. A pass cut
+    short by stop() never replaces the totals of the last complete one. With repair
+    enabled each problem is fixed as it is found, treating Redis as the
+    primary copy.
+    """
+
+    REPORT_KEY = 'integrity:report'
+    COUNTERS = ('orphaned_entries', 'dangling_members', 'missing_in_sqlite',
+                'missing_in_redis', 'status_mismatches', 'repaired', 'keys_checked')
+
+    def __init__(self, repair: bool = False, slice_size: int = 200, keys_per_second: int = 2000,
+                 pass_interval: int = 60, should_run: Optional[Callable[[], bool]] = None):
+        self.repair = repair
+        self.slice_size = slice_size
+        self.keys_per_second = keys_per_second
+        self.pass_interval = pass_interval
+        self.should_run = should_run or (lambda: True)
+        self.db_manager = None
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        """Start the checker thread"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        """Checker loop, with its own DatabaseManager so its long SQLite scans never share a connection"""
+        self.db_manager = DatabaseManager()
+
+        while not self.stopped.is_set():
+            if not self.should_run():
+                self.stopped.wait(self.pass_interval)
+                continue
+
+            try:
+                self.run_pass()
+            except Exception as e:
+                print(f"[INTEGRITY] Check pass failed: {e}")
+            self.stopped.wait(self.pass_interval)
+
+    def run_pass(self):
+        """Run one complete check over Redis and SQLite"""
+        started = time.time()
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.publish(in_progress=True)
+
+        redis_done = False
+        cursor = 0
+        while not self.stopped.is_set():
+            cursor, keys = self.db_manager.redis_client.scan(cursor, count=self.slice_size)
+            self.check_redis_slice(keys)
+            self.counts['keys_checked'] += len(keys)
+            self.publish(in_progress=True)
+            self.throttle(len(keys))
+            if cursor == 0:
+                redis_done = True
+                break
+
+        sqlite_done = not self.db_manager.sqlite_connection
+        last_id = 0
+        while redis_done and not sqlite_done and not self.stopped.is_set():
+            rows = self.fetch_sqlite_slice(last_id)
+            if not rows:
+                sqlite_done = True
+                break
+            self.check_sqlite_slice(rows)
+            last_id = rows[-1][0]
+            self.counts['keys_checked'] += len(rows)
+            self.publish(in_progress=True)
+            self.throttle(len(rows))
+
+        if redis_done and sqlite_done:
+            self.publish(in_progress=False, duration=time.time() - started, completed=True)
+            print(f"[INTEGRITY] Pass complete in {time.time() - started:.1f}s: {self.counts}")
+        else:
+            self.publish(in_progress=False)
+            print(f"[INTEGRITY] Pass stopped after {time.time() - started:.1f}s: {self.counts}")
+
+    def throttle(self, checked: int):
+        """Sleep long enough to keep within the keys-per-second budget"""
+        if checked and self.keys_per_second > 0:
+            self.stopped.wait(checked / self.keys_per_second)
+
+    def check_redis_slice(self, keys: List[str]):
+        """Check one SCAN slice of entry hashes and plate sets"""
+        redis_client = self.db_manager.redis_client
+        entry_ids = [key.split(':', 1)[1] for key in keys if key.startswith('entry:')]
+        plate_keys = [key for key in keys if key.startswith('entries:')]
+
+        if entry_ids:
+            pipe = redis_client.pipeline(transaction=False)
+            for entry_id in entry_ids:
+                pipe.hgetall(f"entry:{entry_id}")
+            entries = dict(zip(entry_ids, pipe.execute()))
+
+            # Each entry must be a member of its plate's set
+            pipe = redis_client.pipeline(transaction=False)
+            checked = [(entry_id, data) for entry_id, data in entries.items() if data.get('plate_number')]
+            for entry_id, data in checked:
+                pipe.sismember(f"entries:{data['plate_number']}", entry_id)
+            for (entry_id, data), is_member in zip(checked, pipe.execute()):
+                if not is_member:
+                    self.counts['orphaned_entries'] += 1
+                    if self.repair:
+                        redis_client.sadd(f"entries:{data['plate_number']}", entry_id)
+                        self.counts['repaired'] += 1
+
+            self.compare_with_sqlite(entries)
+
+        for plate_key in plate_keys:
+            members = list(redis_client.smembers(plate_key))
+            pipe = redis_client.pipeline(transaction=False)
+            for entry_id in members:
+                pipe.exists(f"entry:{entry_id}")
+            for entry_id, exists in zip(members, pipe.execute()):
+                if exists and entry_id.isdigit():
+                    continue
+                self.counts['dangling_members'] += 1
+                if self.repair:
+                    # Restore the hash from SQLite if it is there, else drop the member;
+                    # a member that is not an entry id can only be dropped
+                    if not entry_id.isdigit() or not self.db_manager.get_entry(int(entry_id)):
+                        redis_client.srem(plate_key, entry_id)
+                    self.counts['repaired'] += 1
+
+    def compare_with_sqlite(self, entries: Dict[str, Dict]):
+        """Compare a slice of Redis entries with their SQLite rows"""
+        connection = self.db_manager.sqlite_connection
+        if not connection or not entries:
+            return
+
+        ids = [int(entry_id) for entry_id in entries]
+        cursor = connection.cursor()
+        cursor.execute(
+            f"SELECT id, plate_number, payment_status, exit_status FROM entries "
+            f"WHERE id IN ({','.join('?' * len(ids))})", ids)
+        rows = {row[0]: row for row in cursor.fetchall()}
+        cursor.close()
+
+        for entry_id, data in entries.items():
+            row = rows.get(int(entry_id))
+            if row is None:
+                self.counts['missing_in_sqlite'] += 1
+            elif (row[1] != data.get('plate_number') or
+                  str(row[2]) != data.get('payment_status', '0') or
+                  str(row[3]) != data.get('exit_status', '0')):
+                self.counts['status_mismatches'] += 1
+            else:
+                continue
+
+            if self.repair and self.is_complete(data):
+                if self.db_manager.write_entry(int(entry_id), data):
+                    self.counts['repaired'] += 1
+
+    def fetch_sqlite_slice(self, last_id: int) -> List[tuple]:
+        """Next range of SQLite entry ids after last_id"""
+        cursor = self.db_manager.sqlite_connection.cursor()
+        cursor.execute("SELECT id FROM entries WHERE id > ? ORDER BY id LIMIT ?", (last_id, self.slice_size))
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+
+    def check_sqlite_slice(self, rows: List[tuple]):
+        """Find SQLite entries that have no Redis hash"""
+        pipe = self.db_manager.redis_client.pipeline(transaction=False)
+        for row in rows:
+            pipe.exists(f"entry:{row[0]}")
+        for row, exists in zip(rows, pipe.execute()):
+            if not exists:
+                self.counts['missing_in_redis'] += 1
+                if self.repair:
+                    # get_entry falls back to SQLite and caches the row in Redis
+                    if self.db_manager.get_entry(row[0]):
+                        self.counts['repaired'] += 1
+
+    @staticmethod
+    def is_complete(data: Dict) -> bool:
+        """write_entry needs every field of the entry hash"""
+        return all(field in data for field in (
+            'plate_number', 'entry_timestamp', 'payment_status', 'exit_status',
+            'exit_timestamp', 'charge_amount', 'payment_timestamp'))
+
+    def publish(self, in_progress: bool, duration: Optional[float] = None, completed: bool = False):
+        """Write the running counts, and the totals of a pass that completed, to Redis"""
+        report = {f"current_{name}": value for name, value in self.counts.items()}
+        report['in_progress'] = int(in_progress)
+        report['repair_enabled'] = int(self.repair)
+        report['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        if completed:
+            report.update(self.counts)
+            report['last_pass_completed'] = report['updated_at']
+            report['last_pass_seconds'] = round(duration or 0, 2)
+
+        self.db_manager.redis_client.hset(self.REPORT_KEY, mapping=report)
+
+    @classmethod
+    def read_report(cls, redis_client) -> Dict:
+        """Latest report as ints where possible; O(1) for health checks"""
+        report = {}
+        for name, value in redis_client.hgetall(cls.REPORT_KEY).items():
+            try:
+                report[name] = int(value)
+            except ValueError:
+                try:
+                    report[name] = float(value)
+                except ValueError:
+                    report[name] = value
+        return report
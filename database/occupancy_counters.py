@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# Entry hash fields the counters depend on
+FIELDS = ('payment_status', 'exit_status', 'charge_amount')
+
+
+def contribution(payment_status: Optional[str], exit_status: Optional[str],
+                 charge_amount: Optional[str]) -> Tuple[int, int, float]:
+    """(inside, unpaid, revenue) one entry hash adds to the counters; nothing for a missing hash"""
+    if payment_status is None and exit_status is None and charge_amount is None:
+        return 0, 0, 0.0
+    if (payment_status or '0') == '0':
+        return 1, 1, 0.0
+    if payment_status != '1':
+        return 0, 0, 0.0
+    try:
+        revenue = float(charge_amount or 0)
+    except (ValueError, TypeError):
+        revenue = 0.0
+    return int((exit_status or '0') == '0'), 0, revenue
+
+
+class OccupancyCounters:
+    """Running totals of cars inside, unpaid entries and revenue over the Redis entry hashes.
+
+    Every write of an entry hash passes its fields before and after the
+    write to changed(), which applies the difference, so repairs and
+    repeated writes never count twice. Reading the totals is one HGETALL
+    however many entries exist. The hash is only trusted once rebuild() has
+    seeded it from a SCAN and marked it complete; until then read() returns
+    None.
+    """
+
+    KEY = 'occupancy:counters'
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    def state(self, key: str) -> List[Optional[str]]:
+        """The counted fields of an entry hash, before a write"""
+        return self.redis_client.hmget(key, FIELDS)
+
+    def changed(self, before: Sequence[Optional[str]], written: Dict[str, str]):
+        """Apply a write of `written` over an entry hash whose fields were `before`"""
+        after = [written.get(field, value) for field, value in zip(FIELDS, before)]
+        old, new = contribution(*before), contribution(*after)
+        if old == new:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hincrby(self.KEY, 'inside', new[0] - old[0])
+        pipe.hincrby(self.KEY, 'unpaid', new[1] - old[1])
+        pipe.hincrbyfloat(self.KEY, 'revenue', new[2] - old[2])
+        pipe.execute()
+
+    def read(self) -> Optional[Dict[str, float]]:
+        """Current totals in the dashboard's statistics keys; None until seeded"""
+        counters = self.redis_client.hgetall(self.KEY)
+        if not counters.get('complete'):
+            return None
+        return {
+            'cars_inside': int(counters.get('inside', 0)),
+            'unpaid_entries': int(counters.get('unpaid', 0)),
+            'total_revenue': float(counters.get('revenue', 0)),
+        }
+
+    def rebuild(self) -> Dict[str, float]:
+        """Seed the totals from one SCAN of the entry hashes.
+
+        Writes that land during the scan may be missed; delete KEY to have
+        the next reader rebuild it.
+        """
+        keys = list(self.redis_client.scan_iter('entry:*', count=500))
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hmget(key, FIELDS)
+
+        inside = unpaid = 0
+        revenue = 0.0
+        for fields in pipe.execute():
+            entry_inside, entry_unpaid, entry_revenue = contribution(*fields)
+            inside += entry_inside
+            unpaid += entry_unpaid
+            revenue += entry_revenue
+
+        self.redis_client.hset(self.KEY, mapping={'inside': inside, 'unpaid': unpaid, 'revenue': revenue,
+                                                  'complete': 1})
+        return {'cars_inside': inside, 'unpaid_entries': unpaid, 'total_revenue': revenue}
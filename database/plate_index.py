@@ -0,0 +1,136 @@
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+MAX_PAGE_SIZE = 100
+MAX_MATCHED_PLATES = 50
+
+# Sessions of the matched plates, newest first, paged by id (keyset pagination)
+SESSIONS_QUERY = """
+    SELECT id, plate_number, entry_timestamp, exit_timestamp,
+           payment_status, exit_status, charge_amount
+    FROM entries
+    WHERE plate_number IN ({placeholders}) AND id < ?
+    ORDER BY id DESC
+    LIMIT ?
+"""
+
+
+def normalize_plate(text: str) -> str:
+    """Upper-case alphanumerics only, the form plates are indexed under"""
+    return re.sub(r'[^A-Z0-9]', '', (text or '').upper())
+
+
+class PlateIndex:
+    """Substring index of every plate ever seen, in a Redis sorted set.
+
+    Each plate is stored once per suffix as "<suffix>\\x00<plate>" with score
+    0, so ZRANGEBYLEX over the range starting at a query returns every plate
+    containing it: a prefix of some suffix is a substring of the plate. A
+    lookup is O(log n + matches) however many plates and sessions exist, and
+    the matched plates' sessions are then read from SQLite through the plate
+    index on the entries table.
+    """
+
+    KEY = 'plates:index'
+    SEPARATOR = '\x00'
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    def members(self, plate: str) -> Dict[str, int]:
+        # Suffixes are normalized; the plate is kept as stored so SQLite matches it exactly
+        normalized = normalize_plate(plate)
+        return {f"{normalized[i:]}{self.SEPARATOR}{plate}": 0 for i in range(len(normalized))}
+
+    def add(self, plate: str, pipe=None):
+        """Index a plate; cheap to repeat for plates already indexed"""
+        members = self.members(plate)
+        if members:
+            (pipe or self.redis_client).zadd(self.KEY, members)
+
+    def exists(self) -> bool:
+        return bool(self.redis_client.exists(self.KEY))
+
+    def rebuild(self, connection, batch_size: int = 5000) -> int:
+        """Index every distinct plate in the SQLite history"""
+        cursor = connection.cursor()
+        cursor.execute("SELECT DISTINCT plate_number FROM entries")
+
+        indexed = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            pipe = self.redis_client.pipeline(transaction=False)
+            for (plate,) in rows:
+                self.add(plate, pipe)
+            pipe.execute()
+            indexed += len(rows)
+
+        cursor.close()
+        print(f"[PLATE INDEX] Indexed {indexed} plates")
+        return indexed
+
+    def match(self, query: str, limit: int = MAX_MATCHED_PLATES) -> List[str]:
+        """Plates containing the query, prefix matches first"""
+        query = normalize_plate(query)
+        if not query:
+            return []
+
+        # A plate can contain the query more than once, so read a little extra
+        members = self.redis_client.zrangebylex(self.KEY, f"[{query}", f"[{query}\xff", start=0, num=limit * 4)
+
+        plates = []
+        for member in members:
+            plate = member.split(self.SEPARATOR, 1)[1]
+            if plate not in plates:
+                plates.append(plate)
+
+        plates.sort(key=lambda plate: (not normalize_plate(plate).startswith(query), plate))
+        return plates[:limit]
+
+    def search(self, connection, query: str, limit: int = 20, before: Optional[int] = None) -> Dict:
+        """Recent sessions of plates matching the query, one page at a time.
+
+        Pass the returned next_before as before to get the following page.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        plates = self.match(query)
+        result = {'query': normalize_plate(query), 'plates': plates, 'sessions': [], 'next_before': None}
+        if not plates:
+            return result
+
+        cursor = connection.cursor()
+        cursor.execute(SESSIONS_QUERY.format(placeholders=','.join('?' * len(plates))),
+                       (*plates, before if before is not None else 2 ** 63 - 1, limit))
+        rows = cursor.fetchall()
+        cursor.close()
+
+        result['sessions'] = [self.format_session(row) for row in rows]
+        if len(rows) == limit:
+            result['next_before'] = rows[-1][0]
+        return result
+
+    @staticmethod
+    def format_session(row) -> Dict:
+        entry_id, plate, entry_time, exit_time, payment_status, exit_status, charge = row
+
+        duration = "N/A"
+        if exit_status == 1 and entry_time and exit_time:
+            try:
+                duration = str(datetime.fromisoformat(str(exit_time)) - datetime.fromisoformat(str(entry_time)))
+            except ValueError:
+                pass
+
+        return {
+            'id': entry_id,
+            'plate': plate,
+            'entry_time': str(entry_time)[:19] if entry_time else 'Unknown',
+            'exit_time': str(exit_time)[:19] if exit_time else 'Not exited',
+            'payment_status': 'Paid' if payment_status == 1 else 'Unpaid',
+            'exit_status': 'Exited' if exit_status == 1 else 'Inside',
+            'charge': charge if charge is not None else 'Not calculated',
+            'duration': duration
+        }
@@ -0,0 +1,226 @@
+import os
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+try:
+    import onnxruntime
+except ImportError:  # The optimized runtime is optional; detection falls back to ultralytics
+    onnxruntime = None
+
+
+DETECTOR_BACKEND = os.environ.get('PARKING_DETECTOR', 'auto')  # auto, onnx or ultralytics
+DETECTOR_INT8 = os.environ.get('PARKING_DETECTOR_INT8', '0') == '1'
+DETECTOR_THREADS = int(os.environ.get('PARKING_DETECTOR_THREADS', os.cpu_count() or 1))
+CALIBRATION_IMAGES = os.environ.get('PARKING_DETECTOR_CALIBRATION')  # Frames for static int8 quantization
+
+IMAGE_SIZE = 640            # Model input side, as trained; an (height, width) pair for a rectangular input
+CONFIDENCE_THRESHOLD = 0.25
+NMS_IOU = 0.45
+LETTERBOX_COLOR = 114       # Padding grey used by ultralytics
+
+Box = Tuple[int, int, int, int]
+
+
+def input_size(image_size: Union[int, Tuple[int, int]]) -> Tuple[int, int]:
+    """(height, width) of a square side or (height, width) model input"""
+    return (image_size, image_size) if isinstance(image_size, int) else tuple(image_size)
+
+
+class UltralyticsDetector:
+    """The PyTorch plate model run through ultralytics; the reference backend"""
+
+    name = 'ultralytics'
+
+    def __init__(self, weights: str, threads: int = DETECTOR_THREADS,
+                 image_size: Union[int, Tuple[int, int]] = IMAGE_SIZE):
+        # Imported here so OCR worker processes never load torch
+        import torch
+        from ultralytics import YOLO
+        torch.set_num_threads(threads)
+        self.model = YOLO(weights)
+        self.image_size = list(input_size(image_size))
+
+    def detect(self, image) -> List[Tuple[Box, float]]:
+        """(x1, y1, x2, y2) box and confidence of every plate in a BGR frame"""
+        return self.detect_batch([image])[0]
+
+    def detect_batch(self, images) -> List[List[Tuple[Box, float]]]:
+        """Detections for each of several frames, run as one batch"""
+        results = self.model(list(images), imgsz=self.image_size, conf=CONFIDENCE_THRESHOLD, iou=NMS_IOU,
+                             verbose=False)
+        return [[(tuple(int(v) for v in box.xyxy[0]), float(box.conf[0])) for box in result.boxes]
+                for result in results]
+
+
+class OnnxDetector:
+    """The plate model exported to ONNX and run by ONNX Runtime.
+
+    Preprocessing (letterbox, BGR to RGB, 0-1 scaling) and box decoding with
+    NMS are done here in numpy and OpenCV, so no torch is loaded. The
+    session runs with every graph optimisation on, sequential execution and
+    `threads` intra-op threads. The OpenVINO execution provider is used when
+    the installed onnxruntime has it, else the default CPU provider. A
+    model exported with dynamic axes runs a batch of frames in one call, at
+    the given image_size; a fixed-shape model runs them one by one.
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model_path: str, threads: int = DETECTOR_THREADS,
+                 image_size: Union[int, Tuple[int, int]] = IMAGE_SIZE):
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        providers = [provider for provider in ('OpenVINOExecutionProvider', 'CPUExecutionProvider')
+                     if provider in onnxruntime.get_available_providers()]
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        batch, _, height, width = self.session.get_inputs()[0].shape
+        self.image_size = (height, width) if isinstance(height, int) and isinstance(width, int) \
+            else input_size(image_size)
+        self.batched = not isinstance(batch, int)
+        self.name = f"onnx{'-int8' if '.int8.' in os.path.basename(model_path) else ''}"
+
+    def preprocess(self, image) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        """Letterboxed NCHW float input, with the scale and padding to map boxes back"""
+        height, width = image.shape[:2]
+        input_height, input_width = self.image_size
+        scale = min(input_height / height, input_width / width)
+        resized_width, resized_height = round(width * scale), round(height * scale)
+        left, top = (input_width - resized_width) // 2, (input_height - resized_height) // 2
+
+        canvas = np.full((input_height, input_width, 3), LETTERBOX_COLOR, dtype=np.uint8)
+        canvas[top:top + resized_height, left:left + resized_width] = cv2.resize(
+            image, (resized_width, resized_height), interpolation=cv2.INTER_LINEAR)
+        blob = canvas[:, :, ::-1].transpose(2, 0, 1)[np.newaxis].astype(np.float32) / 255.0
+        return np.ascontiguousarray(blob), scale, (left, top)
+
+    def detect(self, image) -> List[Tuple[Box, float]]:
+        """(x1, y1, x2, y2) box and confidence of every plate in a BGR frame"""
+        return self.detect_batch([image])[0]
+
+    def detect_batch(self, images) -> List[List[Tuple[Box, float]]]:
+        """Detections for each of several frames, in one session run when the model takes batches"""
+        inputs = [self.preprocess(image) for image in images]
+        blobs = [blob for blob, _, _ in inputs]
+        if self.batched:
+            outputs = self.session.run(None, {self.input_name: np.concatenate(blobs)})[0]
+        else:
+            outputs = [self.session.run(None, {self.input_name: blob})[0][0] for blob in blobs]
+        return [self.decode(output, scale, padding, image.shape)
+                for output, (_, scale, padding), image in zip(outputs, inputs, images)]
+
+    def decode(self, output, scale: float, padding: Tuple[int, int], shape) -> List[Tuple[Box, float]]:
+        """Boxes in frame pixels from one image's model output, after NMS"""
+        # YOLOv8 output: (4 + classes, candidates) of centre x, y, width, height and class scores
+        predictions = output.T
+        scores = predictions[:, 4:].max(axis=1)
+        keep = scores >= CONFIDENCE_THRESHOLD
+        predictions, scores = predictions[keep], scores[keep]
+        if not len(scores):
+            return []
+
+        centres, sizes = predictions[:, :2], predictions[:, 2:4]
+        corners = (centres - sizes / 2 - padding) / scale
+        boxes = np.hstack([corners, sizes / scale])
+        indices = cv2.dnn.NMSBoxes(boxes.tolist(), scores.tolist(), CONFIDENCE_THRESHOLD, NMS_IOU)
+
+        height, width = shape[:2]
+        detections = []
+        for index in np.array(indices).flatten():
+            x, y, w, h = boxes[index]
+            box = (max(0, int(x)), max(0, int(y)), min(width, int(x + w)), min(height, int(y + h)))
+            detections.append((box, float(scores[index])))
+        return detections
+
+
+def export_onnx(weights: str, image_size: Union[int, Tuple[int, int]] = IMAGE_SIZE, dynamic: bool = False) -> str:
+    """best.pt -> best.onnx next to it, exported once with a fixed input size.
+
+    Other input sizes than the trained one are kept side by side, e.g.
+    best-320x128.onnx. dynamic exports best-dynamic.onnx, whose batch and
+    image axes are free, for batches of frames from several lanes.
+    """
+    height, width = input_size(image_size)
+    base = os.path.splitext(weights)[0]
+    if dynamic:
+        onnx_path = base + '-dynamic.onnx'
+    else:
+        onnx_path = base + ('' if (height, width) == input_size(IMAGE_SIZE) else f'-{width}x{height}') + '.onnx'
+    if not os.path.exists(onnx_path) or os.path.getmtime(onnx_path) < os.path.getmtime(weights):
+        from ultralytics import YOLO
+        print(f"[DETECTOR] Exporting {weights} to ONNX at {width}x{height}{' with dynamic axes' if dynamic else ''}")
+        exported = YOLO(weights).export(format='onnx', imgsz=[height, width], dynamic=dynamic, simplify=True)
+        if os.path.abspath(exported) != os.path.abspath(onnx_path):
+            os.replace(exported, onnx_path)
+    return onnx_path
+
+
+class CalibrationFrames:
+    """Feeds lane frames from a folder to onnxruntime's static quantization"""
+
+    def __init__(self, detector: OnnxDetector, folder: str, limit: int = 100):
+        names = sorted(name for name in os.listdir(folder) if name.lower().endswith(('.jpg', '.jpeg', '.png')))
+        self.detector = detector
+        self.paths = iter(os.path.join(folder, name) for name in names[:limit])
+
+    def get_next(self):
+        for path in self.paths:
+            image = cv2.imread(path)
+            if image is not None:
+                return {self.detector.input_name: self.detector.preprocess(image)[0]}
+        return None
+
+
+def quantize_int8(onnx_path: str, calibration_images: Optional[str] = CALIBRATION_IMAGES) -> str:
+    """best.onnx -> best.int8.onnx.
+
+    With a folder of lane frames the activations are calibrated on them
+    (static QDQ quantization, the faster and more accurate option on CPU);
+    without one only the weights are quantized.
+    """
+    int8_path = os.path.splitext(onnx_path)[0] + '.int8.onnx'
+    if os.path.exists(int8_path) and os.path.getmtime(int8_path) >= os.path.getmtime(onnx_path):
+        return int8_path
+
+    from onnxruntime import quantization
+    print(f"[DETECTOR] Quantizing {onnx_path} to int8")
+    if calibration_images:
+        reader = CalibrationFrames(OnnxDetector(onnx_path), calibration_images)
+        quantization.quantize_static(onnx_path, int8_path, reader, quant_format=quantization.QuantFormat.QDQ,
+                                     activation_type=quantization.QuantType.QUInt8,
+                                     weight_type=quantization.QuantType.QInt8)
+    else:
+        quantization.quantize_dynamic(onnx_path, int8_path, weight_type=quantization.QuantType.QUInt8)
+    return int8_path
+
+
+def create_detector(weights: str, name: str = DETECTOR_BACKEND, int8: bool = DETECTOR_INT8,
+                    threads: int = DETECTOR_THREADS, image_size: Union[int, Tuple[int, int]] = IMAGE_SIZE,
+                    batched: bool = False):
+    """ONNX Runtime when available, exporting the weights on first use; otherwise ultralytics.
+
+    batched exports a model that takes several frames per run, for lanes
+    sharing one detector.
+    """
+    if name in ('auto', 'onnx'):
+        if onnxruntime is not None:
+            try:
+                model_path = weights if weights.endswith('.onnx') else export_onnx(weights, image_size, batched)
+                if int8:
+                    model_path = quantize_int8(model_path)
+                detector = OnnxDetector(model_path, threads, image_size)
+                print(f"[DETECTOR] Using ONNX Runtime on {model_path} ({threads} threads, "
+                      f"{detector.session.get_providers()[0]})")
+                return detector
+            except Exception as e:
+                print(f"[DETECTOR] ONNX Runtime failed to start: {e}")
+        elif name == 'onnx':
+            print("[DETECTOR] onnxruntime is not installed")
+
+    print(f"[DETECTOR] Using ultralytics on {weights}")
+    return UltralyticsDetector(weights, threads, image_size)
@@ -0,0 +1,349 @@
+"""One process running every lane of a site.
+
+    python lane/engine.py --config lanes.json [--headless]
+
+lanes.json lists the lanes, each with its policy (entry or exit), camera
+and Arduino:
+
+    {"lanes": [
+        {"name": "entry", "policy": "entry", "camera": 0, "role": "entry", "port": "/dev/ttyACM0"},
+        {"name": "exit", "policy": "exit", "camera": 1, "role": "exit", "port": "/dev/ttyACM1"}
+    ]}
+
+Lanes naming the same role share that Arduino and its distance readings.
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, List, Optional
+
+import cv2
+
+from connection.arduino_manager import ArduinoManager
+from database.db_manager import DatabaseManager
+from lane.detector import create_detector, input_size
+from lane.ocr_pool import OCR_WORKERS, OcrPool
+from lane.pipeline import LatestValue, StopPipeline
+from lane.plate_lane import Display, PlateLane
+from lane.policies import GATE_OPEN_SECONDS, POLICIES
+from lane.roi import LaneRoi, RoiDetector
+from monitoring import metrics
+from monitoring.lane_metrics import LaneRecorder
+
+
+MODEL_PATH = os.path.expanduser("../models/best.pt")
+
+BATCH_WINDOW = 0.005   # Seconds the detector waits for other lanes' frames before running a batch
+SENSOR_WAIT = 0.5      # Seconds a lane waits for a new distance reading before polling again
+
+DETECTION_BATCH = metrics.histogram('parking_detection_batch_size', 'Lane frames per detector run', (),
+                                    buckets=(1, 2, 3, 4, 6, 8))
+
+
+class LaneConfig:
+    """One lane of the engine: its policy, camera and Arduino"""
+
+    __slots__ = ('name', 'policy', 'camera', 'role', 'port', 'open_duration')
+
+    def __init__(self, name: str, policy: str, camera=0, role: str = 'entry_exit', port: Optional[str] = None,
+                 open_duration: int = GATE_OPEN_SECONDS):
+        if policy not in POLICIES:
+            raise ValueError(f"Lane {name}: unknown policy {policy!r}, expected one of {sorted(POLICIES)}")
+        self.name = name
+        self.policy = policy
+        self.camera = camera
+        self.role = role
+        self.port = port
+        self.open_duration = open_duration
+
+    @classmethod
+    def load_all(cls, path: str) -> List['LaneConfig']:
+        with open(path) as f:
+            config = json.load(f)
+        return [cls(**lane) for lane in config['lanes']]
+
+
+class SensorHub:
+    """One reader per Arduino role, shared by every lane on that role.
+
+    Lanes on the same Arduino no longer compete for its serial lines: a
+    single thread per role reads the distances, and each lane's
+    read_distance() returns the next reading it has not seen yet.
+    """
+
+    def __init__(self, arduino_manager: ArduinoManager, roles):
+        self.arduino_manager = arduino_manager
+        self.readings = {role: LatestValue() for role in roles}
+        self.sequence = {role: 0 for role in roles}
+        self.condition = threading.Condition()
+        self.stopped = threading.Event()
+        for role in roles:
+            threading.Thread(target=self.run, args=(role,), name=f"sensor-{role}", daemon=True).start()
+
+    def run(self, role: str):
+        while not self.stopped.is_set():
+            distance = self.arduino_manager.read_distance(role)
+            if distance is None:
+                time.sleep(0.05)  # Nothing on the serial line yet
+                continue
+            with self.condition:
+                self.readings[role].set(distance)
+                self.sequence[role] += 1
+                self.condition.notify_all()
+
+    def reader(self, role: str) -> Callable[[], Optional[float]]:
+        """A read_distance() for one lane"""
+        seen = [0]
+
+        def read_distance():
+            with self.condition:
+                self.condition.wait_for(lambda: self.sequence[role] != seen[0], SENSOR_WAIT)
+                if self.sequence[role] == seen[0]:
+                    return None
+                seen[0] = self.sequence[role]
+                return self.readings[role].get()
+        return read_distance
+
+    def stop(self):
+        self.stopped.set()
+
+
+class DetectionRequest:
+    __slots__ = ('image', 'done', 'result', 'error')
+
+    def __init__(self, image):
+        self.image = image
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class DetectionBatcher:
+    """One detector shared by all lanes, running frames that arrive together as one batch.
+
+    Each lane's detect stage calls detect() and blocks until its result is
+    ready. A single thread takes the first waiting frame, collects frames
+    from other lanes for up to BATCH_WINDOW, and passes them to the
+    detector's detect_batch in one run. Same detect() interface as a
+    detector, so RoiDetector can wrap it per lane. Once closed, waiting and
+    new calls raise StopPipeline instead of blocking their lane.
+    """
+
+    def __init__(self, detector, max_batch: int):
+        self.detector = detector
+        self.name = detector.name
+        self.image_size = detector.image_size
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name='detector', daemon=True)
+        self.thread.start()
+
+    def detect(self, image):
+        request = DetectionRequest(image)
+        with self.lock:
+            if self.closed:
+                raise StopPipeline
+            self.requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def collect(self) -> Optional[List[DetectionRequest]]:
+        """The next batch of requests; None once closed"""
+        first = self.requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + BATCH_WINDOW
+        while len(batch) < self.max_batch:
+            try:
+                request = self.requests.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if request is None:
+                self.requests.put(None)  # Close after this batch
+                break
+            batch.append(request)
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.collect()
+            if batch is None:
+                self.cancel_pending()
+                return
+            DETECTION_BATCH.observe(len(batch))
+            try:
+                results = self.detector.detect_batch([request.image for request in batch])
+                for request, result in zip(batch, results):
+                    request.result = result
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.done.set()
+
+    def cancel_pending(self):
+        """Release every lane still waiting; nothing is queued after close()"""
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                return
+            if request is not None:
+                request.error = StopPipeline()
+                request.done.set()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.requests.put(None)
+
+
+class LaneEngine:
+    """Hosts every configured lane in one process.
+
+    The lanes share one loaded plate model, run as batches across lanes
+    (DetectionBatcher), one OCR worker pool, one DatabaseManager and one
+    ArduinoManager with a single sensor reader per Arduino. Each lane keeps
+    its own camera, ROI, pipeline, tracker, recorder and entry or exit
+    policy. Adding a lane adds a camera and a few threads, not another
+    model, OCR pool or set of connections.
+    """
+
+    def __init__(self, configs: List[LaneConfig], weights: str = MODEL_PATH, service: str = 'lanes',
+                 display: bool = True, ocr_workers: int = OCR_WORKERS):
+        self.configs = configs
+        self.weights = weights
+        self.service = service
+        self.display = Display() if display else None
+        self.ocr_workers = ocr_workers
+        self.captures = {}
+        self.lanes: List[PlateLane] = []
+        self.db_manager = None
+        self.arduino_manager = None
+        self.sensors = None
+        self.batcher = None
+        self.ocr_pool = None
+        # Lanes decide on their own threads but share one SQLite connection and the entry id counter
+        self.decision_lock = threading.Lock()
+
+    def connect(self):
+        """Database, Arduinos and cameras; exits the process if a lane's hardware is missing"""
+        self.db_manager = DatabaseManager()
+        metrics.start_flusher(self.db_manager.redis_client, service=self.service)
+
+        ports = {config.role: config.port for config in self.configs if config.port}
+        self.arduino_manager = ArduinoManager()
+        self.arduino_manager.detect_arduino_ports()
+        self.arduino_manager.assign_roles(list(dict.fromkeys(config.role for config in self.configs)),
+                                          ports or None)
+        for role in dict.fromkeys(config.role for config in self.configs):
+            if not self.arduino_manager.connect_arduino(role):
+                print("[SYSTEM] Terminating program - Arduino connection required.")
+                sys.exit(1)
+        self.sensors = SensorHub(self.arduino_manager, dict.fromkeys(config.role for config in self.configs))
+
+        for config in self.configs:
+            capture = cv2.VideoCapture(config.camera)
+            if not capture.isOpened():
+                print(f"[ERROR] Failed to open the {config.name} camera ({config.camera})")
+                sys.exit(1)
+            self.captures[config.name] = capture
+
+    def build(self):
+        """One shared detector and OCR pool, and a PlateLane per config"""
+        rois, sizes = {}, []
+        for config in self.configs:
+            capture = self.captures[config.name]
+            width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or 640
+            height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 480
+            rois[config.name] = LaneRoi.from_env(config.name)
+            sizes.append(rois[config.name].detection_size(width, height))
+
+        # One input size fits every lane's ROI band, so frames of all lanes batch together
+        image_size = (max(size[0] for size in sizes), max(size[1] for size in sizes))
+        batched = len(self.configs) > 1
+        detector = create_detector(self.weights, image_size=image_size, batched=batched)
+        self.batcher = DetectionBatcher(detector, max_batch=len(self.configs))
+        height, width = input_size(image_size)
+        print(f"[ENGINE] {len(self.configs)} lane(s) sharing one {detector.name} detector at {width}x{height}")
+
+        self.ocr_pool = OcrPool(self.ocr_workers) if self.ocr_workers > 0 else None
+        for config in self.configs:
+            recorder = LaneRecorder(self.db_manager.redis_client, config.name)
+            policy = POLICIES[config.policy](config.name, self.db_manager, self.arduino_manager, recorder,
+                                             config.role, config.open_duration)
+            self.lanes.append(PlateLane(config.name, self.captures[config.name], self.sensors.reader(config.role),
+                                        RoiDetector(self.batcher, rois[config.name]), self.serialised(policy.decide),
+                                        recorder=recorder, display=self.display, ocr_workers=0,
+                                        ocr_pool=self.ocr_pool))
+
+    def serialised(self, decide: Callable[[str], None]) -> Callable[[str], None]:
+        """decide, run one lane at a time"""
+        def run(plate):
+            with self.decision_lock:
+                decide(plate)
+        return run
+
+    def run(self):
+        """Start every lane and serve the windows until 'q', Ctrl+C or all lanes stop"""
+        try:
+            self.connect()
+            self.build()
+            print(f"[ENGINE] Ready: {', '.join(f'{c.name} ({c.policy})' for c in self.configs)}. Press 'q' to exit.")
+            for lane in self.lanes:
+                lane.start()
+            while not all(lane.stopped for lane in self.lanes):
+                if self.display:
+                    if self.display.render(30) == ord('q'):
+                        break
+                else:
+                    time.sleep(0.5)
+
+        except KeyboardInterrupt:
+            print("\n[SYSTEM] Program interrupted by user")
+        except Exception as e:
+            print(f"[ERROR] Unexpected error: {e}")
+        finally:
+            self.stop()
+
+    def stop(self):
+        print("[SYSTEM] Cleaning up...")
+        for lane in self.lanes:
+            lane.stop()
+        if self.batcher:
+            self.batcher.close()
+        if self.ocr_pool:
+            self.ocr_pool.close()
+        if self.sensors:
+            self.sensors.stop()
+        for capture in self.captures.values():
+            capture.release()
+        if self.arduino_manager:
+            self.arduino_manager.close_all_connections()
+        if self.display:
+            cv2.destroyAllWindows()
+        print("[SYSTEM] Program terminated")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--config', required=True, help='JSON file listing the lanes')
+    parser.add_argument('--weights', default=MODEL_PATH, help='YOLO weights')
+    parser.add_argument('--headless', action='store_true', help='No windows; idle lanes only grab frames')
+    return parser.parse_args()
+
+
+# OCR worker processes re-import the main script, so the engine only starts when run directly
+if __name__ == '__main__':
+    args = parse_args()
+    LaneEngine(LaneConfig.load_all(args.config), args.weights, display=not args.headless).run()
@@ -0,0 +1,82 @@
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from monitoring import metrics
+
+
+DETECTION_DISTANCE = 50  # Ultrasonic reading (cm) under which a car is at the gate
+
+# Frame differencing runs on a small grayscale copy of the frame
+MOTION_SIZE = (160, 120)
+PIXEL_THRESHOLD = 25     # Grey-level change for a pixel to count as changed
+MOTION_THRESHOLD = 0.01  # Share of changed pixels for the frame to count as motion
+
+# A still scene whose plate is not yet read is re-checked at this interval,
+# for a car that pulled up and stopped before it was recognised
+STATIC_INTERVAL = 0.5
+
+GATED_FRAMES = metrics.counter('parking_lane_gated_frames_total', 'Camera frames by detection gate outcome',
+                               ('lane', 'outcome'))
+
+
+def vehicle_present(distance: Optional[float]) -> bool:
+    return distance is not None and distance <= DETECTION_DISTANCE
+
+
+class DetectionGate:
+    """Chooses the frames worth running plate detection on.
+
+    Outcomes, checked in order:
+    - no_vehicle: the ultrasonic sensor sees no car at the gate
+    - detect: the frame differs from the previous one, so the car is
+      arriving, moving or leaving
+    - confirmed: a still car whose plate was already decided
+    - static: a still car not yet recognised; one frame every
+      STATIC_INTERVAL is still passed on as detect
+    Motion is measured by differencing a 160x120 grayscale copy of
+    consecutive frames, a fraction of a millisecond per frame. Any motion
+    or an empty gate clears the confirmed state for the next car.
+    """
+
+    def __init__(self, lane: str):
+        self.lane = lane
+        self.previous = None
+        self.confirmed = False
+        self.last_detection = 0.0
+
+    def motion(self, image) -> float:
+        """Share of pixels that changed since the previous frame"""
+        small = cv2.cvtColor(cv2.resize(image, MOTION_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        previous, self.previous = self.previous, small
+        if previous is None:
+            return 1.0
+        return np.count_nonzero(cv2.absdiff(small, previous) > PIXEL_THRESHOLD) / small.size
+
+    def check(self, image, distance: Optional[float], now: Optional[float] = None) -> str:
+        """Gate outcome for a frame; only 'detect' frames go on to detection"""
+        now = now or time.monotonic()
+        if not vehicle_present(distance):
+            self.previous = None
+            self.confirmed = False
+            outcome = 'no_vehicle'
+        elif self.motion(image) >= MOTION_THRESHOLD:
+            self.confirmed = False
+            outcome = 'detect'
+        elif self.confirmed:
+            outcome = 'confirmed'
+        elif now - self.last_detection >= STATIC_INTERVAL:
+            outcome = 'detect'
+        else:
+            outcome = 'static'
+
+        if outcome == 'detect':
+            self.last_detection = now
+        GATED_FRAMES.inc(lane=self.lane, outcome=outcome)
+        return outcome
+
+    def confirm(self):
+        """The car in view has been decided; skip its frames until the scene changes"""
+        self.confirmed = True
@@ -0,0 +1,141 @@
+import os
+import queue
+import re
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # The in-process engine is optional; OCR falls back to the tesseract binary
+    tesserocr = None
+
+
+# Point pytesseract at the system binary on linux
+pytesseract.pytesseract.tesseract_cmd = '/usr/bin/tesseract'
+
+PLATE_PATTERN = re.compile(r'([A-Z]{3}\d{3}[A-Z])')
+PLATE_CHARACTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+TESSERACT_CONFIG = f'--psm 8 --oem 3 -c tessedit_char_whitelist={PLATE_CHARACTERS}'
+
+OCR_BACKEND = os.environ.get('PARKING_OCR_BACKEND', 'auto')  # auto, tesserocr or pytesseract
+TESSDATA_PATH = os.environ.get('TESSDATA_PREFIX')  # Unset uses the library's compiled-in path
+
+
+class PytesseractBackend:
+    """OCR through the tesseract binary.
+
+    Always available, but every read starts a tesseract process and loads
+    the language model from disk before recognising anything.
+    """
+
+    name = 'pytesseract'
+
+    def read(self, image) -> str:
+        return self.recognize(image)[0]
+
+    def recognize(self, image) -> Tuple[str, List[float]]:
+        """Text without spaces and a 0-1 confidence per character.
+
+        The binary reports confidence per word only, so each character gets
+        the confidence of its word.
+        """
+        data = pytesseract.image_to_data(image, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+        text, confidences = [], []
+        for word, confidence in zip(data['text'], data['conf']):
+            word = word.replace(' ', '')
+            if word and float(confidence) >= 0:
+                text.append(word)
+                confidences.extend([float(confidence) / 100] * len(word))
+        return ''.join(text), confidences
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """OCR through long-lived in-process Tesseract API handles.
+
+    Each handle loads the language model once and keeps the single-word
+    page segmentation and the plate character whitelist set, so a read is
+    only the recognition itself. Handles are not thread-safe; the pool of
+    pool_size handles is shared by the calling threads, each borrowing one
+    per read.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, pool_size: int = 1):
+        self.handles = queue.Queue()
+        options = {'path': TESSDATA_PATH} if TESSDATA_PATH else {}
+        for _ in range(pool_size):
+            api = tesserocr.PyTessBaseAPI(lang='eng', psm=tesserocr.PSM.SINGLE_WORD, oem=tesserocr.OEM.DEFAULT,
+                                          **options)
+            api.SetVariable('tessedit_char_whitelist', PLATE_CHARACTERS)
+            self.handles.put(api)
+
+    def read(self, image) -> str:
+        return self.recognize(image)[0]
+
+    def recognize(self, image) -> Tuple[str, List[float]]:
+        """Text without spaces and Tesseract's 0-1 confidence for each character"""
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+
+        api = self.handles.get()
+        try:
+            api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+            api.Recognize()
+            text, confidences = [], []
+            level = tesserocr.RIL.SYMBOL
+            for symbol in tesserocr.iterate_level(api.GetIterator(), level):
+                character = (symbol.GetUTF8Text(level) or '').strip()
+                if character:
+                    text.append(character)
+                    confidences.extend([symbol.Confidence(level) / 100] * len(character))
+            return ''.join(text), confidences
+        finally:
+            self.handles.put(api)
+
+    def close(self):
+        while not self.handles.empty():
+            self.handles.get_nowait().End()
+
+
+def create_ocr_backend(name: str = OCR_BACKEND, pool_size: int = 1):
+    """The in-process engine when available, otherwise the tesseract binary"""
+    if name in ('auto', 'tesserocr'):
+        if tesserocr is not None:
+            try:
+                backend = TesserocrBackend(pool_size)
+                print(f"[OCR] Using in-process Tesseract ({pool_size} handle{'s' if pool_size > 1 else ''})")
+                return backend
+            except RuntimeError as e:
+                print(f"[OCR] In-process Tesseract failed to start: {e}")
+        elif name == 'tesserocr':
+            print("[OCR] tesserocr is not installed")
+
+    print("[OCR] Using the tesseract binary")
+    return PytesseractBackend()
+
+
+def binarize(crop):
+    """Grayscale, blur and Otsu threshold a plate crop for OCR"""
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    return cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def read_plate(ocr, image) -> Tuple[Optional[str], float]:
+    """OCR a binarized crop; (plate, confidence) if the text matches the plate pattern, else (None, 0.0).
+
+    The confidence is that of the plate's least certain character, 0-1.
+    """
+    text, confidences = ocr.recognize(image)
+    match = PLATE_PATTERN.search(text)
+    if not match:
+        return None, 0.0
+    return match.group(1), min(confidences[match.start(1):match.end(1)])
@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from lane.ocr import OCR_BACKEND, binarize, create_ocr_backend, read_plate
+
+
+# OCR worker processes per pool, shared by every lane of a lane engine; 0 keeps OCR on each lane's own thread
+OCR_WORKERS = int(os.environ.get('PARKING_OCR_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+
+SLOTS_PER_WORKER = 2
+SLOT_BYTES = 1024 * 1024  # Fits a 640x480 BGR crop; larger crops are pickled instead
+
+# Per worker process, set by init_worker
+worker_slots = []
+worker_backend = None
+
+
+def init_worker(slot_names: List[str], backend_name: str):
+    """Attach the shared crop slots and start one OCR engine per worker"""
+    global worker_slots, worker_backend
+    worker_slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    worker_backend = create_ocr_backend(backend_name)
+
+
+def ocr_crop(slot: Optional[int], shape: Tuple[int, ...], crop=None) -> Tuple[Optional[str], float, float]:
+    """Binarize and read one crop in a worker; (plate or None, OCR confidence, seconds)"""
+    started = time.perf_counter()
+    if crop is None:
+        crop = np.ndarray(shape, dtype=np.uint8, buffer=worker_slots[slot].buf)
+    plate, confidence = read_plate(worker_backend, binarize(crop))
+    return plate, confidence, time.perf_counter() - started
+
+
+class OcrPool:
+    """Reads all plate crops of a frame in parallel worker processes.
+
+    Preprocessing and OCR run in separate processes, so several crops
+    proceed at once without contending for the GIL. Each worker keeps its
+    own OCR engine. Crops are copied into preallocated shared-memory slots,
+    and only the slot number and shape cross the process boundary, so no
+    pixels are pickled. Results come back in the order of the crops.
+    """
+
+    def __init__(self, workers: int = OCR_WORKERS, backend: str = OCR_BACKEND):
+        self.workers = workers
+        self.backend = backend
+        self.slots = [shared_memory.SharedMemory(create=True, size=SLOT_BYTES)
+                      for _ in range(workers * SLOTS_PER_WORKER)]
+        self.free_slots = queue.Queue()
+        for index in range(len(self.slots)):
+            self.free_slots.put(index)
+        self.restart_lock = threading.Lock()
+        self.executor = self.start_executor()
+
+    def start_executor(self) -> ProcessPoolExecutor:
+        # Spawned, not forked: the lane process runs camera and pipeline threads
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=init_worker,
+                                   initargs=([slot.name for slot in self.slots], self.backend))
+
+    def submit(self, crop):
+        if crop.dtype != np.uint8 or crop.nbytes > SLOT_BYTES:
+            return self.executor.submit(ocr_crop, None, crop.shape, np.ascontiguousarray(crop))
+
+        # Blocks only if more crops are in flight than there are slots
+        slot = self.free_slots.get()
+        np.ndarray(crop.shape, dtype=np.uint8, buffer=self.slots[slot].buf)[...] = crop
+        try:
+            future = self.executor.submit(ocr_crop, slot, crop.shape)
+        except Exception:
+            self.free_slots.put(slot)
+            raise
+        future.add_done_callback(lambda _: self.free_slots.put(slot))
+        return future
+
+    def read_all(self, crops) -> List[Tuple[Optional[str], float, float]]:
+        """(plate or None, OCR confidence, OCR seconds) for each crop, in order; safe to call from several lanes"""
+        executor = self.executor
+        try:
+            futures = [self.submit(crop) for crop in crops]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A worker died (e.g. a native crash in Tesseract); start fresh workers for the next frame
+            with self.restart_lock:
+                if self.executor is executor:  # Another lane may have restarted it already
+                    print("[OCR] Worker pool broke; restarting it")
+                    self.executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = self.start_executor()
+            return [(None, 0.0, 0.0)] * len(crops)
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for slot in self.slots:
+            slot.close()
+            slot.unlink()
@@ -0,0 +1,212 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from monitoring import metrics
+
+
+STAGE_ITEMS = metrics.counter('parking_lane_stage_items_total', 'Items processed by a lane pipeline stage',
+                              ('lane', 'stage'))
+STAGE_DROPS = metrics.counter('parking_lane_stage_drops_total',
+                              'Items discarded from a full stage queue, oldest first', ('lane', 'stage'))
+STAGE_SECONDS = metrics.histogram('parking_lane_stage_seconds', 'Processing time per item of a lane stage',
+                                  ('lane', 'stage'))
+
+REPORT_INTERVAL = 30  # Seconds between throughput lines in the lane log
+GET_TIMEOUT = 0.2     # How often idle stages check for shutdown
+
+
+class StopPipeline(Exception):
+    """Raised by a stage, e.g. the camera source, to shut the pipeline down"""
+
+
+class DropOldestQueue:
+    """Bounded FIFO that never blocks its producer.
+
+    When full, put() discards the oldest item to make room, so a slow
+    consumer always works on the freshest frames instead of a backlog.
+    """
+
+    def __init__(self, maxsize: int):
+        self.items = deque()
+        self.maxsize = maxsize
+        self.condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item) -> bool:
+        """Add an item; False if the oldest item was dropped to make room"""
+        with self.condition:
+            full = len(self.items) >= self.maxsize
+            if full:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+            return not full
+
+    def get(self, timeout: Optional[float] = None):
+        """Oldest item; raises queue.Empty if none arrives within timeout"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items, timeout):
+                raise queue.Empty
+            return self.items.popleft()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class LatestValue:
+    """Most recent value written by one thread and read by others"""
+
+    def __init__(self):
+        self.value = None
+        self.updated_at = 0.0
+
+    def set(self, value):
+        self.value, self.updated_at = value, time.monotonic()
+
+    def get(self, max_age: Optional[float] = None):
+        """The value, or None if it is older than max_age seconds"""
+        if max_age is not None and time.monotonic() - self.updated_at > max_age:
+            return None
+        return self.value
+
+
+class Stage:
+    """One pipeline step on its own thread.
+
+    The stage takes items from its inbox (a source stage has none), calls
+    work(item) and passes any result other than None to the next stage's
+    inbox. Exceptions are logged and the item is skipped, except
+    StopPipeline, which stops every stage.
+    """
+
+    def __init__(self, pipeline: 'LanePipeline', name: str, work: Callable, inbox: Optional[DropOldestQueue] = None):
+        self.pipeline = pipeline
+        self.name = name
+        self.work = work
+        self.inbox = inbox
+        self.outbox: Optional[DropOldestQueue] = None
+        self.next_name = None
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self.errors = 0
+        self.working = False
+        self.thread = threading.Thread(target=self.run, name=f"{pipeline.lane}-{name}", daemon=True)
+
+    def run(self):
+        lane = self.pipeline.lane
+        while not self.pipeline.stopped.is_set():
+            item = None
+            if self.inbox is not None:
+                try:
+                    item = self.inbox.get(timeout=GET_TIMEOUT)
+                except queue.Empty:
+                    continue
+
+            started = time.perf_counter()
+            self.working = True
+            try:
+                result = self.work(item)
+            except StopPipeline:
+                self.pipeline.stop()
+                break
+            except Exception as e:
+                self.working = False
+                self.errors += 1
+                print(f"[PIPELINE] {lane} {self.name} failed: {e}")
+                if self.inbox is None:
+                    self.pipeline.stopped.wait(GET_TIMEOUT)  # A failing source would otherwise spin
+                continue
+
+            elapsed = time.perf_counter() - started
+            self.processed += 1
+            self.busy_seconds += elapsed
+            STAGE_ITEMS.inc(lane=lane, stage=self.name)
+            STAGE_SECONDS.observe(elapsed, lane=lane, stage=self.name)
+
+            if result is not None and self.outbox is not None and not self.outbox.put(result):
+                STAGE_DROPS.inc(lane=lane, stage=self.next_name)
+            self.working = False  # Only after the result is queued, so idle() never misses it
+
+
+class LanePipeline:
+    """Chain of stages connected by bounded drop-oldest queues.
+
+    Each stage runs on its own thread, so a slow stage (OCR, a Redis round
+    trip, a serial read) only drops its own oldest inputs and never stalls
+    the stages before it: the camera keeps being read at full rate. Stages
+    added with add_stage are chained in order; add_loop runs a standalone
+    loop, such as a sensor poller, under the same start and stop.
+    """
+
+    def __init__(self, lane: str):
+        self.lane = lane
+        self.stages: List[Stage] = []
+        self.chain: List[Stage] = []
+        self.stopped = threading.Event()
+        self.last_report = None
+
+    def add_stage(self, name: str, work: Callable, queue_size: Optional[int] = None) -> Stage:
+        """Append a stage; every stage after the first needs a queue_size"""
+        inbox = None
+        if self.chain:
+            inbox = DropOldestQueue(queue_size)
+            self.chain[-1].outbox = inbox
+            self.chain[-1].next_name = name
+        stage = Stage(self, name, work, inbox)
+        self.chain.append(stage)
+        self.stages.append(stage)
+        return stage
+
+    def add_loop(self, name: str, work: Callable) -> Stage:
+        """Run work(None) repeatedly on its own thread, outside the chain"""
+        stage = Stage(self, name, work)
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        self.last_report = (time.monotonic(), {stage.name: (0, 0.0) for stage in self.stages})
+        for stage in self.stages:
+            stage.thread.start()
+        threading.Thread(target=self.report_loop, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def join(self, timeout: float = 2.0):
+        for stage in self.stages:
+            stage.thread.join(timeout)
+
+    def idle(self) -> bool:
+        """True when no stage after the source has an item queued or in hand"""
+        return not any(len(stage.inbox) or stage.working for stage in self.chain[1:])
+
+    def throughput(self) -> Dict[str, Dict]:
+        """Per-stage rate, busy share and queue state since the previous call"""
+        now = time.monotonic()
+        since, previous = self.last_report
+        elapsed = max(now - since, 1e-9)
+
+        report = {}
+        for stage in self.stages:
+            processed, busy = previous.get(stage.name, (0, 0.0))
+            report[stage.name] = {
+                'per_second': round((stage.processed - processed) / elapsed, 1),
+                'busy': round((stage.busy_seconds - busy) / elapsed * 100, 1),
+                'queued': len(stage.inbox) if stage.inbox is not None else None,
+                'dropped': stage.inbox.dropped if stage.inbox is not None else 0,
+                'errors': stage.errors
+            }
+
+        self.last_report = (now, {stage.name: (stage.processed, stage.busy_seconds) for stage in self.stages})
+        return report
+
+    def report_loop(self):
+        while not self.stopped.wait(REPORT_INTERVAL):
+            parts = [f"{name} {stats['per_second']}/s ({stats['busy']}% busy, {stats['dropped']} dropped)"
+                     for name, stats in self.throughput().items()]
+            print(f"[PIPELINE] {self.lane}: " + ', '.join(parts))
+
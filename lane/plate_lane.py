@@ -0,0 +1,251 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import cv2
+
+from lane.gating import DetectionGate, vehicle_present
+from lane.ocr import binarize, create_ocr_backend, read_plate
+from lane.ocr_pool import OCR_WORKERS, OcrPool
+from lane.pipeline import LanePipeline, LatestValue, StopPipeline
+from lane.tracker import PlateTracker
+from lane.voting import READS_PER_DECISION
+from monitoring import metrics
+
+
+SENSOR_MAX_AGE = 1.0      # Seconds a distance reading stays valid
+
+# Queue sizes between stages; small, as only the freshest frames matter
+DETECT_QUEUE = 2
+OCR_QUEUE = 4
+DECIDE_QUEUE = 16
+
+FRAMES_PROCESSED = metrics.counter('parking_frames_processed_total', 'Camera frames read', ('lane',))
+DETECTION_SECONDS = metrics.histogram('parking_detection_seconds', 'YOLO plate detection time per frame', ('lane',))
+OCR_SECONDS = metrics.histogram('parking_ocr_seconds', 'OCR time per plate crop', ('lane',))
+OCR_FRAME_SECONDS = metrics.histogram('parking_ocr_frame_seconds', 'OCR time for all plate crops of a frame',
+                                      ('lane',))
+PLATES_READ = metrics.counter('parking_plates_read_total', 'OCR reads matching the plate pattern', ('lane',))
+
+
+class PlateDetection:
+    """A plate box found in a frame, its track, and what OCR read from it"""
+
+    __slots__ = ('box', 'confidence', 'crop', 'track_id', 'selected', 'plate', 'ocr_confidence')
+
+    def __init__(self, box, confidence: float, crop):
+        self.box = box
+        self.confidence = confidence
+        self.crop = crop
+        self.track_id = None
+        self.selected = True
+        self.plate = None
+        self.ocr_confidence = 0.0
+
+
+class LaneFrame:
+    """A camera frame on its way through the pipeline"""
+
+    __slots__ = ('index', 'captured_at', 'image', 'distance', 'detections')
+
+    def __init__(self, index: int, image, distance: Optional[float]):
+        self.index = index
+        self.captured_at = time.time()
+        self.image = image
+        self.distance = distance
+        self.detections: List[PlateDetection] = []
+
+
+def detect_plates(detector, image) -> List[PlateDetection]:
+    """Plate boxes in a frame, with their crops, from any detector backend"""
+    detections = []
+    for (x1, y1, x2, y2), confidence in detector.detect(image):
+        crop = image[y1:y2, x1:x2]
+        if crop.size == 0:  # Skip empty plate images
+            continue
+        detections.append(PlateDetection((x1, y1, x2, y2), confidence, crop))
+    return detections
+
+
+def annotate(image, detections: List[PlateDetection]):
+    """A copy of the frame with each plate box, its confidence and track ID drawn on"""
+    annotated = image.copy()
+    for detection in detections:
+        x1, y1, x2, y2 = detection.box
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(annotated, f"#{detection.track_id} {detection.confidence:.2f}", (x1, max(y1 - 8, 12)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+    return annotated
+
+
+class Display:
+    """Latest image per window, drawn from the main thread.
+
+    OpenCV windows must be updated from the thread that created them, so
+    stages only store images here and the main loop calls render().
+    """
+
+    def __init__(self):
+        self.images: Dict[str, object] = {}
+        self.lock = threading.Lock()
+
+    def show(self, window: str, image):
+        with self.lock:
+            self.images[window] = image
+
+    def render(self, wait_ms: int = 1) -> int:
+        """Draw pending images; returns the key pressed, as cv2.waitKey does"""
+        with self.lock:
+            images, self.images = self.images, {}
+        for window, image in images.items():
+            cv2.imshow(window, image)
+        return cv2.waitKey(wait_ms) & 0xFF
+
+
+class PlateLane:
+    """Camera-to-decision pipeline of one entry or exit lane.
+
+    The stages are:
+    - capture: reads the camera and passes on only the frames the
+      DetectionGate lets through (car at the gate, and moving or not yet
+      recognised)
+    - detect: runs the plate detector (see lane/detector.py) and follows
+      each plate with the PlateTracker, keeping only the crops its OCR
+      budget selects
+    - ocr: reads the plate crops, all crops of a frame in parallel on the
+      OCR worker pool, or one by one on the stage thread with ocr_workers=0.
+      Lanes hosted together pass one shared ocr_pool
+    - decide: adds the reads to each track's confidence-weighted PlateVote
+      and calls the lane's decide(plate) policy as soon as it is settled
+    A separate loop keeps polling the sensor. The stages are linked by
+    small drop-oldest queues (see LanePipeline), so camera frames never back
+    up behind OCR, Redis or the serial line.
+    """
+
+    def __init__(self, lane: str, capture, read_distance: Callable[[], Optional[float]], detector,
+                 decide: Callable[[str], None], recorder=None, display: Optional[Display] = None, ocr=None,
+                 ocr_workers: int = OCR_WORKERS, ocr_pool: Optional[OcrPool] = None):
+        self.lane = lane
+        self.capture = capture
+        self.read_distance = read_distance
+        self.detector = detector
+        self.decide = decide
+        self.recorder = recorder
+        self.display = display
+        self.owns_ocr = ocr_pool is None
+        self.ocr_pool = ocr_pool or (OcrPool(ocr_workers) if ocr is None and ocr_workers > 0 else None)
+        self.ocr_backend = None if self.ocr_pool else ocr or create_ocr_backend()
+        self.camera_window, self.plate_window = f'Webcam Feed ({lane})', f'Plate ({lane})'
+        self.distance = LatestValue()
+        self.gate = DetectionGate(lane)
+        self.tracker = PlateTracker()
+        self.frame_index = 0
+
+        self.pipeline = LanePipeline(lane)
+        self.pipeline.add_loop('sensor', self.poll_sensor)
+        self.pipeline.add_stage('capture', self.capture_frame)
+        self.pipeline.add_stage('detect', self.detect, queue_size=DETECT_QUEUE)
+        self.pipeline.add_stage('ocr', self.ocr, queue_size=OCR_QUEUE)
+        self.pipeline.add_stage('decide', self.vote, queue_size=DECIDE_QUEUE)
+
+    def start(self):
+        self.pipeline.start()
+
+    def stop(self):
+        self.pipeline.stop()
+        self.pipeline.join()
+        if self.owns_ocr:
+            (self.ocr_pool or self.ocr_backend).close()
+
+    @property
+    def stopped(self) -> bool:
+        return self.pipeline.stopped.is_set()
+
+    def poll_sensor(self, _):
+        distance = self.read_distance()
+        if distance is None:
+            time.sleep(0.05)  # Nothing on the serial line yet
+            return
+        self.distance.set(distance)
+
+    def capture_frame(self, _) -> Optional[LaneFrame]:
+        distance = self.distance.get(SENSOR_MAX_AGE)
+        if not vehicle_present(distance) and self.tracker.tracks:
+            # The car has left; the next one, stopping at the same spot, must not inherit its decided track
+            self.tracker.clear()
+        if self.display is None and not vehicle_present(distance):
+            # Idle and headless: grab without decoding, so an empty lane costs next to nothing
+            if not self.capture.grab():
+                print(f"[ERROR] Failed to read from the {self.lane} camera")
+                raise StopPipeline
+            FRAMES_PROCESSED.inc(lane=self.lane)
+            self.gate.check(None, distance)
+            return None
+
+        ret, image = self.capture.read()
+        if not ret:
+            print(f"[ERROR] Failed to read from the {self.lane} camera")
+            raise StopPipeline
+        FRAMES_PROCESSED.inc(lane=self.lane)
+        self.frame_index += 1
+
+        # Only run the heavy detection + OCR stages on frames that can show something new
+        if self.gate.check(image, distance) != 'detect':
+            if self.display:
+                self.display.show(self.camera_window, image)
+            return None
+        return LaneFrame(self.frame_index, image, distance)
+
+    def detect(self, frame: LaneFrame) -> Optional[LaneFrame]:
+        with DETECTION_SECONDS.time(lane=self.lane):
+            frame.detections = detect_plates(self.detector, frame.image)
+        created = self.tracker.update(frame.detections)
+        if created and self.recorder:
+            self.recorder.detected()
+
+        if self.display:
+            self.display.show(self.camera_window, annotate(frame.image, frame.detections))
+
+        # Only crops the tracker selects are read; a vehicle is OCRed a few times, not every frame
+        frame.detections = [detection for detection in frame.detections if detection.selected]
+        return frame if frame.detections else None
+
+    def ocr(self, frame: LaneFrame) -> Optional[LaneFrame]:
+        with OCR_FRAME_SECONDS.time(lane=self.lane):
+            if self.ocr_pool:
+                results = self.ocr_pool.read_all([detection.crop for detection in frame.detections])
+            else:
+                results = [self.read_crop(detection.crop) for detection in frame.detections]
+
+        for detection, (plate, confidence, seconds) in zip(frame.detections, results):
+            detection.plate, detection.ocr_confidence = plate, confidence
+            OCR_SECONDS.observe(seconds, lane=self.lane)
+            if self.display:
+                self.display.show(self.plate_window, detection.crop)
+            if detection.plate:
+                print(f"[DETECTED] Plate: {detection.plate} (box {detection.confidence:.2f}, "
+                      f"OCR {detection.ocr_confidence:.2f})")
+                PLATES_READ.inc(lane=self.lane)
+        return frame if any(detection.plate for detection in frame.detections) else None
+
+    def read_crop(self, crop):
+        started = time.perf_counter()
+        plate, confidence = read_plate(self.ocr_backend, binarize(crop))
+        return plate, confidence, time.perf_counter() - started
+
+    def vote(self, frame: LaneFrame):
+        for detection in frame.detections:
+            if not detection.plate:
+                continue
+            track = self.tracker.add_read(detection.track_id, detection.plate, detection.confidence,
+                                          detection.ocr_confidence)
+            if track is None:
+                continue
+
+            plate = track.decided
+            READS_PER_DECISION.observe(track.vote.reads, lane=self.lane)
+
+            if self.recorder:
+                self.recorder.confirmed(plate)
+            self.decide(plate)
+            self.gate.confirm()
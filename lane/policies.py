@@ -0,0 +1,288 @@
+import threading
+import time
+from datetime import datetime
+
+from monitoring import metrics
+
+# Telemetry pushed to Redis and exposed by the dashboard at /metrics
+LANE_DECISIONS = metrics.counter('parking_lane_decisions_total', 'Access decisions per lane', ('lane', 'decision'))
+
+GATE_OPEN_SECONDS = 15
+ENTRY_COOLDOWN = 300  # Seconds before the same plate may enter again
+EXIT_COOLDOWN = 60    # Prevent rapid exit attempts
+ALERT_COOLDOWN = 30   # Prevent spam alerts for same plate
+
+
+class LanePolicy:
+    """Access decisions of one lane.
+
+    The database and Arduino managers may be shared by every lane of the
+    process; what is per lane is the Arduino role driving its gate, its
+    LaneRecorder and its cooldown state. decide(plate) runs on the lane
+    pipeline's decide stage.
+    """
+
+    def __init__(self, lane: str, db_manager, arduino_manager, recorder, role: str = 'entry_exit',
+                 open_duration: int = GATE_OPEN_SECONDS):
+        self.lane = lane
+        self.db_manager = db_manager
+        self.arduino_manager = arduino_manager
+        self.recorder = recorder
+        self.role = role
+        self.open_duration = open_duration
+
+    def decide(self, plate: str):
+        raise NotImplementedError
+
+    def decided(self, decision: str):
+        """Count a decision; the recorder's cycle, for timing the gate"""
+        LANE_DECISIONS.inc(lane=self.lane, decision=decision)
+        return self.recorder.decided(decision)
+
+    def open_gate(self, cycle=None):
+        """Open gate for the lane's open duration, timing the car's gate cycle"""
+        def on_state(state):
+            if cycle is not None:
+                (self.recorder.gate_opened if state == 'open' else self.recorder.gate_closed)(cycle)
+        return self.arduino_manager.open_gate(self.role, self.open_duration, on_state)
+
+    def is_car_inside(self, plate_number):
+        """
+        Check if a car is currently inside (has unpaid entry or paid but not exited).
+        """
+        try:
+            entry_ids = self.db_manager.get_entries_for_plate(plate_number)
+            if not entry_ids:
+                return False
+
+            for entry_id in entry_ids:
+                entry_data = self.db_manager.get_entry(int(entry_id))
+                if entry_data:
+                    payment_status = entry_data.get("payment_status", "0")
+                    exit_status = entry_data.get("exit_status", "0")
+
+                    # Car is inside if: unpaid OR (paid but not exited)
+                    if payment_status == "0" or (payment_status == "1" and exit_status != "1"):
+                        return True
+
+            return False
+        except Exception as e:
+            print(f"[ERROR] Failed to check if car is inside: {e}")
+            return False
+
+
+class EntryPolicy(LanePolicy):
+    """Admits a plate unless it is already inside or just entered"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_saved_plate = None
+        self.last_entry_time = 0
+
+    def decide(self, plate):
+        """Grant or deny entry to a confirmed plate"""
+        now = time.time()
+
+        # Enhanced validation checks
+        if self.is_car_inside(plate):
+            print(f"[ACCESS DENIED] {plate} is already inside")
+            self.decided('denied')
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self.db_manager.log_message(
+                f"{timestamp} - ENTRY DENIED - {plate} - Already inside",
+                "SECURITY", lane=self.lane
+            )
+            return
+
+        if plate == self.last_saved_plate and (now - self.last_entry_time) <= ENTRY_COOLDOWN:
+            print(f"[COOLDOWN] {plate} entry blocked due to cooldown")
+            self.decided('cooldown')
+            return
+
+        # Create new entry with enhanced tracking
+        entry_id = self.db_manager.redis_client.incr("next_entry_id")
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        # Enhanced entry data structure
+        entry_data = {
+            "plate_number": plate,
+            "entry_timestamp": timestamp,
+            "payment_status": "0",  # 0=unpaid, 1=paid
+            "exit_status": "0",  # 0=inside, 1=exited
+            "exit_timestamp": "",
+            "charge_amount": "",
+            "payment_timestamp": ""
+        }
+
+        # Goes to both Redis and SQLite
+        if self.db_manager.write_entry(entry_id, entry_data):
+            self.db_manager.log_message(
+                f"{timestamp} - ENTRY GRANTED - {plate} - Entry ID: {entry_id}",
+                "ENTRY", lane=self.lane
+            )
+            print(f"[ENTRY GRANTED] {plate} logged with ID: {entry_id}")
+            self.db_manager.record_visit(plate)
+
+            threading.Thread(target=self.open_gate, args=(self.decided('granted'),)).start()
+
+            self.last_saved_plate = plate
+            self.last_entry_time = now
+        else:
+            print(f"[ERROR] Failed to save entry for {plate}")
+            self.decided('error')
+
+
+class ExitPolicy(LanePolicy):
+    """Lets a paid car out; sounds the buzzer for unpaid or unknown plates"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_exit_plate = None
+        self.last_exit_time = 0
+        self.last_alert_plate = None
+        self.last_alert_time = 0
+
+    def trigger_unauthorized_alert(self):
+        """Trigger unauthorized exit alert buzzer"""
+        try:
+            self.arduino_manager.send_command(self.role, 'B')
+            print("[ALERT] Unauthorized exit alert triggered")
+            return True
+        except Exception as e:
+            print(f"[ERROR] Failed to trigger unauthorized alert: {e}")
+            return False
+
+    def trigger_exit_beep(self):
+        """Trigger short beep for authorized exit"""
+        try:
+            self.arduino_manager.send_command(self.role, 'S')
+            return True
+        except Exception as e:
+            print(f"[ERROR] Failed to trigger exit beep: {e}")
+            return False
+
+    def has_valid_entry_for_exit(self, plate_number):
+        """
+        Check if a car has a valid entry that allows exit.
+        Returns (has_entry, entry_id, message)
+        """
+        try:
+            entry_ids = self.db_manager.get_entries_for_plate(plate_number)
+            if not entry_ids:
+                return False, None, "No entry record found"
+
+            # Find the most recent entry
+            latest_entry_id = max(entry_ids, key=int)
+            entry_data = self.db_manager.get_entry(int(latest_entry_id))
+
+            if not entry_data:
+                return False, None, "Invalid entry data"
+
+            payment_status = entry_data.get("payment_status", "0")
+            exit_status = entry_data.get("exit_status", "0")
+
+            if exit_status == "1":
+                return False, None, "Already exited"
+
+            if payment_status == "0":
+                return False, None, "Payment required before exit"
+
+            if payment_status == "1":
+                return True, latest_entry_id, "Valid exit allowed"
+
+            return False, None, "Unknown entry status"
+        except Exception as e:
+            print(f"[ERROR] Failed to check entry validity: {e}")
+            return False, None, "System error checking entry"
+
+    def mark_as_exited(self, entry_id):
+        """
+        Mark an entry as exited with timestamp.
+        """
+        try:
+            # Make sure the entry is cached in Redis (falls back to SQLite)
+            if self.db_manager.get_entry(int(entry_id)):
+                # Updates both Redis and SQLite and records the stay's dwell time
+                return self.db_manager.update_exit_status(int(entry_id))
+            return False
+        except Exception as e:
+            print(f"[ERROR] Failed to mark as exited: {e}")
+            return False
+
+    def log_unauthorized_attempt(self, plate_number, reason):
+        """Log unauthorized exit attempt with alert status"""
+        try:
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            alert_msg = f"{timestamp} - UNAUTHORIZED EXIT ATTEMPT - {plate_number} - {reason} - ALERT TRIGGERED"
+
+            # Security alerts and regular logs both go through db_manager
+            self.db_manager.log_security_alert(plate_number, alert_msg, "HIGH", lane=self.lane)
+            self.db_manager.log_message(alert_msg, "SECURITY", lane=self.lane)
+
+            print(f"[SECURITY ALERT] {alert_msg}")
+        except Exception as e:
+            print(f"[ERROR] Failed to log unauthorized attempt: {e}")
+
+    def alert_unauthorized(self, plate, reason, now):
+        """Sound the buzzer and log the attempt, at most once per ALERT_COOLDOWN per plate"""
+        # Check alert cooldown to prevent spam
+        if not (plate == self.last_alert_plate and (now - self.last_alert_time) <= ALERT_COOLDOWN):
+            threading.Thread(target=self.trigger_unauthorized_alert).start()
+            self.log_unauthorized_attempt(plate, reason)
+            self.last_alert_plate = plate
+            self.last_alert_time = now
+
+    def deny(self, plate, reason, now):
+        """Count a denied exit and raise the unauthorized alert"""
+        self.decided('denied')
+        self.db_manager.record_denial(plate)
+        self.alert_unauthorized(plate, reason, now)
+
+    def decide(self, plate):
+        """Grant or deny exit to a confirmed plate"""
+        now = time.time()
+
+        # Exit cooldown check
+        if plate == self.last_exit_plate and (now - self.last_exit_time) <= EXIT_COOLDOWN:
+            print(f"[COOLDOWN] {plate} exit blocked due to cooldown")
+            self.decided('cooldown')
+            return
+
+        # Check if car is inside parking lot
+        if not self.is_car_inside(plate):
+            print(f"[UNAUTHORIZED ACCESS] {plate} attempting to exit but not inside")
+            self.deny(plate, "Vehicle not registered as inside", now)
+            return
+
+        # Check entry validity for exit
+        has_entry, entry_id, message = self.has_valid_entry_for_exit(plate)
+
+        if not has_entry:
+            # Deny exit - unauthorized attempt
+            print(f"[UNAUTHORIZED ACCESS] {plate} - {message}")
+            self.deny(plate, message, now)
+            return
+
+        # Grant authorized exit
+        print(f"[ACCESS GRANTED] {plate} - {message}")
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        # Mark as exited
+        if self.mark_as_exited(entry_id):
+            # Log successful exit
+            self.db_manager.log_message(f"{timestamp} - EXIT GRANTED - {plate} - Entry ID: {entry_id}", "EXIT",
+                                        lane=self.lane)
+
+            # Open gate and trigger exit beep
+            threading.Thread(target=self.open_gate, args=(self.decided('granted'),)).start()
+            threading.Thread(target=self.trigger_exit_beep).start()
+
+            self.last_exit_plate = plate
+            self.last_exit_time = now
+            print(f"[SUCCESS] {plate} exit completed successfully")
+        else:
+            print(f"[ERROR] Failed to mark {plate} as exited")
+            self.decided('error')
+
+
+POLICIES = {'entry': EntryPolicy, 'exit': ExitPolicy}
@@ -0,0 +1,336 @@
+import bisect
+import csv
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+
+from lane.pipeline import GET_TIMEOUT, StopPipeline
+from lane.plate_lane import PlateLane
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+FOLDER_FPS = 10.0          # Frame rate assumed for an image folder
+SENSOR_INTERVAL = 0.1      # Seconds between scripted distance readings, about the Arduino's rate
+PRESENT_DISTANCE = 10.0    # Reported throughout when no distance trace is given: a car is always at the gate
+DRAIN_TIMEOUT = 30.0       # Seconds to wait for in-flight frames after the source ends
+LOCKSTEP_POLL = 0.001      # Seconds between pipeline checks at speed 0
+
+
+class ReplaySource:
+    """A recorded video or image folder standing in for the lane camera.
+
+    Offers the read() and grab() calls PlateLane makes on cv2.VideoCapture.
+    Frames are delivered at the recording's frame rate times speed, so the
+    pipeline drops frames as it would on a live camera; speed=0 delivers
+    them as soon as they are asked for (see ReplayLane). media_time is the
+    position in the recording, which drives the distance trace and the
+    ground truth.
+    """
+
+    def __init__(self, fps: float, speed: float = 1.0):
+        self.fps = fps
+        self.speed = speed
+        self.position = 0
+        self.started = None
+        self.frame_times: List[float] = []  # perf_counter time each frame was delivered at
+        self.finished = False
+
+    @property
+    def media_time(self) -> float:
+        return self.position / self.fps
+
+    def pace(self):
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+        elif self.speed:
+            delay = self.started + self.position / self.fps / self.speed - now
+            if delay > 0:
+                time.sleep(delay)
+                now += delay
+        self.frame_times.append(now)
+        self.position += 1
+
+    def wall_time(self, media_time: float) -> Optional[float]:
+        """When the frame at media_time was delivered, if it has been"""
+        index = max(0, round(media_time * self.fps))
+        return self.frame_times[index] if index < len(self.frame_times) else None
+
+    def grab(self) -> bool:
+        if self.finished or not self.advance():
+            self.finished = True
+            return False
+        self.pace()
+        return True
+
+    def read(self):
+        image = None if self.finished else self.next_image()
+        if image is None:
+            self.finished = True
+            return False, None
+        self.pace()
+        return True, image
+
+    def frame_size(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def advance(self) -> bool:
+        """Skip one frame without decoding it"""
+        raise NotImplementedError
+
+    def next_image(self):
+        """Decode the next frame; None at the end"""
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class VideoSource(ReplaySource):
+    def __init__(self, path: str, speed: float = 1.0):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise ValueError(f"Cannot open video {path}")
+        super().__init__(self.capture.get(cv2.CAP_PROP_FPS) or 25.0, speed)
+
+    def frame_size(self) -> Tuple[int, int]:
+        return int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def advance(self) -> bool:
+        return self.capture.grab()
+
+    def next_image(self):
+        ret, image = self.capture.read()
+        return image if ret else None
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageFolderSource(ReplaySource):
+    """Frames from the images of a folder, in name order"""
+
+    def __init__(self, folder: str, fps: float = FOLDER_FPS, speed: float = 1.0):
+        self.paths = [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                      if name.lower().endswith(IMAGE_EXTENSIONS)]
+        if not self.paths:
+            raise ValueError(f"No images in {folder}")
+        super().__init__(fps, speed)
+
+    def frame_size(self) -> Tuple[int, int]:
+        height, width = cv2.imread(self.paths[0]).shape[:2]
+        return width, height
+
+    def advance(self) -> bool:
+        return self.position < len(self.paths)
+
+    def next_image(self):
+        while self.position < len(self.paths):
+            image = cv2.imread(self.paths[self.position])
+            if image is not None:
+                return image
+            del self.paths[self.position]  # Unreadable file: drop it so positions stay aligned
+        return None
+
+
+def open_source(path: str, fps: float = FOLDER_FPS, speed: float = 1.0) -> ReplaySource:
+    return ImageFolderSource(path, fps, speed) if os.path.isdir(path) else VideoSource(path, speed)
+
+
+class DistanceTrace:
+    """Scripted ultrasonic readings, replacing the Arduino.
+
+    A CSV of "seconds,distance" rows in recording time; each reading holds
+    until the next row. Without a file the sensor reports a car at the gate
+    throughout.
+    """
+
+    def __init__(self, source: ReplaySource, points: Optional[List[Tuple[float, float]]] = None):
+        self.source = source
+        points = sorted(points or [(0.0, PRESENT_DISTANCE)])
+        self.times = [seconds for seconds, _ in points]
+        self.distances = [distance for _, distance in points]
+
+    @classmethod
+    def load(cls, source: ReplaySource, path: Optional[str]) -> 'DistanceTrace':
+        if not path:
+            return cls(source)
+        with open(path) as f:
+            rows = [row for row in csv.reader(f) if row and not row[0].startswith('#')]
+        return cls(source, [(float(seconds), float(distance)) for seconds, distance in rows
+                            if seconds.strip().replace('.', '', 1).isdigit()])
+
+    def at(self, media_time: float) -> Optional[float]:
+        index = bisect.bisect_right(self.times, media_time) - 1
+        return self.distances[index] if index >= 0 else None
+
+    def read(self) -> Optional[float]:
+        """Stands in for the lane's serial read_distance()"""
+        time.sleep(SENSOR_INTERVAL)
+        return self.at(self.source.media_time)
+
+
+def load_ground_truth(path: str) -> List[Tuple[float, str]]:
+    """(seconds, plate) rows: the recording time each car reaches the gate, and its plate"""
+    with open(path) as f:
+        rows = [row for row in csv.reader(f) if len(row) >= 2 and not row[0].startswith('#')]
+    return sorted((float(seconds), plate.strip().upper()) for seconds, plate in rows
+                  if seconds.strip().replace('.', '', 1).isdigit())
+
+
+def percentiles(values: List[float], quantiles=(50, 90, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles in milliseconds"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {f'p{quantile}': round(ordered[min(len(ordered) - 1, int(len(ordered) * quantile / 100))] * 1000, 2)
+            for quantile in quantiles}
+
+
+class ReplayLane(PlateLane):
+    """A PlateLane fed from a ReplaySource, recording what it does.
+
+    The lane's own capture, detection, OCR and voting code runs unchanged,
+    headless and without Redis. On top, every stage call is timed, each
+    OCR read is kept with the recording time of its frame, and decisions
+    go to a recording policy instead of the database and the gate. The
+    distance trace is applied to every frame as it is read, so it stays in
+    step with the recording at any speed. At speed=0 the lane runs in
+    lockstep: each frame is read only once the previous one has left the
+    pipeline, so no frame is dropped and runs are repeatable.
+    """
+
+    def __init__(self, lane: str, source: ReplaySource, trace: DistanceTrace, detector,
+                 decide: Optional[Callable[[str], None]] = None, **options):
+        super().__init__(lane, source, trace.read, detector, self.record_decision, **options)
+        self.source = source
+        self.trace = trace
+        self.policy = decide
+        self.stage_seconds: Dict[str, List[float]] = {stage.name: [] for stage in self.pipeline.chain}
+        self.reads: List[Tuple[float, str]] = []
+        self.decisions: List[Tuple[float, float, str]] = []  # (perf_counter time, recording time, plate)
+        self.voting_frame = None
+        for stage in self.pipeline.chain:
+            stage.work = self.timed(stage.name, stage.work)
+
+    def timed(self, name: str, work: Callable) -> Callable:
+        samples = self.stage_seconds[name]
+
+        def run(item):
+            started = time.perf_counter()
+            try:
+                return work(item)
+            finally:
+                if not (self.source.finished and name == 'capture'):  # Not the idle waits after the end
+                    samples.append(time.perf_counter() - started)
+        return run
+
+    def capture_frame(self, item):
+        if self.source.finished:
+            self.pipeline.stopped.wait(GET_TIMEOUT)  # Keep the stage alive until the tail is drained
+            return None
+        if not self.source.speed:
+            while not (self.pipeline.idle() or self.stopped):
+                time.sleep(LOCKSTEP_POLL)
+        self.distance.set(self.trace.at(self.source.media_time))
+        try:
+            frame = super().capture_frame(item)
+            if frame is not None:
+                frame.index = self.source.position - 1  # Position in the recording, counting grabbed frames
+            return frame
+        except StopPipeline:
+            if self.source.finished:
+                return None  # End of the recording: let the later stages finish its last frames
+            raise
+
+    def ocr(self, frame):
+        result = super().ocr(frame)
+        media_time = frame.index / self.source.fps
+        self.reads.extend((media_time, detection.plate) for detection in frame.detections if detection.plate)
+        return result
+
+    def vote(self, frame):
+        self.voting_frame = frame
+        super().vote(frame)
+
+    def record_decision(self, plate: str):
+        self.decisions.append((time.perf_counter(), self.voting_frame.index / self.source.fps, plate))
+        if self.policy:
+            self.policy(plate)
+
+    def run(self, ground_truth: Optional[List[Tuple[float, str]]] = None) -> Dict:
+        """Replay the whole source, let the frames in flight finish, and return the report"""
+        self.start()
+        try:
+            while not (self.source.finished or self.stopped):
+                time.sleep(GET_TIMEOUT)
+            # Idle on two checks in a row, as an item is briefly in no queue while a stage picks it up
+            deadline = time.monotonic() + DRAIN_TIMEOUT
+            idle_checks = 0
+            while idle_checks < 2 and time.monotonic() < deadline:
+                idle_checks = idle_checks + 1 if self.pipeline.idle() else 0
+                time.sleep(GET_TIMEOUT)
+        finally:
+            self.stop()
+            self.source.release()
+        return self.report(ground_truth)
+
+    def report(self, ground_truth: Optional[List[Tuple[float, str]]] = None) -> Dict:
+        source = self.source
+        elapsed = (source.frame_times[-1] - source.frame_times[0]) if len(source.frame_times) > 1 else 0.0
+        stages = {name: {'calls': len(samples), **percentiles(samples)}
+                  for name, samples in self.stage_seconds.items()}
+        report = {
+            'lane': self.lane,
+            'frames': source.position,
+            'seconds': round(elapsed, 2),
+            'fps': round(source.position / elapsed, 1) if elapsed else None,
+            'detected_frames': stages['detect']['calls'],
+            'detect_fps': round(stages['detect']['calls'] / elapsed, 1) if elapsed else None,
+            'stage_ms': stages,
+            'reads': len(self.reads),
+            'decisions': [{'seconds': round(media_time, 2), 'plate': plate}
+                          for _, media_time, plate in self.decisions]
+        }
+        if ground_truth is not None:
+            report.update(self.score(ground_truth))
+        return report
+
+    def expected_plate(self, ground_truth: List[Tuple[float, str]], media_time: float) -> Optional[Tuple[float, str]]:
+        """The car at the gate at media_time: the last one to arrive before it"""
+        index = bisect.bisect_right([seconds for seconds, _ in ground_truth], media_time) - 1
+        return ground_truth[index] if index >= 0 else None
+
+    def score(self, ground_truth: List[Tuple[float, str]]) -> Dict:
+        """OCR and decision accuracy against the ground truth, and time from each arrival to its decision"""
+        correct_reads = sum(1 for media_time, plate in self.reads
+                            if (self.expected_plate(ground_truth, media_time) or (None, None))[1] == plate)
+
+        decided, wrong, extra, latencies = set(), [], [], []
+        for decided_at, media_time, plate in self.decisions:
+            car = self.expected_plate(ground_truth, media_time)
+            if car is None or car in decided:
+                extra.append(plate)
+                continue
+            decided.add(car)
+            if plate != car[1]:
+                wrong.append({'expected': car[1], 'decided': plate})
+                continue
+            arrived_at = self.source.wall_time(car[0])
+            if arrived_at is not None:
+                latencies.append(decided_at - arrived_at)
+
+        missed = [plate for seconds, plate in ground_truth if (seconds, plate) not in decided]
+        return {
+            'read_accuracy': round(correct_reads / len(self.reads) * 100, 1) if self.reads else None,
+            'cars': len(ground_truth),
+            'decided_correctly': len(decided) - len(wrong),
+            'decision_accuracy': round((len(decided) - len(wrong)) / len(ground_truth) * 100, 1)
+            if ground_truth else None,
+            'wrong': wrong,
+            'missed': missed,
+            'extra': extra,
+            'time_to_decision_ms': {**percentiles(latencies),
+                                    'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None}
+        }
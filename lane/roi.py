@@ -0,0 +1,94 @@
+import math
+import os
+from typing import List, Tuple
+
+import cv2
+
+from lane.detector import IMAGE_SIZE, Box, create_detector, input_size
+
+
+DETECT_SIZE = int(os.environ.get('PARKING_DETECT_SIZE', 320))  # Longest side of the low-res detection pass
+MODEL_STRIDE = 32          # Model input sides must be multiples of the network stride
+CROP_MARGIN = 0.05         # Share of the box size added around a low-res box before cropping the full frame
+
+
+class LaneRoi:
+    """The band of a lane camera's view where plates appear.
+
+    Stored as fractions of the frame (x1, y1, x2, y2), so it survives a
+    change of camera resolution. Set per lane as PARKING_<LANE>_ROI, e.g.
+    PARKING_ENTRY_ROI=0,0.4,1,0.9; unset is the whole frame.
+    """
+
+    __slots__ = ('x1', 'y1', 'x2', 'y2')
+
+    def __init__(self, x1: float = 0.0, y1: float = 0.0, x2: float = 1.0, y2: float = 1.0):
+        if not (0 <= x1 < x2 <= 1 and 0 <= y1 < y2 <= 1):
+            raise ValueError(f"ROI must be fractions 0 <= x1 < x2 <= 1 and 0 <= y1 < y2 <= 1, got "
+                             f"{(x1, y1, x2, y2)}")
+        self.x1, self.y1, self.x2, self.y2 = x1, y1, x2, y2
+
+    @classmethod
+    def from_env(cls, lane: str) -> 'LaneRoi':
+        value = os.environ.get(f'PARKING_{lane.upper()}_ROI')
+        return cls(*(float(part) for part in value.split(','))) if value else cls()
+
+    def pixels(self, width: int, height: int) -> Box:
+        """The band in pixels of a width x height frame"""
+        return (round(self.x1 * width), round(self.y1 * height), round(self.x2 * width), round(self.y2 * height))
+
+    def detection_size(self, width: int, height: int, detect_size: int = DETECT_SIZE) -> Tuple[int, int]:
+        """(height, width) model input for the band of a width x height frame at the low-res pass"""
+        x1, y1, x2, y2 = self.pixels(width, height)
+        scale = min(1.0, detect_size / max(x2 - x1, y2 - y1))
+        return (max(MODEL_STRIDE, math.ceil((y2 - y1) * scale / MODEL_STRIDE) * MODEL_STRIDE),
+                max(MODEL_STRIDE, math.ceil((x2 - x1) * scale / MODEL_STRIDE) * MODEL_STRIDE))
+
+
+class RoiDetector:
+    """Runs a detector on a downscaled copy of the lane's ROI band only.
+
+    The band is cut from the frame and shrunk so it fits the detector's
+    input, which is sized for the band (see LaneRoi.detection_size) rather
+    than the full 640x640 frame. The boxes found are mapped back to the
+    full-resolution frame and widened by CROP_MARGIN to absorb the coarse
+    low-res localisation, so OCR crops keep every pixel the camera
+    delivered. Same detect() interface as the detector it wraps.
+    """
+
+    def __init__(self, detector, roi: LaneRoi):
+        self.detector = detector
+        self.roi = roi
+        self.name = f"{detector.name}+roi"
+
+    def detect(self, image) -> List[Tuple[Box, float]]:
+        height, width = image.shape[:2]
+        left, top, right, bottom = self.roi.pixels(width, height)
+        band = image[top:bottom, left:right]
+        input_height, input_width = input_size(self.detector.image_size)
+        scale = min(1.0, input_height / band.shape[0], input_width / band.shape[1])
+        small = cv2.resize(band, (round(band.shape[1] * scale), round(band.shape[0] * scale)),
+                           interpolation=cv2.INTER_AREA) if scale < 1 else band
+
+        detections = []
+        for (x1, y1, x2, y2), confidence in self.detector.detect(small):
+            margin_x = (x2 - x1) / scale * CROP_MARGIN + 1 / scale
+            margin_y = (y2 - y1) / scale * CROP_MARGIN + 1 / scale
+            box = (max(0, int(left + x1 / scale - margin_x)), max(0, int(top + y1 / scale - margin_y)),
+                   min(width, math.ceil(left + x2 / scale + margin_x)),
+                   min(height, math.ceil(top + y2 / scale + margin_y)))
+            detections.append((box, confidence))
+        return detections
+
+
+def create_roi_detector(weights: str, lane: str, frame_size: Tuple[int, int], **options) -> RoiDetector:
+    """The lane's detector, with its input sized for the lane's ROI band in frame_size (width, height) frames"""
+    roi = LaneRoi.from_env(lane)
+    width, height = frame_size
+    detection_size = roi.detection_size(width, height)
+    full_height, full_width = input_size(IMAGE_SIZE)
+    band = roi.pixels(width, height)
+    print(f"[ROI] {lane}: band {band[2] - band[0]}x{band[3] - band[1]} at ({band[0]}, {band[1]}), detecting at "
+          f"{detection_size[1]}x{detection_size[0]} "
+          f"({detection_size[0] * detection_size[1] / (full_height * full_width):.0%} of the full-frame input)")
+    return RoiDetector(create_detector(weights, image_size=detection_size, **options), roi)
@@ -0,0 +1,164 @@
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
+import cv2
+
+from lane.voting import PlateVote
+
+
+IOU_THRESHOLD = 0.3      # Overlap for a box to continue a track
+CENTROID_RATIO = 0.5     # Otherwise, centre shift as a share of the track box diagonal
+MAX_MISSES = 5           # Detection passes a track may go unmatched before it is dropped
+TRACK_MAX_AGE = 30.0     # Seconds; tracks are dropped after this long unseen regardless
+
+MAX_OCR_ATTEMPTS = 4     # OCR calls per round on a track's sharpest crops
+RETRY_INTERVAL = 0.5     # Seconds before a crop that is not sharper, or a new round, is read
+SHARPER_MARGIN = 1.1     # Within a round, a crop this much sharper than any read so far is read at once
+
+
+def iou(a, b) -> float:
+    """Intersection over union of two (x1, y1, x2, y2) boxes"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def centroid_shift(a, b) -> float:
+    """Centre distance of two boxes relative to the diagonal of a"""
+    dx = (a[0] + a[2] - b[0] - b[2]) / 2
+    dy = (a[1] + a[3] - b[1] - b[3]) / 2
+    diagonal = ((a[2] - a[0]) ** 2 + (a[3] - a[1]) ** 2) ** 0.5
+    return (dx * dx + dy * dy) ** 0.5 / diagonal if diagonal else float('inf')
+
+
+def sharpness(crop) -> float:
+    """Variance of the Laplacian; higher is sharper"""
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+class Track:
+    """One plate followed across frames, with its OCR budget and votes"""
+
+    __slots__ = ('track_id', 'box', 'first_seen', 'last_seen', 'misses', 'ocr_attempts', 'last_attempt',
+                 'best_sharpness', 'vote', 'decided')
+
+    def __init__(self, track_id: int, box, now: float):
+        self.track_id = track_id
+        self.box = box
+        self.first_seen = now
+        self.last_seen = now
+        self.misses = 0
+        self.ocr_attempts = 0
+        self.last_attempt = 0.0
+        self.best_sharpness = 0.0
+        self.vote = PlateVote()
+        self.decided = None
+
+
+class PlateTracker:
+    """Gives each plate box a persistent track ID so every vehicle is read only a few times.
+
+    Boxes are matched to tracks greedily by IoU, falling back to centroid
+    distance for fast movers. Each track keeps its own PlateVote, so two cars
+    in view never mix their reads. Each track also has an OCR budget. A
+    crop is read at once only if it is the track's first, or sharper than
+    every crop read so far (variance of the Laplacian). Otherwise it is
+    read at most once every RETRY_INTERVAL, and a track has at most
+    MAX_OCR_ATTEMPTS reads per round. Once a track is decided it is never read again. The detect stage calls
+    update and the decide stage add_read, so both are guarded by a lock.
+    """
+
+    def __init__(self):
+        self.tracks: Dict[int, Track] = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def update(self, detections, now: Optional[float] = None) -> List[Track]:
+        """Assign a track to every detection and select the crops worth reading.
+
+        Sets detection.track_id and detection.selected; returns new tracks.
+        """
+        now = now or time.monotonic()
+        with self.lock:
+            matches = self.match(detections)
+            created = []
+            for index, detection in enumerate(detections):
+                track = matches.get(index)
+                if track is None:
+                    track = Track(next(self.ids), detection.box, now)
+                    self.tracks[track.track_id] = track
+                    created.append(track)
+                track.box, track.last_seen, track.misses = detection.box, now, 0
+                detection.track_id = track.track_id
+                detection.selected = self.should_read(track, detection, now)
+
+            matched = {track.track_id for track in matches.values()} | {track.track_id for track in created}
+            for track_id, track in list(self.tracks.items()):
+                if track_id not in matched:
+                    track.misses += 1
+                if track.misses > MAX_MISSES or now - track.last_seen > TRACK_MAX_AGE:
+                    del self.tracks[track_id]
+            return created
+
+    def match(self, detections) -> Dict[int, Track]:
+        """Detection index -> existing track, best overlaps first"""
+        pairs = sorted(((iou(track.box, detection.box), index, track)
+                        for index, detection in enumerate(detections) for track in self.tracks.values()),
+                       key=lambda pair: -pair[0])
+        matches, used = {}, set()
+        for overlap, index, track in pairs:
+            if overlap < IOU_THRESHOLD:
+                break
+            if index not in matches and track.track_id not in used:
+                matches[index] = track
+                used.add(track.track_id)
+
+        for index, detection in enumerate(detections):
+            if index in matches:
+                continue
+            candidates = [(centroid_shift(track.box, detection.box), track) for track in self.tracks.values()
+                          if track.track_id not in used]
+            shift, track = min(candidates, key=lambda candidate: candidate[0], default=(float('inf'), None))
+            if shift <= CENTROID_RATIO:
+                matches[index] = track
+                used.add(track.track_id)
+        return matches
+
+    def should_read(self, track: Track, detection, now: float) -> bool:
+        if track.decided:
+            return False
+        waited = now - track.last_attempt >= RETRY_INTERVAL
+        if track.ocr_attempts >= MAX_OCR_ATTEMPTS:
+            if not waited:
+                return False
+            track.ocr_attempts = 0  # Unsettled plate: allow another round on the sharpest crops
+            track.best_sharpness = 0.0
+
+        # A still car never gets sharper, so its crop is re-read every RETRY_INTERVAL
+        score = sharpness(detection.crop)
+        if track.ocr_attempts and score <= track.best_sharpness * SHARPER_MARGIN and not waited:
+            return False
+        track.best_sharpness = max(track.best_sharpness, score)
+        track.ocr_attempts += 1
+        track.last_attempt = now
+        return True
+
+    def clear(self):
+        """Forget every track, e.g. once the sensor sees the gate empty"""
+        with self.lock:
+            self.tracks.clear()
+
+    def add_read(self, track_id: int, plate: str, box_confidence: float,
+                 ocr_confidence: float) -> Optional[Track]:
+        """Add a read to a track's vote; the track once this read settles its plate"""
+        with self.lock:
+            track = self.tracks.get(track_id)
+            if track is None or track.decided:
+                return None
+            track.decided = track.vote.add(plate, box_confidence, ocr_confidence)
+            return track if track.decided else None
@@ -0,0 +1,55 @@
+from collections import Counter, defaultdict
+from typing import Optional
+
+from monitoring import metrics
+
+
+# A read scores box confidence x OCR confidence, both 0-1. A plate is decided
+# once its scores add up to DECISION_SCORE, lead the runner-up by
+# DECISION_MARGIN and come from AGREEING_READS reads, so a single confident
+# misread cannot open the gate. Only a read whose every character is at
+# least SINGLE_READ_CONFIDENCE decides on its own.
+DECISION_SCORE = 0.8
+DECISION_MARGIN = 0.5
+AGREEING_READS = 2
+SINGLE_READ_CONFIDENCE = 0.98
+MAX_READS = 6             # Reads after which the best-scoring plate is taken regardless
+
+READS_PER_DECISION = metrics.histogram('parking_lane_reads_per_decision', 'Plate reads a track needed to be decided',
+                                       ('lane',), buckets=(1, 2, 3, 4, 5, 6, 8))
+
+
+class PlateVote:
+    """Confidence-weighted vote over the OCR reads of one track.
+
+    Every read adds box confidence x OCR confidence to its plate. The OCR
+    confidence is that of the weakest character of the plate, so a read
+    with one doubtful character counts for little. The plate with the most
+    score is decided as soon as it passes DECISION_SCORE with a lead of
+    DECISION_MARGIN and a second read agrees with it, or at once if its one
+    read is near-certain. Conflicting or low-confidence reads keep the vote
+    open for more reads, up to MAX_READS.
+    """
+
+    __slots__ = ('scores', 'counts', 'reads')
+
+    def __init__(self):
+        self.scores = defaultdict(float)
+        self.counts = Counter()
+        self.reads = 0
+
+    def add(self, plate: str, box_confidence: float, ocr_confidence: float) -> Optional[str]:
+        """Count a read; the plate once the vote is settled"""
+        self.scores[plate] += box_confidence * ocr_confidence
+        self.counts[plate] += 1
+        self.reads += 1
+
+        ranked = sorted(self.scores.values(), reverse=True)
+        best = max(self.scores, key=self.scores.get)
+        runner_up = ranked[1] if len(ranked) > 1 else 0.0
+        agreed = self.counts[best] >= AGREEING_READS or (plate == best and ocr_confidence >= SINGLE_READ_CONFIDENCE)
+        if agreed and ranked[0] >= DECISION_SCORE and ranked[0] - runner_up >= DECISION_MARGIN:
+            return best
+        if self.reads >= MAX_READS:
+            return best
+        return None
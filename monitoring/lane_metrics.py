@@ -0,0 +1,187 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from monitoring import metrics
+
+
+BUCKET_SECONDS = 60
+BUCKET_TTL = 2 * 86400
+WINDOW_MINUTES = 15  # Default window of the dashboard summary
+
+# A car not decided within this long of its last event drove off or was
+# misread; its cycle is counted as abandoned when the next car is detected
+CYCLE_TIMEOUT = 60
+
+# Timed stages of a car's pass through a lane: stage -> (from event, to event)
+STAGES = {
+    'confirm': ('detected', 'confirmed'),   # Camera and OCR until the plate vote settles
+    'decision': ('confirmed', 'decided'),   # Database checks
+    'gate': ('decided', 'gate_open'),       # Serial command to the gate
+    'queue': ('detected', 'gate_open'),     # What the driver waits for
+    'open': ('gate_open', 'gate_closed'),   # Gate occupancy
+}
+
+QUEUE_SECONDS = metrics.histogram('parking_lane_queue_seconds', 'Time from first detection to gate open',
+                                  ('lane',), buckets=(1, 2, 5, 10, 20, 30, 60, 120, 300))
+
+
+class LaneCycle:
+    """Event times of one car passing through a lane"""
+
+    __slots__ = ('times', 'plate', 'decision')
+
+    def __init__(self, now: float):
+        self.times = {'detected': now}
+        self.plate = None
+        self.decision = None
+
+    def last_event(self) -> float:
+        return max(self.times.values())
+
+    def mark(self, event: str, now: float) -> Dict[str, float]:
+        """Record an event; returns the durations of the stages it ends"""
+        self.times.setdefault(event, now)
+        return {stage: now - self.times[start] for stage, (start, end) in STAGES.items()
+                if end == event and start in self.times}
+
+
+class LaneRecorder:
+    """Per-lane event recorder for one entry or exit process.
+
+    The lane loop reports a car's first detection, the confirmed plate, the
+    access decision, and the gate opening and closing. Each event adds to
+    counters in a per-minute Redis hash, lane:<lane>:<minute>: event counts,
+    decisions by outcome, and the summed duration and count of every stage
+    in STAGES. Recording is one pipelined round trip, and LaneMetrics sums a
+    window of these hashes into throughput, queue time and gate utilisation.
+    """
+
+    KEY = 'lane:{lane}:{minute}'
+    LANES_KEY = 'lane:names'
+
+    def __init__(self, redis_client, lane: str):
+        self.redis_client = redis_client
+        self.lane = lane
+        self.current: Optional[LaneCycle] = None
+        self.lock = threading.Lock()
+
+    def detected(self, now: Optional[float] = None):
+        """A plate is in view; starts a cycle unless one is in progress"""
+        now = now or time.time()
+        with self.lock:
+            fields = {}
+            if self.current and now - self.current.last_event() > CYCLE_TIMEOUT:
+                self.current = None
+                fields['abandoned'] = 1
+            if self.current is None:
+                self.current = LaneCycle(now)
+                fields['detected'] = 1
+        if fields:
+            self.push(now, fields)
+
+    def confirmed(self, plate: str, now: Optional[float] = None):
+        """The plate vote settled on a plate"""
+        now = now or time.time()
+        with self.lock:
+            if self.current is None:
+                self.current = LaneCycle(now)
+            self.current.plate = plate
+            durations = self.current.mark('confirmed', now)
+        self.push(now, {'confirmed': 1}, durations)
+
+    def decided(self, decision: str, now: Optional[float] = None) -> LaneCycle:
+        """The access decision ends the cycle at the camera.
+
+        A granted car is followed through the gate by passing the returned
+        cycle to gate_opened and gate_closed, which run on the gate thread
+        while the next car is detected.
+        """
+        now = now or time.time()
+        with self.lock:
+            cycle, self.current = self.current or LaneCycle(now), None
+        cycle.decision = decision
+        self.push(now, {f'decision:{decision}': 1}, cycle.mark('decided', now))
+        return cycle
+
+    def gate_opened(self, cycle: LaneCycle, now: Optional[float] = None):
+        now = now or time.time()
+        durations = cycle.mark('gate_open', now)
+        if 'queue' in durations:
+            QUEUE_SECONDS.observe(durations['queue'], lane=self.lane)
+        self.push(now, {'cars': 1}, durations)
+
+    def gate_closed(self, cycle: LaneCycle, now: Optional[float] = None):
+        now = now or time.time()
+        self.push(now, {}, cycle.mark('gate_closed', now))
+
+    def push(self, now: float, counts: Dict[str, int], durations: Optional[Dict[str, float]] = None):
+        key = self.KEY.format(lane=self.lane, minute=int(now // BUCKET_SECONDS))
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for field, count in counts.items():
+                pipe.hincrby(key, field, count)
+            for stage, seconds in (durations or {}).items():
+                pipe.hincrbyfloat(key, f"{stage}_seconds", seconds)
+                pipe.hincrby(key, f"{stage}_count", 1)
+            pipe.expire(key, BUCKET_TTL)
+            pipe.sadd(self.LANES_KEY, self.lane)
+            pipe.execute()
+        except Exception as e:
+            # Lane telemetry must never hold up the gate
+            print(f"[LANE METRICS] Failed to record {self.lane} event: {e}")
+
+
+class LaneMetrics:
+    """Rolling per-lane throughput, queue time and gate utilisation"""
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    def summary(self, window_minutes: int = WINDOW_MINUTES, now: Optional[float] = None) -> Dict[str, Dict]:
+        """Aggregates over the last window_minutes for every lane that has reported"""
+        now = now or time.time()
+        current = int(now // BUCKET_SECONDS)
+        minutes = list(range(current - window_minutes + 1, current + 1))
+        # The current minute is partial, so the window is measured up to now
+        window_seconds = (window_minutes - 1) * BUCKET_SECONDS + (now - current * BUCKET_SECONDS)
+
+        lanes = sorted(self.redis_client.smembers(LaneRecorder.LANES_KEY))
+        pipe = self.redis_client.pipeline(transaction=False)
+        for lane in lanes:
+            for minute in minutes:
+                pipe.hgetall(LaneRecorder.KEY.format(lane=lane, minute=minute))
+        buckets = pipe.execute()
+
+        return {
+            lane: self.summarise(buckets[index * len(minutes):(index + 1) * len(minutes)], window_seconds)
+            for index, lane in enumerate(lanes)
+        }
+
+    @staticmethod
+    def summarise(buckets: List[Dict[str, str]], window_seconds: float) -> Dict:
+        totals: Dict[str, float] = {}
+        for bucket in buckets:
+            for field, value in bucket.items():
+                totals[field] = totals.get(field, 0) + float(value)
+
+        def average(stage):
+            count = totals.get(f"{stage}_count", 0)
+            return round(totals[f"{stage}_seconds"] / count, 2) if count else None
+
+        cars_per_minute = [int(float(bucket.get('cars', 0))) for bucket in buckets]
+        open_seconds = totals.get('open_seconds', 0)
+
+        return {
+            'cars': sum(cars_per_minute),
+            'cars_per_minute': cars_per_minute,
+            'throughput_per_min': round(sum(cars_per_minute) * BUCKET_SECONDS / window_seconds, 2),
+            'peak_per_min': max(cars_per_minute, default=0),
+            'detected': int(totals.get('detected', 0)),
+            'abandoned': int(totals.get('abandoned', 0)),
+            'decisions': {field.split(':', 1)[1]: int(value) for field, value in totals.items()
+                          if field.startswith('decision:')},
+            'avg_seconds': {stage: average(stage) for stage in STAGES},
+            'gate_utilisation': round(min(open_seconds / window_seconds, 1.0) * 100, 1),
+            'window_minutes': round(window_seconds / 60, 1)
+        }
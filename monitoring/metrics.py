@@ -0,0 +1,276 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+# Histogram bucket upper bounds in seconds, suited to DB calls up to OCR runs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FLUSH_INTERVAL = 5  # Seconds between pushes of local metrics to Redis
+
+
+def format_series(name: str, labels: Dict[str, str]) -> str:
+    """Prometheus series name, e.g. name{a="1",le="0.5"}; le always comes last"""
+    if not labels:
+        return name
+    ordered = sorted(labels.items(), key=lambda item: (item[0] == 'le', item[0]))
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in ordered)
+    return name + '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(ordered, escaped)) + '}'
+
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """A named metric with label sets; values are kept per label tuple"""
+
+    kind = None
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+
+    def label_key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def label_dict(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.label_names, key))
+
+    def meta(self) -> Dict:
+        return {'type': self.kind, 'help': self.documentation}
+
+
+class Counter(Metric):
+    """Monotonic count; only the increase since the last flush is pushed"""
+
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pending: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.pending[key] = self.pending.get(key, 0) + amount
+
+    def collect(self) -> Dict[str, Tuple[str, float]]:
+        """Series -> ('add', delta), resetting the pending deltas"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        return {format_series(self.name, self.label_dict(key)): ('add', value) for key, value in pending.items()}
+
+
+class Gauge(Metric):
+    """Current value, overwritten on every flush"""
+
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def collect(self) -> Dict[str, Tuple[str, float]]:
+        with self.lock:
+            values = dict(self.values)
+        return {format_series(self.name, self.label_dict(key)): ('set', value) for key, value in values.items()}
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets.
+
+    Cumulative bucket counts, the sum and the count are all additive, so
+    every process pushes its increments and Redis holds the fleet total.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.pending: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts..., sum]
+
+    def observe(self, value: float, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            state = self.pending.get(key)
+            if state is None:
+                state = self.pending[key] = [0] * len(self.buckets) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def collect(self) -> Dict[str, Tuple[str, float]]:
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        series = {}
+        for key, state in pending.items():
+            labels = self.label_dict(key)
+            for bound, count in zip(self.buckets, state):
+                series[format_series(f"{self.name}_bucket", {**labels, 'le': format_value(bound)})] = ('add', count)
+            series[format_series(f"{self.name}_sum", labels)] = ('add', state[-1])
+            series[format_series(f"{self.name}_count", labels)] = ('add', state[len(self.buckets) - 1])
+        return series
+
+    def meta(self) -> Dict:
+        return {**super().meta(), 'buckets': list(self.buckets[:-1])}
+
+
+class MetricsRegistry:
+    """Process-local metrics pushed to Redis so every service shares one view.
+
+    Services record into in-memory counters, gauges and histograms at the
+    cost of a dict update. A background thread periodically adds the
+    increments to a Redis hash with HINCRBYFLOAT, labelled with the service
+    name, and render_text() turns that hash into the Prometheus text format
+    for the dashboard's /metrics endpoint.
+    """
+
+    VALUES_KEY = 'metrics:values'
+    META_KEY = 'metrics:meta'
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.lock = threading.Lock()
+        self.service = None
+        self.flusher = None
+
+    def register(self, metric_class, name: str, documentation: str, label_names=(), **kwargs) -> Metric:
+        """Get or create a metric; modules can declare the same metric independently"""
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, documentation, tuple(label_names), **kwargs)
+            elif not isinstance(metric, metric_class) or metric.label_names != tuple(label_names):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names=()) -> Counter:
+        return self.register(Counter, name, documentation, label_names)
+
+    def gauge(self, name: str, documentation: str, label_names=()) -> Gauge:
+        return self.register(Gauge, name, documentation, label_names)
+
+    def histogram(self, name: str, documentation: str, label_names=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram, name, documentation, label_names, buckets=buckets)
+
+    def flush(self, redis_client):
+        """Push local increments and gauge values to Redis"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+
+        # Increments are taken out of the metrics here, so a failed push drops one interval
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(self.META_KEY, mapping={metric.name: json.dumps(metric.meta()) for metric in metrics})
+        for metric in metrics:
+            for series, (operation, value) in metric.collect().items():
+                series = self.with_service(series)
+                if operation == 'add':
+                    pipe.hincrbyfloat(self.VALUES_KEY, series, value)
+                else:
+                    pipe.hset(self.VALUES_KEY, series, value)
+        pipe.execute()
+
+    def with_service(self, series: str) -> str:
+        """Add the service label to a formatted series name"""
+        if not self.service:
+            return series
+        label = f'service="{self.service}"'
+        if series.endswith('}'):
+            return series.replace('{', '{' + label + ',', 1)
+        return f"{series}{{{label}}}"
+
+    def start_flusher(self, redis_client, service: str, interval: float = FLUSH_INTERVAL):
+        """Flush to Redis every `interval` seconds from a daemon thread"""
+        self.service = service
+        if self.flusher:
+            return self.flusher
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush(redis_client)
+                except Exception as e:
+                    print(f"[METRICS] Flush failed: {e}")
+
+        self.flusher = threading.Thread(target=run, daemon=True)
+        self.flusher.start()
+        return self.flusher
+
+
+def series_sort_key(series: str):
+    """Group a metric's series by labels, with histogram buckets in bound order"""
+    name, _, labels = series.partition('{')
+    labels, le = labels.rstrip('}'), ''
+    if 'le="' in labels:
+        labels, _, le = labels.rpartition('le="')
+        labels, le = labels.rstrip(','), le.rstrip('"')
+
+    rank = 0 if name.endswith('_bucket') else 1 if name.endswith('_sum') else 2 if name.endswith('_count') else 0
+    return labels, rank, float('inf') if le == '+Inf' else float(le or 0)
+
+
+def render_text(redis_client) -> str:
+    """All metrics in Redis in the Prometheus text exposition format"""
+    meta = {name: json.loads(raw) for name, raw in redis_client.hgetall(MetricsRegistry.META_KEY).items()}
+    values = redis_client.hgetall(MetricsRegistry.VALUES_KEY)
+
+    by_metric: Dict[str, list] = {name: [] for name in meta}
+    for series, value in values.items():
+        base = series.partition('{')[0]
+        for candidate in (base, base.rsplit('_', 1)[0]):
+            if candidate in by_metric and (candidate == base or meta[candidate]['type'] == 'histogram'):
+                by_metric[candidate].append((series, value))
+                break
+
+    lines = []
+    for name in sorted(by_metric):
+        if not by_metric[name]:
+            continue
+        lines.append(f"# HELP {name} {meta[name]['help']}")
+        lines.append(f"# TYPE {name} {meta[name]['type']}")
+        for series, value in sorted(by_metric[name], key=lambda item: series_sort_key(item[0])):
+            lines.append(f"{series} {format_value(float(value))}")
+    return '\n'.join(lines) + '\n'
+
+
+# Shared registry for the process
+REGISTRY = MetricsRegistry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+start_flusher = REGISTRY.start_flusher
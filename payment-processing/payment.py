@@ -6,6 +6,7 @@ import redis
 
 from connection.arduino_manager import ArduinoManager
 from database.db_manager import DatabaseManager
+from monitoring import metrics
 
 # Redis configuration
 REDIS_HOST = 'localhost'
@@ -18,6 +19,11 @@ MINIMUM_CHARGE = 500  # Minimum charge for any stay
 MIN_BALANCE = 0  # Minimum allowed balance after transaction
 MAX_BALANCE = 999999999  # Maximum balance (safety check)
 
+# Telemetry pushed to Redis and exposed by the dashboard at /metrics
+PAYMENTS = metrics.counter('parking_payments_total', 'Payment requests by outcome', ('result',))
+PAYMENT_AMOUNT = metrics.counter('parking_payment_amount_rwf_total', 'Amount charged in RWF')
+PAYMENT_SECONDS = metrics.histogram('parking_payment_seconds', 'Time to process a payment request')
+
 
 class PaymentProcessor:
     def __init__(self):
@@ -25,6 +31,7 @@ class PaymentProcessor:
         self.redis_client = self.db_manager.redis_client  # For backward compatibility
         self.arduino_manager = None
         self.connected = False
+        metrics.start_flusher(self.redis_client, service='payment')
 
     def initialize_redis(self):
         """Initialize Redis connection"""
@@ -136,6 +143,7 @@ class PaymentProcessor:
 
             # Update payment status in database
             if self.db_manager.update_payment_status(int(entry_id), charge):
+                PAYMENT_AMOUNT.inc(charge)
                 self.db_manager.log_message(
                     f"Payment processed for {plate_number} - Amount: {charge} RWF, New balance: {new_balance} RWF",
                     "PAYMENT"
@@ -170,7 +178,9 @@ class PaymentProcessor:
 
             print(f"[PROCESSING] Plate: {plate}, Balance: {balance}")
 
-            success, response = self.process_transaction(plate, balance)
+            with PAYMENT_SECONDS.time():
+                success, response = self.process_transaction(plate, balance)
+            PAYMENTS.inc(result='ok' if success else 'declined')
 
             if success:
                 result = f"NEW_BALANCE:{response}"
@@ -182,6 +192,7 @@ class PaymentProcessor:
                 return result
 
         except Exception as e:
+            PAYMENTS.inc(result='error')
             error_result = f"ERROR:Request processing failed: {str(e)}"
             print(f"[ERROR] {error_result}")
             return error_result
@@ -0,0 +1,102 @@
+import unittest
+
+from dashboard.timeseries import MAX_FILL_SECONDS, OccupancyTimeSeries, RingSeries
+
+
+def sample(occupancy, unpaid=0, revenue=0.0):
+    return {'occupancy': occupancy, 'unpaid': unpaid, 'revenue': revenue}
+
+
+class RingSeriesTest(unittest.TestCase):
+    def test_samples_within_a_point_are_aggregated(self):
+        series = RingSeries(60, 10)
+        series.add(600, sample(2, revenue=100))
+        series.add(630, sample(4, revenue=150))
+        series.add(660, sample(9, revenue=200))
+
+        window = series.window(600, 719)
+        self.assertEqual(window['timestamps'], [600, 660])
+        self.assertEqual(window['occupancy'], [3.0, 9.0])  # Mean of the samples
+        self.assertEqual(window['revenue'], [150.0, 200.0])  # Last sample
+        self.assertEqual(window['filled'], [False, False])
+
+    def test_point_still_being_filled_is_returned(self):
+        series = RingSeries(1, 10)
+        series.add(100, sample(1))
+        series.add(100.5, sample(3))
+
+        window = series.window(95, 100)
+        self.assertEqual(window['timestamps'], [100])
+        self.assertEqual(window['occupancy'], [2.0])
+        self.assertEqual(window['filled'], [False])
+
+    def test_short_gap_is_filled_with_flagged_copies(self):
+        series = RingSeries(1, 60)
+        series.add(100, sample(5))
+        series.add(104, sample(7))
+
+        window = series.window(100, 104)
+        self.assertEqual(window['timestamps'], [100, 101, 102, 103, 104])
+        self.assertEqual(window['occupancy'], [5.0, 5.0, 5.0, 5.0, 7.0])
+        self.assertEqual(window['filled'], [False, True, True, True, False])
+
+    def test_long_gap_is_left_empty(self):
+        series = RingSeries(1, 60)
+        series.add(100, sample(5))
+        series.add(100 + MAX_FILL_SECONDS + 2, sample(7))
+
+        window = series.window(100, 100 + MAX_FILL_SECONDS + 2)
+        self.assertEqual(window['timestamps'], [100, 100 + MAX_FILL_SECONDS + 2])
+        self.assertEqual(window['filled'], [False, False])
+
+    def test_wrap_around_keeps_only_the_last_lap(self):
+        series = RingSeries(1, 5)
+        for second in range(100, 108):
+            series.add(second, sample(second))
+
+        window = series.window(100, 107)
+        self.assertEqual(window['timestamps'], [103, 104, 105, 106, 107])
+        self.assertEqual(window['occupancy'], [103.0, 104.0, 105.0, 106.0, 107.0])
+
+    def test_stale_positions_from_a_previous_lap_are_skipped(self):
+        series = RingSeries(1, 5)
+        series.add(100, sample(1))
+        series.add(101, sample(2))
+        series.add(120, sample(3))  # Lands on a position of the first lap
+
+        window = series.window(116, 120)
+        self.assertEqual(window['timestamps'], [120])
+
+
+class OccupancyTimeSeriesTest(unittest.TestCase):
+    def test_dumps_and_loads_keep_points_and_filled_flags(self):
+        saved = OccupancyTimeSeries()
+        saved.record(sample(5), timestamp=1000)
+        saved.record(sample(8), timestamp=1003)
+        saved.record(sample(9), timestamp=1004)
+
+        restored = OccupancyTimeSeries()
+        restored.loads(saved.dumps())
+        window = restored.series[0].window(1000, 1004)
+        self.assertEqual(window['timestamps'], [1000, 1001, 1002, 1003, 1004])
+        self.assertEqual(window['occupancy'], [5.0, 5.0, 5.0, 8.0, 9.0])
+        self.assertEqual(window['filled'], [False, True, True, False, False])
+
+    def test_dumps_and_loads_keep_the_point_being_filled(self):
+        saved = OccupancyTimeSeries()
+        saved.record(sample(4, revenue=100), timestamp=900)
+        saved.record(sample(6, revenue=200), timestamp=1000)
+
+        restored = OccupancyTimeSeries()
+        restored.loads(saved.dumps())
+        restored.record(sample(8, revenue=300), timestamp=1200)
+        restored.record(sample(1, revenue=400), timestamp=1800)  # Next 15-min point
+
+        window = restored.series[2].window(900, 1800)
+        self.assertEqual(window['timestamps'], [900, 1800])
+        self.assertEqual(window['occupancy'], [6.0, 1.0])  # Mean of all three samples before the restart and after
+        self.assertEqual(window['revenue'], [300.0, 400.0])
+
+
+if __name__ == '__main__':
+    unittest.main()